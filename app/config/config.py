@@ -24,10 +24,99 @@ class Settings(BaseSettings):
     DEEPGRAM_MODEL: str = Field(default="nova-2", env="DEEPGRAM_MODEL")
     ELEVENLABS_API_KEY: str = Field(..., env="ELEVENLABS_API_KEY")
     ELEVENLABS_VOICE_ID: str = Field(default="Antoni", env="ELEVENLABS_VOICE_ID")
+    ELEVENLABS_MODEL: str = Field(default="eleven_multilingual_v2", env="ELEVENLABS_MODEL")
+    # Streaming text-to-speech ("elevenlabs" or "fake", an offline tone generator)
+    TTS_PROVIDER: str = Field(default="elevenlabs", env="TTS_PROVIDER")
+    # Cache of synthesized utterances ("memory", "disk", "redis" or "none"); the memory tier is bounded in bytes
+    TTS_CACHE_BACKEND: str = Field(default="disk", env="TTS_CACHE_BACKEND")
+    TTS_CACHE_MAX_BYTES: int = Field(default=64 * 1024 * 1024, env="TTS_CACHE_MAX_BYTES")
+    TTS_CACHE_DIR: str = Field(default="cache/tts", env="TTS_CACHE_DIR")
+    TTS_CACHE_TTL: int = Field(default=7 * 24 * 3600, env="TTS_CACHE_TTL")
+    # Longer texts are rarely repeated, so they are not cached
+    TTS_CACHE_MAX_CHARS: int = Field(default=300, env="TTS_CACHE_MAX_CHARS")
+    TTS_CACHE_PREWARM: bool = Field(default=True, env="TTS_CACHE_PREWARM")
     
     # Audio processing settings
+    # Rate of all audio inside the voice loop (VAD, STT, TTS output); room audio is resampled to and from it
     AUDIO_SAMPLE_RATE: int = Field(default=16000, env="AUDIO_SAMPLE_RATE")
     AUDIO_CHUNK_SIZE: int = Field(default=4096, env="AUDIO_CHUNK_SIZE")
+    # Incoming audio held while VAD classifies it; older audio is dropped if processing falls behind
+    AUDIO_RING_BUFFER_MS: int = Field(default=2000, env="AUDIO_RING_BUFFER_MS")
+    # Agent speech is published at this rate in fixed frames, after a short jitter buffer
+    AUDIO_OUTPUT_SAMPLE_RATE: int = Field(default=48000, env="AUDIO_OUTPUT_SAMPLE_RATE")
+    AUDIO_OUTPUT_FRAME_MS: int = Field(default=20, env="AUDIO_OUTPUT_FRAME_MS")
+    AUDIO_OUTPUT_PREBUFFER_MS: int = Field(default=40, env="AUDIO_OUTPUT_PREBUFFER_MS")
+    
+    # Streaming speech-to-text ("deepgram" live websocket or "local" offline endpointing)
+    STT_PROVIDER: str = Field(default="deepgram", env="STT_PROVIDER")
+    # Silence (ms) after speech before a transcript is finalized and the turn ends
+    DEEPGRAM_ENDPOINTING_MS: int = Field(default=300, env="DEEPGRAM_ENDPOINTING_MS")
+    
+    # Voice activity detection on incoming audio ("energy" or "webrtc", which needs webrtcvad).
+    # Silence outside speech is not sent to STT; VAD_SILENCE_MS of silence ends the user's turn.
+    VAD_MODE: str = Field(default="energy", env="VAD_MODE")
+    VAD_ENERGY_THRESHOLD: float = Field(default=500.0, env="VAD_ENERGY_THRESHOLD")
+    VAD_SILENCE_MS: int = Field(default=300, env="VAD_SILENCE_MS")
+    VAD_FRAME_MS: int = Field(default=20, env="VAD_FRAME_MS")
+    
+    # Voice responses are spoken sentence by sentence while the LLM is still streaming
+    VOICE_TTS_CONCURRENCY: int = Field(default=2, env="VOICE_TTS_CONCURRENCY")
+    VOICE_SENTENCE_MAX_CHARS: int = Field(default=200, env="VOICE_SENTENCE_MAX_CHARS")
+    # Stop the assistant's response as soon as the user starts speaking over it
+    VOICE_BARGE_IN: bool = Field(default=True, env="VOICE_BARGE_IN")
+
+    # Request coalescing: share one in-flight LLM/research call across identical requests.
+    # When distributed, identical requests on other workers wait on a Redis lock.
+    SINGLEFLIGHT_DISTRIBUTED: bool = Field(default=False, env="SINGLEFLIGHT_DISTRIBUTED")
+    SINGLEFLIGHT_LOCK_TTL: float = Field(default=120.0, env="SINGLEFLIGHT_LOCK_TTL")
+    
+    # LLM response cache for the chat path ("memory", "redis" or "none")
+    LLM_CACHE_BACKEND: str = Field(default="memory", env="LLM_CACHE_BACKEND")
+    LLM_CACHE_TTL: int = Field(default=3600, env="LLM_CACHE_TTL")
+    LLM_CACHE_MAX_ENTRIES: int = Field(default=1000, env="LLM_CACHE_MAX_ENTRIES")
+    
+    # AI21 chat completion limits
+    AI21_TIMEOUT: float = Field(default=60.0, env="AI21_TIMEOUT")
+    AI21_MAX_CONCURRENCY: int = Field(default=16, env="AI21_MAX_CONCURRENCY")
+    
+    # Chat session storage ("memory" or "redis"); sessions expire after SESSION_TIMEOUT idle seconds
+    SESSION_STORE_BACKEND: str = Field(default="memory", env="SESSION_STORE_BACKEND")
+    SESSION_TIMEOUT: int = Field(default=3600, env="SESSION_TIMEOUT")
+    
+    # Conversation history sent to the LLM: recent messages verbatim, older turns summarized
+    HISTORY_MAX_TOKENS: int = Field(default=3000, env="HISTORY_MAX_TOKENS")
+    HISTORY_RECENT_MESSAGES: int = Field(default=8, env="HISTORY_RECENT_MESSAGES")
+    
+    # Research result cache: fresh for RESEARCH_CACHE_TTL seconds, then served stale while
+    # refreshing for RESEARCH_CACHE_STALE_TTL more. Similarity 0 disables near-duplicate matching.
+    # "memory", or "tiered"/"redis" to share results between workers
+    RESEARCH_CACHE_BACKEND: str = Field(default="memory", env="RESEARCH_CACHE_BACKEND")
+    RESEARCH_CACHE_TTL: int = Field(default=6 * 3600, env="RESEARCH_CACHE_TTL")
+    RESEARCH_CACHE_STALE_TTL: int = Field(default=42 * 3600, env="RESEARCH_CACHE_STALE_TTL")
+    RESEARCH_CACHE_SIMILARITY: float = Field(default=0.92, env="RESEARCH_CACHE_SIMILARITY")
+    
+    # Background deep-research job records and concurrency cap: "memory" (per worker) or "redis" (shared by all workers)
+    RESEARCH_JOB_BACKEND: str = Field(default="memory", env="RESEARCH_JOB_BACKEND")
+    # Background deep-research jobs running at once, across all workers with the redis backend
+    RESEARCH_MAX_CONCURRENT_JOBS: int = Field(default=2, env="RESEARCH_MAX_CONCURRENT_JOBS")
+    
+    # Research budgets in seconds. Each stage is also clipped to what is left of RESEARCH_TOTAL_TIMEOUT, which
+    # stays under the 60 s proxy read timeout with room to write the chat response. On timeout, partial
+    # findings are summarized in the remaining time or returned as a degraded result.
+    RESEARCH_STAGE_TIMEOUT: float = Field(default=25.0, env="RESEARCH_STAGE_TIMEOUT")
+    RESEARCH_REPORT_TIMEOUT: float = Field(default=20.0, env="RESEARCH_REPORT_TIMEOUT")
+    RESEARCH_TOTAL_TIMEOUT: float = Field(default=40.0, env="RESEARCH_TOTAL_TIMEOUT")
+    # Budgets for background research jobs, which no request is waiting on
+    RESEARCH_JOB_STAGE_TIMEOUT: float = Field(default=240.0, env="RESEARCH_JOB_STAGE_TIMEOUT")
+    RESEARCH_JOB_REPORT_TIMEOUT: float = Field(default=120.0, env="RESEARCH_JOB_REPORT_TIMEOUT")
+    RESEARCH_JOB_TOTAL_TIMEOUT: float = Field(default=360.0, env="RESEARCH_JOB_TOTAL_TIMEOUT")
+    
+    # Generated diagram cache: "memory", or "tiered" to keep a memory tier in front of Redis shared by all workers
+    DIAGRAM_CACHE_BACKEND: str = Field(default="memory", env="DIAGRAM_CACHE_BACKEND")
+    DIAGRAM_CACHE_TTL: int = Field(default=24 * 3600, env="DIAGRAM_CACHE_TTL")
+    DIAGRAM_CACHE_MAX_ENTRIES: int = Field(default=500, env="DIAGRAM_CACHE_MAX_ENTRIES")
+    # Return the diagram description from the main completion rather than a second call
+    DIAGRAM_INLINE_DESCRIPTION: bool = Field(default=True, env="DIAGRAM_INLINE_DESCRIPTION")
 
     model_config = {
         "env_file": ".env",
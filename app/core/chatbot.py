@@ -1,16 +1,20 @@
-from typing import Dict, Optional, List, Tuple
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
 from app.models.model import Message, ChatSession, ChatResponse
 from uuid import UUID, uuid4
-from ai21 import AI21Client
+from ai21 import AsyncAI21Client
 from ai21.models.chat import UserMessage, SystemMessage
 from app.config.config import get_settings
-from functools import lru_cache
+from app.utils.cache import create_cache
+from app.utils.singleflight import make_key
+from app.service.session_store import create_session_store
+import asyncio
 import json
 import hashlib
 import logging
-import time
 from datetime import datetime, timedelta
 from app.core.research_engine import research_engine
+from app.core.research_jobs import research_jobs
+from app.models.model import ResearchJob
 
 # Configure logging
 logging.basicConfig(
@@ -24,14 +28,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 settings = get_settings()
-# Initialize AI21 client with API key
-ai21_client = AI21Client(api_key=settings.AI21_API_KEY)
+# Initialize async AI21 client so completions never block the event loop
+ai21_client = AsyncAI21Client(api_key=settings.AI21_API_KEY, timeout_sec=settings.AI21_TIMEOUT)
 
 class CreativeAIChatbot:
     def __init__(self):
-        self.sessions: Dict[str, Dict[UUID, ChatSession]] = {}  # Map user_id to their sessions
-        self.session_expiry: Dict[UUID, float] = {}  # Track when sessions expire
-        self.SESSION_TIMEOUT = 60 * 60  # Sessions expire after 1 hour of inactivity
+        self.SESSION_TIMEOUT = settings.SESSION_TIMEOUT  # Sessions expire after this many seconds of inactivity
+        self.session_store = create_session_store(settings.SESSION_STORE_BACKEND, self.SESSION_TIMEOUT)
+        self.model = "jamba-large-1.6"
+        self._completion_semaphore: Optional[asyncio.Semaphore] = None
+        
+        # Cache of completions keyed by model, system prompt, context and message
+        self.response_cache = create_cache(
+            settings.LLM_CACHE_BACKEND,
+            name="llm_response",
+            prefix="llm:response",
+            default_ttl=settings.LLM_CACHE_TTL,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES
+        )
 
     async def process_message(
         self,
@@ -43,34 +57,20 @@ class CreativeAIChatbot:
         logger.info(f"Processing message for user: {user_id} (deep_research: {deep_research})")
         
         # Get or create session
-        session = self._get_or_create_session(user_id, session_id)
+        session = await self._get_or_create_session(user_id, session_id)
         
         # Add user message
         session.messages.append(Message(content=message, role="user"))
         
         try:
-            combined_context = {"research_findings": [], "research_sources": []}
-            
-            # Only perform research if deep_research is True
-            if deep_research:
-                logger.info("Starting deep research process...")
-                research_result = await research_engine.research_topic(
-                    query=message,
-                    context="",
-                    deep_research=True
-                )
-                
-                if research_result and research_result.findings:
-                    combined_context["research_findings"] = research_result.findings
-                    combined_context["research_sources"] = research_result.sources
-                    logger.info(f"Deep research completed with {len(research_result.findings)} findings")
+            combined_context = await self._gather_research_context(message, deep_research)
             
             # Generate response
             response = await self._generate_response(message, combined_context, session)
             session.messages.append(Message(content=response, role="assistant"))
             
-            # Update session expiry time
-            self._update_session_expiry(session.id)
+            # Persist the session, refreshing its expiry time
+            await self.session_store.save(session)
             
             return session
             
@@ -78,143 +78,379 @@ class CreativeAIChatbot:
             logger.error(f"Error processing message: {str(e)}", exc_info=True)
             raise
 
-    def _get_or_create_session(self, user_id: str, session_id: Optional[UUID] = None) -> ChatSession:
+    async def stream_message(
+        self,
+        user_id: str,
+        message: str,
+        session_id: Optional[UUID] = None,
+        deep_research: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        Get an existing session or create a new one for the given user
+        Process a message and stream progress and response tokens as events
         
         Args:
             user_id: ID of the user
+            message: The user message
             session_id: Optional ID of an existing session
+            deep_research: Whether to run deep research before responding
+            
+        Yields:
+            Events of the form {"event": name, "data": payload}, in order:
+            "session", optional "research" progress, "token" chunks and a final
+            "message"; an "error" ends the stream at any point, including before "session"
+        """
+        logger.info(f"Streaming message for user: {user_id} (deep_research: {deep_research})")
+        
+        try:
+            session = await self._get_or_create_session(user_id, session_id)
+            yield {"event": "session", "data": {"session_id": str(session.id)}}
+            
+            if deep_research:
+                yield {"event": "research", "data": {"status": "started"}}
+                
+                # Relay stage progress from the research engine while it runs
+                progress: asyncio.Queue = asyncio.Queue()
+                research = asyncio.ensure_future(self._gather_research_context(
+                    message,
+                    deep_research,
+                    progress_callback=lambda stage, value: progress.put_nowait((stage, value))
+                ))
+                while not research.done():
+                    getter = asyncio.ensure_future(progress.get())
+                    await asyncio.wait({research, getter}, return_when=asyncio.FIRST_COMPLETED)
+                    if getter.done():
+                        stage, value = getter.result()
+                        yield {"event": "research", "data": {"status": "progress", "stage": stage, "progress": value}}
+                    else:
+                        getter.cancel()
+                combined_context = research.result()
+            else:
+                combined_context = await self._gather_research_context(message, deep_research)
+            if deep_research:
+                yield {"event": "research", "data": {
+                    "status": "completed",
+                    "findings": len(combined_context["research_findings"]),
+                    "sources": combined_context["research_sources"],
+                    **combined_context["research_metadata"]
+                }}
+            
+            chunks = []
+            async for chunk in self._stream_response(message, combined_context):
+                chunks.append(chunk)
+                yield {"event": "token", "data": {"content": chunk}}
+            response = "".join(chunks)
+            
+            # Only record the exchange once the full response has been produced
+            session.messages.append(Message(content=message, role="user"))
+            session.messages.append(Message(content=response, role="assistant"))
+            await self.session_store.save(session)
+            
+            yield {"event": "message", "data": {"message": response, "session_id": str(session.id)}}
+            
+        except Exception as e:
+            logger.error(f"Error streaming message: {str(e)}", exc_info=True)
+            yield {"event": "error", "data": {"detail": str(e)}}
+
+    async def start_research_job(self, user_id: str, session_id: UUID, message: str) -> ResearchJob:
+        """
+        Run deep research for a message in the background
+        
+        When the job finishes, a research-informed response is generated and
+        appended to the chat session.
+        
+        Args:
+            user_id: ID of the user
+            session_id: Session the result should be attached to
+            message: The user message to research
             
         Returns:
-            The session
+            The queued research job
+        """
+        return await research_jobs.submit(
+            user_id=user_id,
+            query=message,
+            session_id=session_id,
+            run=lambda progress: research_engine.research_topic(
+                query=message,
+                context="",
+                deep_research=True,
+                progress_callback=progress,
+                budget_class="background"
+            ),
+            on_complete=self._attach_research_result
+        )
+
+    async def _attach_research_result(self, job: ResearchJob) -> Optional[str]:
+        """Answer the researched message with the findings and record it on the session"""
+        session = await self.session_store.get(job.user_id, job.session_id)
+        if session is None:
+            logger.warning(f"Session {job.session_id} expired before research job {job.id} finished")
+            return None
+        
+        combined_context = self._research_context(job.result)
+        response = await self._generate_response(job.query, combined_context, session)
+        
+        def _attach(latest: ChatSession) -> None:
+            latest.messages.append(Message(content=response, role="assistant"))
+            latest.metadata.setdefault("research_jobs", {})[job.id] = {
+                "query": job.query,
+                "findings": len(combined_context["research_findings"]),
+                "sources": combined_context["research_sources"],
+                **combined_context["research_metadata"]
+            }
+        
+        # The session may have moved on while the response was generated; apply to its latest state
+        if await self.session_store.update(job.user_id, job.session_id, _attach) is None:
+            logger.warning(f"Session {job.session_id} expired before research job {job.id} finished")
+            return None
+        return response
+
+    async def _gather_research_context(
+        self,
+        message: str,
+        deep_research: bool,
+        progress_callback=None
+    ) -> Dict:
         """
-        # Create user's session dictionary if it doesn't exist
-        if user_id not in self.sessions:
-            self.sessions[user_id] = {}
+        Run deep research when requested and collect its findings and sources
+        
+        Args:
+            message: The user message to research
+            deep_research: Whether to run deep research at all
+            progress_callback: Optional callback receiving (stage, progress) updates
             
-        # Clean expired sessions periodically
-        self._clean_expired_sessions()
+        Returns:
+            Context dict with "research_findings" and "research_sources"
+        """
+        # Only perform research if deep_research is True
+        if not deep_research:
+            return self._research_context(None)
+        
+        logger.info("Starting deep research process...")
+        research_result = await research_engine.research_topic(
+            query=message,
+            context="",
+            deep_research=True,
+            progress_callback=progress_callback
+        )
+        return self._research_context(research_result)
+
+    def _research_context(self, research_result) -> Dict:
+        """Build the combined context dict from a research result"""
+        combined_context = {"research_findings": [], "research_sources": [], "research_metadata": {}}
+        if research_result and research_result.findings:
+            combined_context["research_findings"] = research_result.findings
+            combined_context["research_sources"] = research_result.sources
+            combined_context["research_metadata"] = {
+                "timings": research_result.metadata.get("timings", {}),
+                "degraded": research_result.metadata.get("degraded")
+            }
+            logger.info(f"Deep research completed with {len(research_result.findings)} findings")
+        return combined_context
+
+    async def get_session(self, user_id: str, session_id: UUID) -> Optional[ChatSession]:
+        """
+        Get an existing, unexpired session for the given user
+        
+        Args:
+            user_id: ID of the user
+            session_id: ID of the session
             
+        Returns:
+            The session, or None if it does not exist or has expired
+        """
+        return await self.session_store.get(user_id, session_id)
+
+    async def _get_or_create_session(self, user_id: str, session_id: Optional[UUID] = None) -> ChatSession:
+        """
+        Get an existing session or create a new one for the given user
+        
+        Args:
+            user_id: ID of the user
+            session_id: Optional ID of an existing session
+            
+        Returns:
+            The session
+        """
         # If session_id is provided and exists for this user, return it
-        if session_id and session_id in self.sessions[user_id]:
-            logger.info(f"Retrieved existing session {session_id} for user {user_id}")
-            session = self.sessions[user_id][session_id]
-            return session
+        if session_id:
+            session = await self.session_store.get(user_id, session_id)
+            if session:
+                logger.info(f"Retrieved existing session {session_id} for user {user_id}")
+                return session
             
         # Otherwise create a new session
         session = ChatSession(user_id=user_id)
-        self.sessions[user_id][session.id] = session
-        self._update_session_expiry(session.id)
+        await self.session_store.save(session)
         logger.info(f"Created new session {session.id} for user {user_id}")
         
         return session
-        
-    def _update_session_expiry(self, session_id: UUID) -> None:
-        """Update the expiry time for a session"""
-        self.session_expiry[session_id] = time.time() + self.SESSION_TIMEOUT
-        
-    def _clean_expired_sessions(self) -> None:
-        """Remove expired sessions to prevent memory leaks"""
-        current_time = time.time()
-        expired_sessions = [sid for sid, expiry in self.session_expiry.items() if expiry < current_time]
-        
-        if expired_sessions:
-            logger.info(f"Cleaning {len(expired_sessions)} expired sessions")
-            
-            # Remove expired sessions from each user's sessions dict
-            for user_id, sessions in list(self.sessions.items()):
-                for session_id in list(sessions.keys()):
-                    if session_id in expired_sessions:
-                        del sessions[session_id]
-                
-                # Remove user entry if they have no sessions
-                if not sessions:
-                    del self.sessions[user_id]
-            
-            # Remove from expiry tracking
-            for session_id in expired_sessions:
-                if session_id in self.session_expiry:
-                    del self.session_expiry[session_id]
 
-    @lru_cache(maxsize=1000)
-    def _cache_llm_response(self, message_hash: str, context_hash: str) -> str:
-        """Cache for LLM responses"""
-        return ""  # Empty string triggers cache miss
+    def _response_cache_key(self, system_prompt: str, context: str, message: str) -> str:
+        """Build the response cache key from the model, system prompt, context hash and message hash"""
+        message_hash = hashlib.sha256(message.encode()).hexdigest()
+        context_hash = hashlib.sha256(context.encode()).hexdigest()
+        return make_key(self.model, system_prompt, context_hash, message_hash)
 
     async def _generate_response(self, message: str, combined_context: Dict, session: ChatSession) -> str:
         try:
-            # Add debug logging for research findings
-            logger.debug(f"Research findings: {bool(combined_context.get('research_findings'))}")
-            
-            # Format context based on whether we have research findings
-            context = ""
-            messages = [SystemMessage(content=self._get_system_prompt())]
-            
-            # Check if we have research findings and add them to context
-            if (combined_context.get("research_findings") and 
-                isinstance(combined_context["research_findings"], list) and 
-                len(combined_context["research_findings"]) > 0):
-                
-                research_finding = combined_context["research_findings"][0]
-                logger.info(f"Using research findings for response generation: {research_finding.get('source')}")
-                
-                # Prioritize research content in the context
-                research_context = ""
-                if research_finding.get('summary'):
-                    research_context += f"Research Summary:\n{research_finding['summary']}\n\n"
-                if research_finding.get('details'):
-                    research_context += "Key Findings:\n" + "\n".join(f"- {detail}" for detail in research_finding['details'])
-                
-                # Set full context
-                context = research_context + "\n\n" + self._format_research_context(combined_context)
-            else:
-                # Use standard research context format if no specific findings
-                context = self._format_research_context(combined_context)
-            
-            # Add context if we have any
-            if context:
-                messages.append(SystemMessage(content=f"Here is relevant research information:\n{context}"))
-            
-            # Add user message
-            messages.append(UserMessage(content=message))
-            
-            # Calculate hashes for caching
-            message_hash = hashlib.sha256(message.encode()).hexdigest()
-            context_hash = hashlib.sha256(context.encode()).hexdigest()
+            messages, cache_key = self._build_messages(message, combined_context)
             
             # Try to get from cache
-            try:
-                cached_response = self._cache_llm_response(message_hash, context_hash)
+            if self.response_cache is not None:
+                cached_response = await self.response_cache.get(cache_key)
                 if cached_response:
+                    logger.info("Serving chat response from cache")
                     return cached_response
-            except Exception as e:
-                logger.warning(f"Cache retrieval failed: {str(e)}")
             
             # Use AI21 Client for chat completion with a single model
-            response = ai21_client.chat.completions.create(
-                model="jamba-large-1.6",
-                messages=messages,
-                temperature=0.8,
-                max_tokens=500,
-                top_p=0.95,
-                presence_penalty=0.6,
-                frequency_penalty=0.5,
-                response_format={"type": "text"},
-                stop=None,
-            )
+            response = await self._create_completion(messages)
             
             response_text = response.choices[0].message.content
             
             # Cache the response
-            self._cache_llm_response.cache_clear()
-            self._cache_llm_response(message_hash, context_hash)
+            if self.response_cache is not None and response_text:
+                await self.response_cache.set(cache_key, response_text)
             
             return response_text
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}")
             raise Exception(f"Error generating response: {str(e)}")
 
+    async def _stream_response(self, message: str, combined_context: Dict) -> AsyncIterator[str]:
+        """
+        Stream the response text as it is generated
+        
+        Args:
+            message: The user message
+            combined_context: Research findings and sources
+            
+        Yields:
+            Response text chunks
+        """
+        messages, cache_key = self._build_messages(message, combined_context)
+        
+        if self.response_cache is not None:
+            cached_response = await self.response_cache.get(cache_key)
+            if cached_response:
+                logger.info("Serving streamed chat response from cache")
+                yield cached_response
+                return
+        
+        chunks = []
+        async for chunk in self._stream_completion(messages):
+            chunks.append(chunk)
+            yield chunk
+        
+        response_text = "".join(chunks)
+        if self.response_cache is not None and response_text:
+            await self.response_cache.set(cache_key, response_text)
+
+    def _build_messages(self, message: str, combined_context: Dict) -> Tuple[List, str]:
+        """
+        Build the completion messages and the response cache key
+        
+        Args:
+            message: The user message
+            combined_context: Research findings and sources
+            
+        Returns:
+            Tuple of the chat messages and the cache key for this prompt
+        """
+        # Add debug logging for research findings
+        logger.debug(f"Research findings: {bool(combined_context.get('research_findings'))}")
+        
+        # Format context based on whether we have research findings
+        context = ""
+        system_prompt = self._get_system_prompt()
+        messages = [SystemMessage(content=system_prompt)]
+        
+        # Check if we have research findings and add them to context
+        if (combined_context.get("research_findings") and 
+            isinstance(combined_context["research_findings"], list) and 
+            len(combined_context["research_findings"]) > 0):
+            
+            research_finding = combined_context["research_findings"][0]
+            logger.info(f"Using research findings for response generation: {research_finding.get('source')}")
+            
+            # Prioritize research content in the context
+            research_context = ""
+            if research_finding.get('summary'):
+                research_context += f"Research Summary:\n{research_finding['summary']}\n\n"
+            if research_finding.get('details'):
+                research_context += "Key Findings:\n" + "\n".join(f"- {detail}" for detail in research_finding['details'])
+            
+            # Set full context
+            context = research_context + "\n\n" + self._format_research_context(combined_context)
+        else:
+            # Use standard research context format if no specific findings
+            context = self._format_research_context(combined_context)
+        
+        # Add context if we have any
+        if context:
+            messages.append(SystemMessage(content=f"Here is relevant research information:\n{context}"))
+        
+        # Add user message
+        messages.append(UserMessage(content=message))
+        
+        return messages, self._response_cache_key(system_prompt, context, message)
+
+    def _get_completion_semaphore(self) -> asyncio.Semaphore:
+        """Create the concurrency limiter lazily so it binds to the running event loop"""
+        if self._completion_semaphore is None:
+            self._completion_semaphore = asyncio.Semaphore(settings.AI21_MAX_CONCURRENCY)
+        return self._completion_semaphore
+
+    def _completion_request(self, messages: List, stream: bool = False):
+        """Create the AI21 chat completion call with the chat generation parameters"""
+        return ai21_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.8,
+            max_tokens=500,
+            top_p=0.95,
+            presence_penalty=0.6,
+            frequency_penalty=0.5,
+            response_format={"type": "text"},
+            stop=None,
+            stream=stream,
+        )
+
+    async def _create_completion(self, messages: List):
+        """
+        Call the AI21 chat completion API without blocking the event loop
+        
+        Args:
+            messages: Chat messages to send
+            
+        Returns:
+            The completion response
+        """
+        async with self._get_completion_semaphore():
+            return await asyncio.wait_for(
+                self._completion_request(messages),
+                timeout=settings.AI21_TIMEOUT
+            )
+
+    async def _stream_completion(self, messages: List) -> AsyncIterator[str]:
+        """
+        Stream an AI21 chat completion, holding a concurrency slot until it finishes
+        
+        Args:
+            messages: Chat messages to send
+            
+        Yields:
+            Content deltas as they arrive
+        """
+        async with self._get_completion_semaphore():
+            stream = await asyncio.wait_for(
+                self._completion_request(messages, stream=True),
+                timeout=settings.AI21_TIMEOUT
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
     def _format_research_context(self, combined_context: Dict) -> str:
         """Format research findings into a single context"""
         context_parts = []
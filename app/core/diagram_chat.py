@@ -1,19 +1,40 @@
-from typing import Dict, Optional, List, Union, Any
+from typing import AsyncIterator, Dict, Optional, List, Tuple, Union, Any
 from app.models.model import Message, ChatSession, DiagramResponse
 from uuid import UUID
 from groq import AsyncGroq
 from app.config.config import get_settings
 from app.service.qdrant_service import QdrantService
-from functools import lru_cache
-import hashlib
+from app.utils.singleflight import SingleFlight, make_key
+from app.utils.history import ConversationHistoryManager, build_summary_prompt
+from app.utils.cache import create_cache
+from app.utils.json_stream import JSONArrayItemExtractor
+from app.utils.keyword_matcher import KeywordMatcher
+from app.utils.mermaid_builder import ArchitectureGraph, render_mermaid
+from app.utils.mermaid_validator import parse_json, repair_mermaid, validate_mermaid
 from enum import Enum
-import json
+import asyncio
 import logging
 import traceback
 import re
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_DESCRIPTION = "A diagram showing the requested architecture components and their relationships."
+
+# Appended to system prompts so the description arrives with the diagram in one completion
+TEXT_DESCRIPTION_INSTRUCTION = (
+    "\nAfter the diagram, add one final line starting with 'Description:' that briefly describes "
+    "the diagram in one sentence. Never mention that it was generated by an AI model."
+)
+JSON_DESCRIPTION_INSTRUCTION = (
+    '\nAlso include a top-level "description" field in the JSON: one sentence describing the '
+    "diagram. Never mention that it was generated by an AI model."
+)
+DESCRIPTION_LINE = re.compile(r"^\s*\**description\**\s*:\**\s*(.*)$", re.IGNORECASE)
+
+# Architecture JSON arrays streamed item by item, and the event each item is sent as
+STREAMED_ARRAYS = {"nodes": "node", "connections": "connection", "clusters": "cluster"}
+
 class DiagramType(Enum):
     FLOWCHART = "flowchart"
     SEQUENCE = "sequenceDiagram"
@@ -25,12 +46,100 @@ class DiagramType(Enum):
     AI_ARCHITECTURE = "ai_architecture"
     SOFTWARE_ARCHITECTURE = "software_architecture"
 
+# (diagram type, weight, phrases) for diagram type detection. Explicit diagram names outweigh
+# architecture terms, which outweigh generic words; ties go to the type listed first.
+DIAGRAM_KEYWORDS = [
+    (DiagramType.SOFTWARE_ARCHITECTURE, 3.0, [
+        # General architecture terms
+        "software architecture", "system architecture", "application architecture",
+        "high-level design", "system design", "component diagram", "deployment diagram",
+        "architectural pattern", "solution architecture", "technical architecture",
+        
+        # Specific architectural patterns
+        "microservice", "distributed system", "service-oriented",
+        "api gateway", "cloud architecture", "serverless", "event-driven",
+        "domain-driven", "layered architecture", "hexagonal architecture",
+        "onion architecture", "clean architecture", "cqrs", "event sourcing",
+        "mvc", "model-view-controller", "mvvm", "spa architecture", "monolith",
+        "broker pattern", "circuit breaker", "saga pattern", "bulkhead pattern",
+        "strangler pattern", "backends for frontends", "bff pattern", "sidecar pattern",
+        "ambassador pattern", "n-tier", "pipeline architecture",
+        
+        # Cloud-specific architectures
+        "cloud-native", "multi-cloud", "hybrid cloud", "container orchestration",
+        "kubernetes architecture", "docker architecture", "service mesh", "istio",
+        
+        # Data architecture patterns
+        "data pipeline", "etl architecture", "data lake", "data warehouse",
+        "data mesh", "lambda architecture", "kappa architecture",
+        
+        # Integration patterns
+        "integration architecture", "message queue", "broker", "enterprise service bus",
+        "api management", "webhook architecture", "pub-sub", "publisher-subscriber"
+    ]),
+    (DiagramType.AI_ARCHITECTURE, 3.0, [
+        "ai architecture", "rag architecture", "agent workflow",
+        "llm architecture", "ai system", "agent based",
+        "rag system", "rag app", "ai app architecture",
+        "llm system", "language model architecture", "embedding architecture",
+        "conversational ai", "chatbot architecture", "cognitive architecture",
+        "machine learning pipeline", "ai assistant", "agent system",
+        "multi-agent system", "fine-tuning architecture", "neural architecture"
+    ]),
+    (DiagramType.FLOWCHART, 5.0, ["flowchart", "flow chart", "flow diagram"]),
+    (DiagramType.FLOWCHART, 1.0, ["flow", "process", "workflow", "steps", "algorithm"]),
+    (DiagramType.SEQUENCE, 5.0, ["sequence diagram"]),
+    (DiagramType.SEQUENCE, 1.0, ["sequence", "interaction", "communication", "message", "api call"]),
+    (DiagramType.STATE, 5.0, ["state diagram", "state machine"]),
+    (DiagramType.STATE, 1.0, ["state", "status", "transition", "lifecycle", "phase"]),
+    (DiagramType.CLASS, 5.0, ["class diagram", "uml"]),
+    (DiagramType.CLASS, 1.0, ["class", "object", "inheritance", "method", "attribute", "oop"]),
+    (DiagramType.ER, 5.0, ["er diagram", "erd", "entity relationship", "entity-relationship"]),
+    (DiagramType.ER, 1.0, ["entity", "database", "er", "table", "relationship", "schema"]),
+    (DiagramType.GANTT, 5.0, ["gantt", "gantt chart"]),
+    (DiagramType.GANTT, 1.0, ["timeline", "schedule", "project", "task"]),
+    (DiagramType.MINDMAP, 5.0, ["mindmap", "mind map"]),
+    (DiagramType.MINDMAP, 1.0, ["mind", "concept", "brainstorm", "idea", "map", "hierarchy"]),
+]
+
 class DiagramChatbot:
     def __init__(self):
         self.sessions: Dict[UUID, ChatSession] = {}
         settings = get_settings()
         self.groq_client = AsyncGroq(api_key=settings.GROQ_API_KEY)
         self.qdrant_client = QdrantService.get_instance()
+        self.model = "llama-3.3-70b-versatile"
+        self._type_matcher = KeywordMatcher(DIAGRAM_KEYWORDS)
+        
+        # Identical concurrent diagram requests share a single Groq round-trip
+        self._singleflight = SingleFlight(
+            "diagram",
+            distributed=settings.SINGLEFLIGHT_DISTRIBUTED,
+            lock_ttl=settings.SINGLEFLIGHT_LOCK_TTL,
+            serializer=lambda response: response.model_dump_json(),
+            deserializer=DiagramResponse.model_validate_json
+        )
+        
+        # Generated diagrams keyed by normalized prompt, diagram type, options and model
+        self.cache = create_cache(
+            settings.DIAGRAM_CACHE_BACKEND,
+            "diagram",
+            prefix="diagram:response",
+            default_ttl=settings.DIAGRAM_CACHE_TTL,
+            max_entries=settings.DIAGRAM_CACHE_MAX_ENTRIES
+        )
+        
+        # Ask for the description in the main completion instead of a second serial call
+        self.inline_description = settings.DIAGRAM_INLINE_DESCRIPTION
+        # Background description tasks, held so they are not garbage-collected mid-run
+        self._description_tasks = set()
+        
+        # Bound the chat history sent per turn; older turns are summarized in the background
+        self.history = ConversationHistoryManager(
+            max_tokens=settings.HISTORY_MAX_TOKENS,
+            recent_messages=settings.HISTORY_RECENT_MESSAGES,
+            summarizer=self._summarize_history
+        )
         
         # System prompts for different diagram types
         self.diagram_prompts = {
@@ -141,185 +250,208 @@ class DiagramChatbot:
         }
 
     def _detect_diagram_type(self, query: str) -> DiagramType:
-        query = query.lower()
+        # Default to software architecture for better chance of success with complex diagrams
+        return self._type_matcher.best(query, default=DiagramType.SOFTWARE_ARCHITECTURE)
+
+    async def generate_diagram(self, message: str, options: Optional[Dict] = None) -> DiagramResponse:
+        diagram_type = self._detect_diagram_type(message)
+        key = self._cache_key(message, diagram_type, options)
         
-        # Check for software architecture specific keywords (broader than just AI)
-        software_arch_patterns = [
-            # General architecture terms
-            "software architecture", "system architecture", "application architecture",
-            "high-level design", "system design", "component diagram", "deployment diagram",
-            "architectural pattern", "solution architecture", "technical architecture",
-            
-            # Specific architectural patterns
-            "microservice", "microservices", "distributed system", "service-oriented",
-            "api gateway", "cloud architecture", "serverless", "event-driven",
-            "domain-driven", "layered architecture", "hexagonal architecture", 
-            "onion architecture", "clean architecture", "cqrs", "event sourcing",
-            "mvc", "model-view-controller", "mvvm", "spa architecture", "monolith",
-            "broker pattern", "circuit breaker", "saga pattern", "bulkhead pattern", 
-            "strangler pattern", "backends for frontends", "bff pattern", "sidecar pattern",
-            "ambassador pattern", "n-tier", "pipeline architecture",
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                try:
+                    logger.info(f"Serving {diagram_type.value} diagram from cache")
+                    return DiagramResponse.model_validate_json(cached)
+                except ValueError:
+                    logger.warning("Discarding unreadable cached diagram")
+        
+        response = await self._singleflight.do(
+            key, lambda: self._generate_and_cache(key, message, diagram_type, options)
+        )
+        # Callers may mutate the response, so each one gets its own copy
+        return response.model_copy(deep=True)
+
+    def _cache_key(self, message: str, diagram_type: DiagramType, options: Optional[Dict]) -> str:
+        """Key diagrams on the normalized prompt so whitespace and case differences still hit"""
+        return make_key(" ".join(message.lower().split()), diagram_type.value, options or {}, self.model)
+
+    async def _generate_and_cache(
+        self,
+        key: str,
+        message: str,
+        diagram_type: DiagramType,
+        options: Optional[Dict] = None
+    ) -> DiagramResponse:
+        response = await self._generate_diagram(message, diagram_type, options)
+        await self._cache_response(key, response)
+        return response
+
+    async def _cache_response(self, key: str, response: DiagramResponse) -> Optional[asyncio.Task]:
+        """
+        Cache a generated diagram.
+        
+        A pending description is generated in the background and written to the
+        cache when ready, so the diagram itself is returned without waiting.
+        
+        Returns:
+            The task resolving to the description, or None if none was started
+        """
+        # Fallback diagrams are not what was asked for; let the next request retry
+        if self.cache is None or "fallback" in response.metadata:
+            return None
+        await self.cache.set(key, response.model_dump_json())
+        if response.metadata.get("description_pending"):
+            return self._schedule_description(key, response.model_copy(deep=True))
+        return None
+
+    def _schedule_description(self, key: Optional[str], response: DiagramResponse) -> asyncio.Task:
+        """Generate a missing description off the request path, updating the cached diagram when ``key`` is given"""
+        async def _describe() -> str:
+            response.description = await self._generate_description(
+                f"Briefly describe this diagram in one sentence and never mention that this is generated by an AI model:\n{response.syntax}"
+            )
+            response.metadata.pop("description_pending", None)
+            if key is not None and self.cache is not None:
+                try:
+                    await self.cache.set(key, response.model_dump_json())
+                except Exception as e:
+                    logger.error(f"Error caching diagram description: {str(e)}")
+            return response.description
+
+        task = asyncio.ensure_future(_describe())
+        self._description_tasks.add(task)
+        task.add_done_callback(self._description_tasks.discard)
+        return task
+
+    async def stream_diagram(self, message: str, options: Optional[Dict] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a diagram, emitting it progressively as the completion streams in.
+        
+        Text diagram types forward syntax line by line. Architecture types parse
+        the streamed JSON incrementally and emit each node, connection and
+        cluster once it is complete.
+        
+        Yields:
+            Events as {"event": ..., "data": ...} dicts: "start", then "syntax"
+            or "node"/"connection"/"cluster" events, then "diagram" (or "error").
+            A diagram without an inline description is followed by a
+            "description" event once one has been generated.
+        """
+        try:
+            diagram_type = self._detect_diagram_type(message)
+            key = self._cache_key(message, diagram_type, options)
+            yield {"event": "start", "data": {"diagram_type": diagram_type.value}}
             
-            # Cloud-specific architectures
-            "cloud-native", "multi-cloud", "hybrid cloud", "container orchestration",
-            "kubernetes architecture", "docker architecture", "service mesh", "istio",
+            if self.cache is not None:
+                cached = await self.cache.get(key)
+                if cached is not None:
+                    logger.info(f"Serving streamed {diagram_type.value} diagram from cache")
+                    response = self.attach_structure(DiagramResponse.model_validate_json(cached))
+                    yield {"event": "diagram", "data": response.model_dump(mode="json")}
+                    return
             
-            # Data architecture patterns
-            "data pipeline", "etl architecture", "data lake", "data warehouse",
-            "data mesh", "lambda architecture", "kappa architecture",
+            is_architecture = diagram_type in (DiagramType.AI_ARCHITECTURE, DiagramType.SOFTWARE_ARCHITECTURE)
+            extractor = JSONArrayItemExtractor(STREAMED_ARRAYS) if is_architecture else None
+            parts = []
+            pending_line = ""
+            tokens = None
             
-            # Integration patterns
-            "integration architecture", "message queue", "broker", "enterprise service bus",
-            "api management", "webhook architecture", "pub-sub", "publisher-subscriber"
-        ]
-
-        ai_arch_patterns = [
-            "ai architecture", "rag architecture", "agent workflow", 
-            "llm architecture", "ai system", "agent based", 
-            "rag system", "rag app", "ai app architecture", 
-            "llm system", "language model architecture", "embedding architecture",
-            "conversational ai", "chatbot architecture", "cognitive architecture",
-            "machine learning pipeline", "ai assistants", "agent system",
-            "multi-agent system", "fine-tuning architecture", "neural architecture"
-        ]
+            logger.info(f"Streaming diagram of type: {diagram_type.value}")
+            stream = await self.groq_client.chat.completions.create(
+                **self._completion_params(message, diagram_type), stream=True
+            )
+            async for chunk in stream:
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+                if usage is not None:
+                    tokens = usage.total_tokens
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                text = chunk.choices[0].delta.content
+                parts.append(text)
+                
+                if extractor is not None:
+                    for array_key, item in extractor.feed(text):
+                        yield {"event": STREAMED_ARRAYS[array_key], "data": item}
+                    continue
+                
+                # Forward whole lines so the inline description line can be held back
+                lines = (pending_line + text).split("\n")
+                pending_line = lines.pop()
+                for line in lines:
+                    if not DESCRIPTION_LINE.match(line):
+                        yield {"event": "syntax", "data": {"content": line + "\n"}}
             
-        # Check for specific software architectural patterns
-        if any(phrase in query for phrase in software_arch_patterns):
-            return DiagramType.SOFTWARE_ARCHITECTURE
-        
-        # Check for AI architecture specific keywords
-        elif any(phrase in query for phrase in ai_arch_patterns):
-            return DiagramType.AI_ARCHITECTURE
+            if pending_line and extractor is None and not DESCRIPTION_LINE.match(pending_line):
+                yield {"event": "syntax", "data": {"content": pending_line}}
             
-        # Check for other diagram types
-        elif any(word in query for word in ["flow", "process", "workflow", "steps", "algorithm"]):
-            return DiagramType.FLOWCHART
-        elif any(word in query for word in ["sequence", "interaction", "communication", "message", "api call"]):
-            return DiagramType.SEQUENCE
-        elif any(word in query for word in ["state", "status", "transition", "lifecycle", "phase"]):
-            return DiagramType.STATE
-        elif any(word in query for word in ["class", "object", "inheritance", "method", "attribute", "oop"]):
-            return DiagramType.CLASS
-        elif any(word in query for word in ["entity", "database", "er", "table", "relationship", "schema"]):
-            return DiagramType.ER
-        elif any(word in query for word in ["timeline", "schedule", "gantt", "project", "task"]):
-            return DiagramType.GANTT
-        elif any(word in query for word in ["mind", "concept", "brainstorm", "idea", "map", "hierarchy"]):
-            return DiagramType.MINDMAP
+            response = await self._build_response(message, diagram_type, options, "".join(parts).strip(), tokens)
+            description_task = await self._cache_response(key, response)
+            yield {"event": "diagram", "data": self.attach_structure(response).model_dump(mode="json")}
             
-        # Default to software architecture for better chance of success with complex diagrams
-        return DiagramType.SOFTWARE_ARCHITECTURE
+            if response.metadata.get("description_pending"):
+                if description_task is None:
+                    description_task = self._schedule_description(None, response.model_copy(deep=True))
+                # Shielded so a disconnecting client does not stop the cache update
+                description = await asyncio.shield(description_task)
+                yield {"event": "description", "data": {"description": description}}
+        except Exception as e:
+            logger.error(f"Error streaming diagram: {str(e)}", exc_info=True)
+            yield {"event": "error", "data": {"detail": str(e)}}
 
-    async def generate_diagram(self, message: str, options: Optional[Dict] = None) -> DiagramResponse:
+    @staticmethod
+    def attach_structure(response: DiagramResponse) -> DiagramResponse:
+        """Expose the nodes, connections and clusters of architecture diagrams for frontend rendering"""
+        if response.diagram_type in [DiagramType.AI_ARCHITECTURE.value, DiagramType.SOFTWARE_ARCHITECTURE.value]:
+            if response.metadata and "raw_data" in response.metadata:
+                raw_data = response.metadata["raw_data"]
+                response.nodes = raw_data.get("nodes", [])
+                response.connections = raw_data.get("connections", [])
+                response.clusters = raw_data.get("clusters", [])
+                response.raw_structure = raw_data
+        return response
+
+    def _system_prompt(self, diagram_type: DiagramType) -> str:
+        prompt = self.diagram_prompts[diagram_type]
+        if not self.inline_description:
+            return prompt
+        if diagram_type in (DiagramType.AI_ARCHITECTURE, DiagramType.SOFTWARE_ARCHITECTURE):
+            return prompt + JSON_DESCRIPTION_INSTRUCTION
+        return prompt + TEXT_DESCRIPTION_INSTRUCTION
+
+    @staticmethod
+    def _split_description(content: str) -> Tuple[str, Optional[str]]:
+        """Separate the trailing 'Description:' line from diagram syntax"""
+        lines = content.rstrip().splitlines()
+        for index in range(len(lines) - 1, -1, -1):
+            match = DESCRIPTION_LINE.match(lines[index])
+            if match:
+                syntax = "\n".join(lines[:index] + lines[index + 1:]).strip()
+                return syntax, match.group(1).strip() or None
+        return content, None
+
+    async def _generate_diagram(
+        self,
+        message: str,
+        diagram_type: DiagramType,
+        options: Optional[Dict] = None
+    ) -> DiagramResponse:
         try:
-            diagram_type = self._detect_diagram_type(message)
-            system_prompt = self.diagram_prompts[diagram_type]
-            
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": message}
-            ]
-            
             logger.info(f"Generating diagram of type: {diagram_type.value}")
             
-            # Use Claude 3 Opus for complex AI architecture diagrams when available
-            # For testing, let's use mixtral for all diagram types
-            model = "llama-3.3-70b-versatile"  # Update to the new supported model
-            
             try:
-                logger.info(f"Calling Groq API with model: {model}")
+                logger.info(f"Calling Groq API with model: {self.model}")
                 completion = await self.groq_client.chat.completions.create(
-                    model=model,
-                    messages=messages,
-                    temperature=0.2 if diagram_type == DiagramType.AI_ARCHITECTURE else 0.7,
-                    max_tokens=4000
+                    **self._completion_params(message, diagram_type)
                 )
                 
                 content = completion.choices[0].message.content.strip()
                 logger.info(f"Received response from Groq API, length: {len(content)}")
                 
-                if diagram_type in [DiagramType.AI_ARCHITECTURE, DiagramType.SOFTWARE_ARCHITECTURE]:
-                    try:
-                        # Find JSON content if present in the response
-                        json_match = re.search(r'```(?:json)?\s*\n(.*?)\n```', content, re.DOTALL)
-                        if json_match:
-                            json_content = json_match.group(1)
-                        else:
-                            # Try to find JSON directly
-                            json_content = re.search(r'(\{.*\})', content, re.DOTALL)
-                            if json_content:
-                                json_content = json_content.group(1)
-                            else:
-                                json_content = content
-                        
-                        # Parse JSON structure
-                        diagram_data = json.loads(json_content)
-                        
-                        # Convert to Mermaid syntax
-                        syntax = self._convert_ai_architecture_to_diagram(diagram_data)
-                        
-                        # Store raw data in metadata
-                        metadata = {
-                            "raw_data": diagram_data,
-                            "options": options or {},
-                            "model": model,
-                            "tokens": completion.usage.total_tokens
-                        }
-                    except Exception as e:
-                        logger.error(f"Error processing architecture JSON: {str(e)}")
-                        logger.error(traceback.format_exc())
-                        
-                        # Fallback to flowchart
-                        logger.info("Falling back to flowchart generation")
-                        fallback_messages = [
-                            {"role": "system", "content": self.diagram_prompts[DiagramType.FLOWCHART]},
-                            {"role": "user", "content": message}
-                        ]
-                        
-                        fallback_completion = await self.groq_client.chat.completions.create(
-                            model="mixtral-8x7b-v0.1",  # Update here as well
-                            messages=fallback_messages,
-                            temperature=0.7
-                        )
-                        
-                        syntax = fallback_completion.choices[0].message.content.strip()
-                        diagram_type = DiagramType.FLOWCHART
-                        
-                        metadata = {
-                            "error": f"Failed to parse architecture JSON: {str(e)}",
-                            "raw_content": content[:500],  # Include part of the raw content for debugging
-                            "options": options or {},
-                            "model": model,
-                            "fallback": "flowchart",
-                            "tokens": completion.usage.total_tokens
-                        }
-                else:
-                    syntax = content
-                    metadata = {
-                        "options": options or {},
-                        "model": model,
-                        "tokens": completion.usage.total_tokens
-                    }
-                
-                # Generate description
-                description_prompt = f"Briefly describe this diagram in one sentence and never mention that this is generated by an AI model:\n{syntax}"
-                
-                try:
-                    description = await self._generate_description(description_prompt)
-                except Exception as e:
-                    logger.error(f"Error generating description: {str(e)}")
-                    description = "A diagram showing the requested architecture components and their relationships."
-                
-                # Create the response object
-                response = DiagramResponse(
-                    diagram_type=diagram_type.value,
-                    syntax=syntax,
-                    description=description,
-                    metadata=metadata
+                return await self._build_response(
+                    message, diagram_type, options, content, completion.usage.total_tokens
                 )
                 
-                return response
-                
             except Exception as e:
                 logger.error(f"Error calling Groq API: {str(e)}")
                 logger.error(traceback.format_exc())
@@ -330,6 +462,128 @@ class DiagramChatbot:
             logger.error(traceback.format_exc())
             raise e
 
+    @staticmethod
+    def _repair_syntax(syntax: str, metadata: Dict[str, Any]) -> str:
+        """Fix common Mermaid breakages locally and record what could not be fixed"""
+        repaired = repair_mermaid(syntax)
+        if repaired != syntax.strip():
+            metadata["syntax_repaired"] = True
+        errors = validate_mermaid(repaired)
+        if errors:
+            logger.warning(f"Diagram syntax still has issues after repair: {errors}")
+            metadata["validation_errors"] = errors
+        return repaired
+
+    def _completion_params(self, message: str, diagram_type: DiagramType) -> Dict[str, Any]:
+        """Groq chat completion arguments for a diagram request"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self._system_prompt(diagram_type)},
+                {"role": "user", "content": message}
+            ],
+            "temperature": 0.2 if diagram_type == DiagramType.AI_ARCHITECTURE else 0.7,
+            "max_tokens": 4000
+        }
+
+    async def _build_response(
+        self,
+        message: str,
+        diagram_type: DiagramType,
+        options: Optional[Dict],
+        content: str,
+        tokens: Optional[int]
+    ) -> DiagramResponse:
+        """Turn a completed diagram completion into a response, falling back to a flowchart on bad JSON"""
+        model = self.model
+        description = None
+        
+        if diagram_type in [DiagramType.AI_ARCHITECTURE, DiagramType.SOFTWARE_ARCHITECTURE]:
+            try:
+                # Find JSON content if present in the response
+                json_match = re.search(r'```(?:json)?\s*\n(.*?)\n```', content, re.DOTALL)
+                if json_match:
+                    json_content = json_match.group(1)
+                else:
+                    # Try to find JSON directly
+                    json_content = re.search(r'(\{.*\})', content, re.DOTALL)
+                    if json_content:
+                        json_content = json_content.group(1)
+                    else:
+                        json_content = content
+                
+                # Parse JSON structure, repairing truncated or sloppy JSON locally before any fallback
+                diagram_data, json_repaired = parse_json(json_content)
+                if json_repaired:
+                    logger.info("Repaired architecture JSON locally")
+                
+                # Convert to Mermaid syntax
+                syntax = self._convert_ai_architecture_to_diagram(diagram_data)
+                description = diagram_data.get("description") if isinstance(diagram_data.get("description"), str) else None
+                
+                # Store raw data in metadata
+                metadata = {
+                    "raw_data": diagram_data,
+                    "options": options or {},
+                    "model": model,
+                    "tokens": tokens
+                }
+                if json_repaired:
+                    metadata["json_repaired"] = True
+            except Exception as e:
+                logger.error(f"Error processing architecture JSON: {str(e)}")
+                logger.error(traceback.format_exc())
+                
+                # Fallback to flowchart
+                logger.info("Falling back to flowchart generation")
+                fallback_messages = [
+                    {"role": "system", "content": self._system_prompt(DiagramType.FLOWCHART)},
+                    {"role": "user", "content": message}
+                ]
+                
+                fallback_completion = await self.groq_client.chat.completions.create(
+                    model="mixtral-8x7b-v0.1",  # Update here as well
+                    messages=fallback_messages,
+                    temperature=0.7
+                )
+                
+                syntax, description = self._split_description(
+                    fallback_completion.choices[0].message.content.strip()
+                )
+                diagram_type = DiagramType.FLOWCHART
+                
+                metadata = {
+                    "error": f"Failed to parse architecture JSON: {str(e)}",
+                    "raw_content": content[:500],  # Include part of the raw content for debugging
+                    "options": options or {},
+                    "model": model,
+                    "fallback": "flowchart",
+                    "tokens": tokens
+                }
+        else:
+            syntax, description = self._split_description(content) if self.inline_description else (content, None)
+            metadata = {
+                "options": options or {},
+                "model": model,
+                "tokens": tokens
+            }
+        
+        if "raw_data" not in metadata:
+            syntax = self._repair_syntax(syntax, metadata)
+        
+        # Without an inline description, serve the diagram now and describe it in the background
+        if not description:
+            description = DEFAULT_DESCRIPTION
+            metadata["description_pending"] = True
+        
+        # Create the response object
+        return DiagramResponse(
+            diagram_type=diagram_type.value,
+            syntax=syntax,
+            description=description,
+            metadata=metadata
+        )
+
     def _convert_ai_architecture_to_diagram(self, diagram_data: Dict[str, Any]) -> str:
         """
         Converts the structured architecture JSON to a visual diagram format.
@@ -338,139 +592,7 @@ class DiagramChatbot:
         try:
             if diagram_data.get("type") in ["ai_architecture", "software_architecture"]:
                 try:
-                    # Start with a flowchart
-                    mermaid = "flowchart TD\n"
-                    
-                    # Add diagram title
-                    mermaid += f"    title[\"{diagram_data.get('title', 'Architecture Diagram')}\"]\n"
-                    
-                    # Process clusters/subgraphs - by layer or domain
-                    for cluster in diagram_data.get("clusters", []):
-                        cluster_id = cluster.get("id", "").replace("-", "_")
-                        cluster_label = cluster.get("label", "")
-                        # Proper Mermaid subgraph syntax with quoted label
-                        mermaid += f"    subgraph {cluster_id}[\"{cluster_label}\"]\n"
-                        for node_id in cluster.get("nodes", []):
-                            node_id = node_id.replace("-", "_")
-                            mermaid += f"        {node_id}\n"
-                        mermaid += "    end\n"
-                    
-                    # Process nodes with appropriate shapes based on their type
-                    for node in diagram_data.get("nodes", []):
-                        node_id = node.get("id", "").replace("-", "_")
-                        label = node.get("label", "")
-                        node_type = node.get("type", "").lower()
-                        technology = node.get("technology", "")
-                        
-                        # If technology is specified, add it to the label
-                        if technology and not label.endswith(f"({technology})"):
-                            label = f"{label} ({technology})"
-                        
-                        # Apply styling based on node type for both AI and software architecture
-                        # Using standard Mermaid shapes for compatibility
-                        if node_type in ["ui", "user_interface", "frontend", "client", "web", "mobile"]:
-                            # Standard rectangular shape for UI components
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                        elif node_type in ["database", "db", "data_store", "storage", "persistence"]:
-                            # Database cylinder shape 
-                            mermaid += f"    {node_id}[(\"{label}\")]\n"
-                        elif node_type in ["vector_db", "vector_database", "document_store"]:
-                            # Database cylinder shape
-                            mermaid += f"    {node_id}[(\"{label}\")]\n"
-                        elif node_type in ["api", "service", "microservice", "endpoint", "gateway"]:
-                            # Standard rectangular shape for services
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                        elif node_type in ["llm", "model", "ml_model", "ai_component"]:
-                            # Standard rectangular shape for ML models
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                        elif node_type in ["agent", "worker", "processor", "consumer", "daemon"]:
-                            # Hexagon shape for agent/worker components
-                            mermaid += f"    {node_id}{{\"{label}\"}}\n"
-                        elif node_type in ["processing", "function", "compute", "lambda", "serverless"]:
-                            # Subroutine shape for processing components
-                            mermaid += f"    {node_id}[[\"{label}\"]]\n"
-                        elif node_type in ["queue", "message_broker", "event_bus", "kafka", "rabbitmq"]:
-                            # Standard rectangular shape for queues
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                        elif node_type in ["cache", "redis", "memcached"]:
-                            # Standard rectangular shape for caches
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                        elif node_type in ["load_balancer", "proxy", "routing"]:
-                            # Standard rectangular shape for load balancers
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                        elif node_type in ["external", "third_party", "external_service"]:
-                            # Standard rectangular shape for external services
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                        elif node_type in ["auth", "authentication", "security", "identity"]:
-                            # Standard rectangular shape for auth services
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                        else:
-                            # Default to rectangle for unknown types
-                            mermaid += f"    {node_id}[\"{label}\"]\n"
-                    
-                    # Process connections with appropriate styling
-                    for connection in diagram_data.get("connections", []):
-                        from_id = connection.get("from", "").replace("-", "_")
-                        to_id = connection.get("to", "").replace("-", "_")
-                        label = connection.get("label", "")
-                        conn_type = connection.get("type", "").lower()
-                        protocol = connection.get("protocol", "")
-                        
-                        # Add protocol to label if specified
-                        if protocol and not label.endswith(f"({protocol})"):
-                            if label:
-                                label = f"{label} ({protocol})"
-                            else:
-                                label = protocol
-                        
-                        # Create the simplest connection with no label - guaranteed to work
-                        if conn_type in ["response", "return", "callback", "data_flow", "etl", "stream", "batch"]:
-                            # Dotted arrow
-                            mermaid += f"    {from_id} -.-> {to_id}\n"
-                        else:
-                            # Standard arrow for all other connection types
-                            mermaid += f"    {from_id} --> {to_id}\n"
-                    
-                    # Process styles
-                    if "styles" in diagram_data:
-                        for node_id, style in diagram_data.get("styles", {}).items():
-                            node_id = node_id.replace("-", "_")
-                            color = style.get("color", "#FFFFFF")
-                            border = style.get("border", "#000000")
-                            mermaid += f"    style {node_id} fill:{color},stroke:{border}\n"
-                    
-                    # Apply standard styling to certain node types for consistency
-                    # Loop through all nodes again to apply default styling by type
-                    for node in diagram_data.get("nodes", []):
-                        node_id = node.get("id", "").replace("-", "_")
-                        node_type = node.get("type", "").lower()
-                        
-                        # Only apply default styling if not already styled
-                        if "styles" not in diagram_data or node_id not in diagram_data.get("styles", {}):
-                            # Apply standard styling based on component type
-                            if node_type in ["ui", "frontend", "client", "web", "mobile"]:
-                                mermaid += f"    style {node_id} fill:#D4F1F9,stroke:#1E90FF\n"
-                            elif node_type in ["database", "db", "data_store", "persistence"]:
-                                mermaid += f"    style {node_id} fill:#E1D5E7,stroke:#9673A6\n"
-                            elif node_type in ["vector_db", "vector_database"]:
-                                mermaid += f"    style {node_id} fill:#DAE8FC,stroke:#6C8EBF\n"
-                            elif node_type in ["api", "service", "microservice"]:
-                                mermaid += f"    style {node_id} fill:#F5F5F5,stroke:#666666\n"
-                            elif node_type in ["llm", "model", "ml_model"]:
-                                mermaid += f"    style {node_id} fill:#FFE6CC,stroke:#D79B00\n"
-                            elif node_type in ["queue", "message_broker", "event_bus"]:
-                                mermaid += f"    style {node_id} fill:#FFF2CC,stroke:#D6B656\n"
-                            elif node_type in ["auth", "security"]:
-                                mermaid += f"    style {node_id} fill:#F8CECC,stroke:#B85450\n"
-                            elif node_type in ["cache"]:
-                                mermaid += f"    style {node_id} fill:#D5E8D4,stroke:#82B366\n"
-                            elif node_type in ["external", "third_party"]:
-                                mermaid += f"    style {node_id} fill:#F5F5F5,stroke:#666666\n"
-                    
-                    # Style the title node
-                    mermaid += f"    style title fill:#FFFFFF,stroke:#FFFFFF,color:#000000,font-size:16px\n"
-                    
-                    return mermaid
+                    return render_mermaid(ArchitectureGraph.from_dict(diagram_data))
                 except Exception as e:
                     logger.error(f"Error converting architecture to Mermaid: {str(e)}")
                     logger.error(traceback.format_exc())
@@ -501,7 +623,17 @@ class DiagramChatbot:
             return completion.choices[0].message.content.strip()
         except Exception as e:
             logger.error(f"Error generating description: {str(e)}")
-            return "A diagram showing the requested architecture components and their relationships."
+            return DEFAULT_DESCRIPTION
+
+    async def _summarize_history(self, previous_summary: str, messages: List[Dict[str, str]]) -> str:
+        """Fold older chat turns into the rolling conversation summary"""
+        completion = await self.groq_client.chat.completions.create(
+            model="mixtral-8x7b-v0.1",
+            messages=build_summary_prompt(previous_summary, messages),
+            temperature=0.2,
+            max_tokens=400
+        )
+        return completion.choices[0].message.content.strip()
 
     async def process_message(
         self,
@@ -523,9 +655,10 @@ class DiagramChatbot:
         session.messages.append(user_message)
         
         try:
+            history = [{"role": m.role, "content": m.content} for m in session.messages]
             completion = await self.groq_client.chat.completions.create(
                 model="mixtral-8x7b-v0.1",  # Update here as well
-                messages=[{"role": m.role, "content": m.content} for m in session.messages],
+                messages=self.history.build(str(session.id), history),
                 temperature=0.7
             )
             
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.models.model import ResearchResult
+from app.utils.cache import BaseCache
+from app.utils.singleflight import make_key
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[str], Awaitable[List[float]]]
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivially different queries match"""
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+class ResearchCache:
+    """
+    Cache of research results with a freshness policy.
+
+    Entries younger than ``fresh_ttl`` are served as-is. Entries older than
+    that but within ``stale_ttl`` more seconds are served immediately while a
+    background refresh replaces them (stale-while-revalidate). When an
+    ``embed_fn`` is given, a query without an exact match can reuse the result
+    of a previous query whose embedding is at least ``similarity_threshold``
+    cosine-similar.
+
+    The near-duplicate index is best-effort: it lives in this process and
+    only covers queries stored here since startup, while the entries
+    themselves may sit in a shared backend. After a restart, or on another
+    worker, a near-duplicate query simply misses until it is stored again;
+    exact matches are unaffected.
+    """
+
+    def __init__(
+        self,
+        cache: BaseCache,
+        fresh_ttl: int,
+        stale_ttl: int,
+        similarity_threshold: float = 0.0,
+        embed_fn: Optional[EmbedFn] = None,
+        max_index_size: int = 2000,
+    ):
+        self.cache = cache
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn if similarity_threshold > 0 else None
+        self.max_index_size = max_index_size
+        # Per-process near-duplicate index: report type -> (cache keys, unit-normalized embeddings)
+        self._index: Dict[str, Tuple[List[str], Optional[np.ndarray]]] = {}
+        self._refreshing: Set[str] = set()
+        # Strong references to running refreshes, so they are not garbage collected mid-run
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    def key(self, query: str, report_type: str) -> str:
+        return make_key(normalize_query(query), report_type)
+
+    async def lookup(self, query: str, report_type: str) -> Optional[Tuple[ResearchResult, bool]]:
+        """
+        Find a cached result for a query.
+
+        Args:
+            query: The research query
+            report_type: GPT-Researcher report type
+
+        Returns:
+            Tuple of the result and whether it is stale, or None on a miss
+        """
+        key = self.key(query, report_type)
+        entry = await self._get_entry(key)
+
+        if entry is None and self.embed_fn is not None:
+            similar_key = await self._find_similar(query, report_type)
+            if similar_key:
+                entry = await self._get_entry(similar_key)
+                if entry is not None:
+                    logger.info(f"Research cache near-duplicate hit for query: '{query}'")
+
+        if entry is None:
+            return None
+
+        age = time.time() - entry["stored_at"]
+        if age > self.fresh_ttl + self.stale_ttl:
+            return None
+        return ResearchResult.model_validate(entry["result"]), age > self.fresh_ttl
+
+    async def store(self, query: str, report_type: str, result: ResearchResult) -> None:
+        """Store a result and index its query for near-duplicate matching"""
+        key = self.key(query, report_type)
+        entry = {"stored_at": time.time(), "query": normalize_query(query), "result": result.model_dump(mode="json")}
+        await self.cache.set(key, json.dumps(entry), ttl=self.fresh_ttl + self.stale_ttl)
+
+        if self.embed_fn is not None:
+            try:
+                await self._index_query(key, query, report_type)
+            except Exception as e:
+                logger.warning(f"Failed to index research query for similarity matching: {str(e)}")
+
+    def revalidate(
+        self,
+        query: str,
+        report_type: str,
+        fetch: Callable[[], Awaitable[ResearchResult]]
+    ) -> None:
+        """
+        Refresh a stale entry in the background, at most once at a time per key.
+
+        Args:
+            query: The research query
+            report_type: GPT-Researcher report type
+            fetch: Runs the research and stores the fresh result
+        """
+        key = self.key(query, report_type)
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def _refresh():
+            try:
+                await fetch()
+                logger.info(f"Revalidated stale research for query: '{query}'")
+            except Exception as e:
+                logger.warning(f"Background research refresh failed for '{query}': {str(e)}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(_refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _get_entry(self, key: str) -> Optional[Dict]:
+        payload = await self.cache.get(key)
+        if payload is None:
+            return None
+        try:
+            return json.loads(payload)
+        except (TypeError, ValueError):
+            return None
+
+    async def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(await self.embed_fn(normalize_query(query)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def _find_similar(self, query: str, report_type: str) -> Optional[str]:
+        keys, matrix = self._index.get(report_type, ([], None))
+        if matrix is None or not keys:
+            return None
+        try:
+            vector = await self._embed(query)
+        except Exception as e:
+            logger.warning(f"Failed to embed research query: {str(e)}")
+            return None
+
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] >= self.similarity_threshold:
+            return keys[best]
+        return None
+
+    async def _index_query(self, key: str, query: str, report_type: str) -> None:
+        vector = await self._embed(query)
+        keys, matrix = self._index.get(report_type, ([], None))
+        if key in keys:
+            position = keys.index(key)
+            matrix[position] = vector
+            return
+
+        keys = keys + [key]
+        matrix = vector[np.newaxis, :] if matrix is None else np.vstack([matrix, vector])
+        if len(keys) > self.max_index_size:
+            keys, matrix = keys[-self.max_index_size:], matrix[-self.max_index_size:]
+        self._index[report_type] = (keys, matrix)
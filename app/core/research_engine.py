@@ -1,8 +1,14 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+import asyncio
 import logging
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from app.config.config import get_settings
 from app.models.model import ResearchResult, ResearchTopic
+from app.utils.singleflight import SingleFlight, make_key
+from app.utils.cache import create_cache
+from app.core.research_cache import ResearchCache
 from gpt_researcher import GPTResearcher
 
 # Configure logging
@@ -15,6 +21,39 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Called with (stage, fraction complete) as research moves through its stages
+ProgressCallback = Callable[[str, float], None]
+
+# Cap on gathered context passed on unsummarized when no report could be written in time
+PARTIAL_REPORT_MAX_CHARS = 2000
+
+DEGRADED_SUMMARY = "Research ran out of time before a report was written; details are unsummarized source excerpts."
+EMPTY_SUMMARY = "Research ran out of time before any sources were gathered."
+
+# Stage budgets by class: "interactive" for a waiting chat request, "background" for research jobs
+RESEARCH_BUDGETS: Dict[str, Dict[str, float]] = {
+    "interactive": {
+        "research_timeout": settings.RESEARCH_STAGE_TIMEOUT,
+        "report_timeout": settings.RESEARCH_REPORT_TIMEOUT,
+        "total_timeout": settings.RESEARCH_TOTAL_TIMEOUT
+    },
+    "background": {
+        "research_timeout": settings.RESEARCH_JOB_STAGE_TIMEOUT,
+        "report_timeout": settings.RESEARCH_JOB_REPORT_TIMEOUT,
+        "total_timeout": settings.RESEARCH_JOB_TOTAL_TIMEOUT
+    }
+}
+
+
+@contextmanager
+def _stage_timer(timings: Dict[str, float], stage: str):
+    """Record how long a research stage took, including when it times out"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - started
+
 class GPTResearchEngine:
     def __init__(self):
         import os
@@ -25,8 +64,158 @@ class GPTResearchEngine:
         
         self.fast_llm = "mixtral-8x7b-32768"
         self.smart_llm = "mixtral-8x7b-32768"
+        
+        # Identical concurrent research requests share a single GPT-Researcher run
+        self._singleflight = SingleFlight(
+            "research",
+            distributed=settings.SINGLEFLIGHT_DISTRIBUTED,
+            lock_ttl=max(settings.SINGLEFLIGHT_LOCK_TTL, 600.0),
+            serializer=lambda result: result.model_dump_json(),
+            deserializer=ResearchResult.model_validate_json
+        )
+        
+        # Repeated research is served from cache, refreshed in the background once stale
+        self._embedding_model = None
+        backend = create_cache(
+            settings.RESEARCH_CACHE_BACKEND,
+            name="research",
+            prefix="research:result",
+            max_entries=1000
+        )
+        self.cache = ResearchCache(
+            backend,
+            fresh_ttl=settings.RESEARCH_CACHE_TTL,
+            stale_ttl=settings.RESEARCH_CACHE_STALE_TTL,
+            similarity_threshold=settings.RESEARCH_CACHE_SIMILARITY,
+            embed_fn=self._embed_query
+        ) if backend is not None else None
+
+    async def research_topic(
+        self,
+        query: str,
+        context: Optional[str] = None,
+        deep_research: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        budget_class: str = "interactive"
+    ) -> ResearchResult:
+        if budget_class not in RESEARCH_BUDGETS:
+            raise ValueError(f"Unknown research budget class: {budget_class}")
+        report_type = "research_report" if deep_research else "quick_report"
+        cache_query = f"{query}\nContext: {context}" if context else query
+        fetch = lambda: self._research_coalesced(
+            query, context, deep_research, cache_query, report_type, progress_callback, budget_class
+        )
+        
+        if self.cache is not None:
+            cached = await self.cache.lookup(cache_query, report_type)
+            if cached:
+                result, stale = cached
+                logger.info(f"Serving {'stale' if stale else 'fresh'} cached research for query: '{query}'")
+                if stale:
+                    self.cache.revalidate(cache_query, report_type, fetch)
+                return result
+        
+        return await fetch()
+
+    async def _research_coalesced(
+        self,
+        query: str,
+        context: Optional[str],
+        deep_research: bool,
+        cache_query: str,
+        report_type: str,
+        progress_callback: Optional[ProgressCallback] = None,
+        budget_class: str = "interactive"
+    ) -> ResearchResult:
+        """Run research and cache it, sharing one run among identical concurrent requests"""
+        async def _run() -> ResearchResult:
+            result = await self._research_topic(
+                query, context, deep_research, progress_callback, **RESEARCH_BUDGETS[budget_class]
+            )
+            # Degraded (partial) results are not cached, so the next request gets a full run
+            if self.cache is not None and not result.metadata.get("degraded"):
+                await self.cache.store(cache_query, report_type, result)
+            return result
+        
+        # Budget classes run separately, so a job never inherits a run cut short for a waiting request
+        key = make_key(" ".join(query.lower().split()), context or "", deep_research, budget_class)
+        result = await self._singleflight.do(key, _run)
+        return result.model_copy(deep=True)
 
-    async def research_topic(self, query: str, context: Optional[str] = None, deep_research: bool = False) -> ResearchResult:
+    async def _embed_query(self, text: str) -> List[float]:
+        """Embed a query for near-duplicate cache matching, loading the model on first use"""
+        def _encode():
+            if self._embedding_model is None:
+                from sentence_transformers import SentenceTransformer
+                self._embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+            return self._embedding_model.encode(text).tolist()
+        return await asyncio.to_thread(_encode)
+
+    @staticmethod
+    def _partial_report(researcher: GPTResearcher) -> str:
+        """Whatever research context was gathered before a stage ran out of time"""
+        context = getattr(researcher, "context", None)
+        if not context:
+            return ""
+        if isinstance(context, (list, tuple)):
+            context = "\n".join(str(item) for item in context)
+        return str(context)[:PARTIAL_REPORT_MAX_CHARS]
+
+    @staticmethod
+    async def _bounded_report(
+        researcher: GPTResearcher,
+        timeout: float,
+        timings: Dict[str, float],
+        stage: str
+    ) -> Optional[Any]:
+        """Write a report from the context gathered so far, or return None if it does not finish in time"""
+        if timeout <= 0:
+            return None
+        try:
+            with _stage_timer(timings, stage):
+                return await asyncio.wait_for(researcher.write_report(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _unsummarized_finding(self, query: str, researcher: GPTResearcher) -> Dict[str, Any]:
+        """Finding for a run that produced no report: an excerpt of gathered context, clearly marked"""
+        excerpt = self._partial_report(researcher)
+        return {
+            "topic": query,
+            "summary": DEGRADED_SUMMARY if excerpt else EMPTY_SUMMARY,
+            "details": [excerpt] if excerpt else [],
+            "source": "gpt-researcher",
+            "relevance": 0.5 if excerpt else 0.0
+        }
+
+    @staticmethod
+    async def _quick_report(researcher: GPTResearcher) -> None:
+        """Run the quick_report path, keeping the report on the researcher so a timeout loses nothing"""
+        researcher.quick_report_text = ""
+        await researcher.conduct_research()
+        researcher.quick_report_text = await researcher.write_report()
+
+    async def _research_topic(
+        self,
+        query: str,
+        context: Optional[str] = None,
+        deep_research: bool = False,
+        progress_callback: Optional[ProgressCallback] = None,
+        research_timeout: Optional[float] = None,
+        report_timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None
+    ) -> ResearchResult:
+        research_timeout = research_timeout or settings.RESEARCH_STAGE_TIMEOUT
+        report_timeout = report_timeout or settings.RESEARCH_REPORT_TIMEOUT
+        total_timeout = total_timeout or settings.RESEARCH_TOTAL_TIMEOUT
+        
+        def report_progress(stage: str, progress: float) -> None:
+            if progress_callback:
+                try:
+                    progress_callback(stage, progress)
+                except Exception as e:
+                    logger.warning(f"Research progress callback failed: {str(e)}")
+        
         try:
             logger.info(f"Starting research for query: '{query}' (deep_research: {deep_research})")
             logger.debug(f"Context length: {len(context) if context else 0} characters")
@@ -40,28 +229,75 @@ class GPTResearchEngine:
             selected_model = self.smart_llm if deep_research else self.fast_llm
             logger.info(f"Using model: {selected_model}")
 
+            report_type = "research_report" if deep_research else "quick_report"
+            timings: Dict[str, float] = {}
+            degraded: Optional[str] = None
+            started = time.perf_counter()
+            
+            def budget(stage_timeout: float) -> float:
+                """A stage's own budget, clipped to what is left of the total"""
+                return max(0.0, min(stage_timeout, started + total_timeout - time.perf_counter()))
+
             # Initialize researcher
             researcher = GPTResearcher(
                 query=research_query,
-                report_type="research_report" if deep_research else "quick_report",
+                report_type=report_type,
                 config_path=None  # Let GPTResearcher use its default config
             )
 
             logger.info("Starting research process...")
-            if not await researcher.conduct_research():
-                raise Exception("Research process failed to complete")
+            report_progress("researching", 0.1)
+            research_report = None
+            try:
+                with _stage_timer(timings, "research"):
+                    research_done = await asyncio.wait_for(
+                        researcher.conduct_research(), timeout=budget(research_timeout)
+                    )
+                if not research_done:
+                    raise Exception("Research process failed to complete")
+            except asyncio.TimeoutError:
+                degraded = "research_timeout"
+                logger.warning(f"Research stage exceeded {research_timeout}s budget for query: '{query}'")
+                report_progress("writing_report", 0.6)
+                if self._partial_report(researcher):
+                    # Summarize what was gathered within the remaining budget
+                    research_report = await self._bounded_report(
+                        researcher, budget(report_timeout), timings, "partial_report"
+                    )
+                elif deep_research:
+                    # Nothing gathered yet: fall back to a quick report within the remaining budget
+                    logger.info("Falling back to quick report...")
+                    report_type = "quick_report"
+                    researcher = GPTResearcher(query=research_query, report_type=report_type, config_path=None)
+                    try:
+                        with _stage_timer(timings, "quick_report"):
+                            await asyncio.wait_for(self._quick_report(researcher), timeout=budget(report_timeout))
+                    except asyncio.TimeoutError:
+                        pass
+                    research_report = getattr(researcher, "quick_report_text", "")
 
-            logger.info("Generating research report...")
-            research_report = await researcher.write_report()
-            if not research_report:
+            if degraded is None:
+                logger.info("Generating research report...")
+                report_progress("writing_report", 0.6)
+                research_report = await self._bounded_report(researcher, budget(report_timeout), timings, "report")
+                if research_report is None:
+                    degraded = "report_timeout"
+                    logger.warning(f"Report stage exceeded {report_timeout}s budget for query: '{query}'")
+
+            if not research_report and degraded is None:
                 raise Exception("Failed to generate research report")
+            timings["total"] = time.perf_counter() - started
             
             logger.debug(f"Research report type: {type(research_report)}")
 
             # Process research results
             logger.info("Processing research results...")
+            report_progress("processing", 0.9)
             findings = []
-            if isinstance(research_report, dict):
+            if not research_report:
+                # Out of time with no report: a structured degraded result rather than an error
+                findings.append(self._unsummarized_finding(query, researcher))
+            elif isinstance(research_report, dict):
                 if not research_report.get("summary") and not research_report.get("key_findings"):
                     raise Exception("Research report is empty")
                 logger.debug("Processing dictionary research report")
@@ -86,17 +322,23 @@ class GPTResearchEngine:
                 topic=query,
                 findings=findings,
                 sources=getattr(researcher, "research_summary", []),
-                confidence_score=1.0,
+                confidence_score=(0.5 if research_report else 0.0) if degraded else 1.0,
                 metadata={
                     "context": context,
                     "research_type": "deep_research" if deep_research else "quick_research",
                     "timestamp": datetime.now().isoformat(),
-                    "report_type": "research_report" if deep_research else "quick_report",
-                    "model": selected_model
+                    "report_type": report_type,
+                    "model": selected_model,
+                    "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()},
+                    "degraded": degraded,
+                    "summarized": bool(research_report)
                 }
             )
 
-            logger.info(f"Research completed successfully for query: '{query}'")
+            logger.info(
+                f"Research completed for query: '{query}' in {timings['total']:.1f}s"
+                + (f" (degraded: {degraded})" if degraded else "")
+            )
             logger.debug(f"Research result contains {len(research_result.findings)} findings")
             return research_result
 
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from uuid import UUID
+
+from app.config.config import get_settings
+from app.models.model import ResearchJob, ResearchResult
+from app.service.research_job_store import ResearchJobStore, create_research_job_store
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+FINISHED_STATUSES = ("completed", "failed")
+
+ResearchRunner = Callable[[Callable[[str, float], None]], Awaitable[ResearchResult]]
+CompletionHandler = Callable[[ResearchJob], Awaitable[Optional[str]]]
+
+
+class ResearchJobManager:
+    """
+    Runs deep research as background jobs.
+
+    Job records and the concurrency cap live in ``store``. With the Redis
+    store every worker can report on every job and at most
+    ``max_concurrent`` jobs run across all workers; the in-memory store
+    covers this worker only. A job runs on the worker that accepted it,
+    waiting for a free slot by polling the store every ``poll_interval``
+    seconds, or sooner when a job on this worker finishes. Progress is
+    saved to the store and pushed to local event subscribers; subscribers
+    on other workers follow the stored record.
+    """
+
+    def __init__(self, max_concurrent: int, store: ResearchJobStore, poll_interval: float = 1.0):
+        self.max_concurrent = max_concurrent
+        self.store = store
+        self.poll_interval = poll_interval
+        # Jobs accepted by this worker that have not finished yet
+        self._jobs: Dict[str, ResearchJob] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._save_locks: Dict[str, asyncio.Lock] = {}
+        self._slot_freed: Optional[asyncio.Event] = None
+
+    async def submit(
+        self,
+        user_id: str,
+        query: str,
+        run: ResearchRunner,
+        on_complete: Optional[CompletionHandler] = None,
+        session_id: Optional[UUID] = None
+    ) -> ResearchJob:
+        """
+        Queue a research job.
+
+        Args:
+            user_id: Owner of the job
+            query: The research query
+            run: Coroutine factory performing the research; receives a progress callback
+            on_complete: Called with the finished job; may return a response to record on it
+            session_id: Chat session the result belongs to
+
+        Returns:
+            The queued job
+        """
+        job = ResearchJob(id=str(uuid.uuid4()), user_id=user_id, session_id=session_id, query=query)
+        # Stored before it starts, so any worker can report on it straight away
+        await self.store.save(job)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.ensure_future(self._run(job, run, on_complete))
+        logger.info(f"Queued research job {job.id} for user {user_id}")
+        return job
+
+    async def get(self, job_id: str) -> Optional[ResearchJob]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        return await self.store.get(job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream progress events for a job until it finishes.
+
+        Yields:
+            {"event": "progress" | "completed" | "failed", "data": job}
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            # Finished, or running on another worker
+            async for event in self._follow(job_id):
+                yield event
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            # Current state first, so late subscribers see where the job is
+            yield self._event(job)
+            while job.status not in FINISHED_STATUSES:
+                job = await queue.get()
+                yield self._event(job)
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    async def _follow(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Poll the stored record of a job, yielding an event whenever it changes"""
+        updated_at = None
+        while True:
+            job = await self.store.get(job_id)
+            if job is None:
+                return
+            if job.updated_at != updated_at:
+                updated_at = job.updated_at
+                yield self._event(job)
+            if job.status in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def _get_slot_freed(self) -> asyncio.Event:
+        """Create the slot event lazily so it binds to the running event loop"""
+        if self._slot_freed is None:
+            self._slot_freed = asyncio.Event()
+        return self._slot_freed
+
+    async def _acquire_slot(self, job: ResearchJob) -> None:
+        slot_freed = self._get_slot_freed()
+        while not await self.store.acquire_slot(job.id, self.max_concurrent):
+            slot_freed.clear()
+            try:
+                await asyncio.wait_for(slot_freed.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _renew_slot(self, job_id: str) -> None:
+        """Keep the slot lease alive while the job runs"""
+        while True:
+            await asyncio.sleep(self.store.lease / 3)
+            try:
+                await self.store.acquire_slot(job_id, self.max_concurrent)
+            except Exception as e:
+                logger.warning(f"Failed to renew slot for research job {job_id}: {str(e)}")
+
+    async def _run(self, job: ResearchJob, run: ResearchRunner, on_complete: Optional[CompletionHandler]) -> None:
+        renewal = None
+        try:
+            await self._acquire_slot(job)
+            renewal = asyncio.ensure_future(self._renew_slot(job.id))
+            await self._update(job, status="running", stage="starting", progress=0.05)
+            result = await run(lambda stage, progress: self._update(job, stage=stage, progress=progress))
+            job.result = result
+            if on_complete:
+                await self._update(job, stage="responding", progress=0.95)
+                job.response = await on_complete(job)
+            await self._update(job, status="completed", stage="done", progress=1.0)
+            logger.info(f"Research job {job.id} completed")
+        except Exception as e:
+            logger.error(f"Research job {job.id} failed: {str(e)}", exc_info=True)
+            job.error = str(e)
+            await self._update(job, status="failed", stage="failed")
+        finally:
+            if renewal is not None:
+                renewal.cancel()
+                try:
+                    await self.store.release_slot(job.id)
+                except Exception as e:
+                    logger.warning(f"Failed to release slot for research job {job.id}: {str(e)}")
+                self._get_slot_freed().set()
+            self._tasks.pop(job.id, None)
+            self._jobs.pop(job.id, None)
+            self._save_locks.pop(job.id, None)
+
+    def _update(self, job: ResearchJob, **changes: Any) -> asyncio.Future:
+        """Apply changes, notify subscribers and save the job; await the result to wait for the save"""
+        for field, value in changes.items():
+            setattr(job, field, value)
+        job.updated_at = datetime.now()
+        subscribers = self._subscribers.get(job.id)
+        if subscribers:
+            # Subscribers get a snapshot so each event reflects this update
+            snapshot = job.model_copy()
+            for queue in subscribers:
+                queue.put_nowait(snapshot)
+        return asyncio.ensure_future(self._save(job))
+
+    async def _save(self, job: ResearchJob) -> None:
+        # Saves of one job go out in order, so the store never ends up with an older state
+        lock = self._save_locks.setdefault(job.id, asyncio.Lock())
+        async with lock:
+            try:
+                await self.store.save(job)
+            except Exception as e:
+                logger.warning(f"Failed to save research job {job.id}: {str(e)}")
+
+    @staticmethod
+    def _event(job: ResearchJob) -> Dict[str, Any]:
+        event = job.status if job.status in FINISHED_STATUSES else "progress"
+        return {"event": event, "data": job.model_dump(mode="json")}
+
+
+# Create singleton instance
+research_jobs = ResearchJobManager(
+    max_concurrent=settings.RESEARCH_MAX_CONCURRENT_JOBS,
+    store=create_research_job_store(settings.RESEARCH_JOB_BACKEND, retention=3600)
+)
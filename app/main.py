@@ -1,12 +1,16 @@
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.route import router as chat_router
 from app.routes.knowledgebase_route.route import router as knowledge_base_router
 from app.routes.audio_route import router as audio_router
+from app.service.text_to_speech import prewarm_tts_cache
 
 from app.config.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title=settings.APP_NAME)
 
@@ -34,6 +38,31 @@ app.include_router(
     tags=["Voice Agent"]
 )
 
+app.state.prewarm_task = None
+
+
+def _log_prewarm_result(task: asyncio.Task):
+    if task.cancelled():
+        return
+    if task.exception() is not None:
+        logger.error(f"TTS cache prewarm failed: {str(task.exception())}")
+    else:
+        logger.info(f"TTS cache prewarm synthesized {task.result()} phrases")
+
+@app.on_event("startup")
+async def prewarm_caches():
+    # In the background so startup never waits on speech synthesis
+    if settings.TTS_CACHE_PREWARM:
+        app.state.prewarm_task = asyncio.ensure_future(prewarm_tts_cache())
+        app.state.prewarm_task.add_done_callback(_log_prewarm_result)
+
+@app.on_event("shutdown")
+async def stop_prewarm():
+    task = app.state.prewarm_task
+    if task is not None and not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Creative AI Chatbot"}
\ No newline at end of file
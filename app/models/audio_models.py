@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 
 class AudioStreamRequest(BaseModel):
@@ -39,3 +39,10 @@ class AIResponse(BaseModel):
     text: str
     audio_url: Optional[str] = None
     session_id: str
+
+
+class TranscriptEvent(BaseModel):
+    """Event from a streaming speech-to-text session."""
+    type: Literal["speech_started", "interim", "final", "endpoint"]
+    text: str = ""
+    confidence: float = 0.0
@@ -1,5 +1,5 @@
 # File: app/models/model.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Union
 from uuid import UUID, uuid4
 from datetime import datetime
@@ -7,24 +7,27 @@ from datetime import datetime
 class Message(BaseModel):
     content: str
     role: str
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = Field(default_factory=datetime.now)
 
 class ChatSession(BaseModel):
-    id: UUID = uuid4()
+    id: UUID = Field(default_factory=uuid4)
     user_id: str
     messages: List[Message] = []
     metadata: Dict[str, Any] = {}
-    created_at: datetime = datetime.now()
-    updated_at: datetime = datetime.now()
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
 
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[UUID] = None
     deep_research: bool = False
+    # Run deep research as a background job and answer immediately
+    async_research: bool = False
 
 class ChatResponse(BaseModel):
     message: str
     session_id: UUID
+    research_job_id: Optional[str] = None
 
 class ResearchResult(BaseModel):
     topic: str
@@ -33,6 +36,21 @@ class ResearchResult(BaseModel):
     confidence_score: float = 0.0  # Add default value
     metadata: Dict[str, Any] = {}  # Add default empty dict
 
+class ResearchJob(BaseModel):
+    """State of a background deep-research job"""
+    id: str
+    user_id: str
+    session_id: Optional[UUID] = None
+    query: str
+    status: str = "pending"  # pending, running, completed, failed
+    stage: str = "queued"
+    progress: float = 0.0
+    result: Optional[ResearchResult] = None
+    response: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+
 class ResearchTopic(BaseModel):
     query: str
     context: Optional[str] = None
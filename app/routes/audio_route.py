@@ -16,9 +16,11 @@ from app.utils.livekit_auth import create_livekit_token
 from app.service.voice_agent_service import (
     initialize_voice_agent,
     terminate_voice_agent,
+    process_utterance,
     active_conversations
 )
-from app.service.livekit_service import get_room_token, create_room
+from app.service.livekit_service import get_room_token, create_room, send_audio_to_room, get_playback_metrics
+from app.service.text_to_speech import tts_cache
 
 logger = logging.getLogger(__name__)
 
@@ -61,9 +63,9 @@ async def initialize_stream(request: AudioStreamRequest):
     try:
         # Define the response callback for handling AI responses
         async def response_callback(text: str, audio_bytes: bytes, session_id: str):
-            # This function will handle sending AI responses back through LiveKit
-            # The implementation depends on how you want to send the audio back to the client
+            # Queue the sentence's PCM for playback through the agent's LiveKit track
             logger.info(f"AI response for session {session_id}: {text[:50]}...")
+            await send_audio_to_room(session_id, audio_bytes)
         
         # Initialize the voice agent
         session_info = await initialize_voice_agent(
@@ -150,9 +152,9 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             
             conversation["transcription_buffer"] = data["text"]
             
-            # Process the utterance
-            from app.service.voice_agent_service import process_utterance
-            await process_utterance(session_id)
+            # Respond through the turn manager, like a spoken utterance, so this reply
+            # preempts any current one and can itself be interrupted
+            conversation["turns"].start(lambda turn: process_utterance(session_id, turn))
         
         # Listen for messages from client
         while True:
@@ -190,3 +192,28 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             await websocket.close()
         except:
             pass
+
+
+@router.get("/cache/stats")
+async def get_tts_cache_stats():
+    """Return hit/miss and size metrics for the synthesized-audio cache."""
+    if tts_cache is None:
+        return {}
+    return {"tts": tts_cache.stats_dict()}
+
+
+@router.get("/sessions/{session_id}/metrics")
+async def get_session_metrics(session_id: str):
+    """Return latency and barge-in metrics of a voice agent session."""
+    if session_id not in active_conversations:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Session {session_id} not found"
+        )
+    
+    conversation = active_conversations[session_id]
+    return {
+        "last_turn": conversation.get("last_turn_metrics"),
+        "barge_in": conversation["turns"].stats.as_dict(),
+        "playback": get_playback_metrics(session_id)
+    }
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Header, Depends
-from app.models.model import ChatRequest, ChatResponse, DiagramRequest, DiagramResponse
+from fastapi.responses import StreamingResponse
+from app.models.model import ChatRequest, ChatResponse, DiagramRequest, DiagramResponse, ResearchJob
 from app.core.chatbot import chatbot
-from app.core.diagram_chat import diagram, DiagramType
+from app.core.diagram_chat import diagram
+from app.core.research_engine import research_engine
+from app.core.research_jobs import research_jobs
 from uuid import UUID
 from typing import List, Dict, Any, Optional
 from app.config.config import get_settings
+from app.utils.sse import sse_stream, SSE_HEADERS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,16 +27,23 @@ async def chat(
     try:
         logger.info(f"Processing chat request for user: {user_id}, deep_research: {request.deep_research}")
         
+        # Background research answers immediately and attaches findings to the session later
+        background_research = request.deep_research and request.async_research
         session = await chatbot.process_message(
             user_id=user_id,
             message=request.message,
             session_id=request.session_id,
-            deep_research=request.deep_research
+            deep_research=request.deep_research and not background_research
         )
         
+        job = None
+        if background_research:
+            job = await chatbot.start_research_job(user_id, session.id, request.message)
+        
         return ChatResponse(
             message=session.messages[-1].content,
-            session_id=session.id
+            session_id=session.id,
+            research_job_id=job.id if job else None
         )
     except Exception as e:
         logger.error(f"Chat error for user {user_id}: {str(e)}", exc_info=True)
@@ -41,6 +52,57 @@ async def chat(
             detail=f"Failed to process chat request: {str(e)}"
         )
 
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    user_id: str = Header(..., description="User ID for authentication and session management")
+):
+    """
+    Process a chat message and stream the response as server-sent events.
+    Emits "session", "research" progress, "token" and a final "message" (or "error") event.
+    """
+    logger.info(f"Streaming chat request for user: {user_id}, deep_research: {request.deep_research}")
+    
+    events = chatbot.stream_message(
+        user_id=user_id,
+        message=request.message,
+        session_id=request.session_id,
+        deep_research=request.deep_research
+    )
+    return StreamingResponse(sse_stream(events), media_type="text/event-stream", headers=SSE_HEADERS)
+
+async def _get_user_job(job_id: str, user_id: str) -> ResearchJob:
+    job = await research_jobs.get(job_id)
+    # Jobs belonging to other users are reported as missing
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Research job not found")
+    return job
+
+@router.get("/research/jobs/{job_id}", response_model=ResearchJob)
+async def get_research_job(
+    job_id: str,
+    user_id: str = Header(..., description="User ID for authentication")
+):
+    """
+    Return the status, progress and (when finished) result of a background research job
+    """
+    return await _get_user_job(job_id, user_id)
+
+@router.get("/research/jobs/{job_id}/events")
+async def research_job_events(
+    job_id: str,
+    user_id: str = Header(..., description="User ID for authentication")
+):
+    """
+    Stream research job progress as server-sent events until the job completes or fails
+    """
+    await _get_user_job(job_id, user_id)
+    return StreamingResponse(
+        sse_stream(research_jobs.events(job_id)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/diagram", response_model=DiagramResponse)
 async def generate_diagram(
     request: DiagramRequest,
@@ -60,32 +122,56 @@ async def generate_diagram(
         )
         
         # For architecture diagrams, extract structured data for frontend rendering
-        if diagram_response.diagram_type in [DiagramType.AI_ARCHITECTURE.value, DiagramType.SOFTWARE_ARCHITECTURE.value]:
-            try:
-                if diagram_response.metadata and "raw_data" in diagram_response.metadata:
-                    raw_data = diagram_response.metadata["raw_data"]
-                    diagram_response.nodes = raw_data.get("nodes", [])
-                    diagram_response.connections = raw_data.get("connections", [])
-                    diagram_response.clusters = raw_data.get("clusters", [])
-                    diagram_response.raw_structure = raw_data
-            except Exception as e:
-                logger.error(f"Error extracting architecture data: {str(e)}", exc_info=True)
+        try:
+            diagram.attach_structure(diagram_response)
+        except Exception as e:
+            logger.error(f"Error extracting architecture data: {str(e)}", exc_info=True)
         
         return diagram_response
     except Exception as e:
         logger.error(f"Diagram generation error for user {user_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/diagram/stream")
+async def generate_diagram_stream(
+    request: DiagramRequest,
+    user_id: str = Header(..., description="User ID for the diagram generation")
+):
+    """
+    Generate a diagram as a server-sent event stream.
+    Text diagrams stream their syntax as it is generated; architecture diagrams
+    stream nodes, connections and clusters as they are parsed. The final
+    "diagram" event carries the same payload as POST /diagram.
+    """
+    logger.info(f"Streaming diagram for user: {user_id}, message: {request.message[:50]}...")
+    return StreamingResponse(
+        sse_stream(diagram.stream_diagram(request.message, request.options)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.get("/history/{session_id}", response_model=List[dict])
 async def get_chat_history(
     session_id: UUID,
     user_id: str = Header(..., description="User ID for authentication")
 ):
-    if session_id not in chatbot.sessions:
+    # Sessions are stored per user, so another user's session is simply not found
+    session = await chatbot.get_session(user_id, session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = chatbot.sessions[session_id]
-    if session.user_id != user_id:
-        raise HTTPException(status_code=403, detail="Unauthorized")
         
     return session.messages
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Return hit/miss metrics for the response caches
+    """
+    stats = {}
+    if chatbot.response_cache is not None:
+        stats["llm_response"] = chatbot.response_cache.stats_dict()
+    if research_engine.cache is not None:
+        stats["research"] = research_engine.cache.cache.stats_dict()
+    if diagram.cache is not None:
+        stats["diagram"] = diagram.cache.stats_dict()
+    return stats
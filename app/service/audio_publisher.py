@@ -0,0 +1,249 @@
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils.audio_dsp import resample
+from app.utils.audio_format import PCMData
+from app.utils.ring_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Delivers one frame of 16-bit mono samples for playback; the view must be copied before returning
+FrameSink = Callable[[np.ndarray], Awaitable[None]]
+
+
+class PlaybackMetrics:
+    """
+    Outbound audio counters for one session.
+
+    Latency is measured from when synthesized audio was queued to
+    when its first frame was handed to LiveKit, plus one frame of capture
+    time. Network transport and the listener's jitter buffer come on top.
+    """
+
+    def __init__(self):
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.bytes_flushed = 0
+        self.last_latency_ms: Optional[float] = None
+        self.max_latency_ms = 0.0
+        self._latency_total_ms = 0.0
+        self._latency_count = 0
+
+    def record_latency(self, latency_ms: float) -> None:
+        self.last_latency_ms = latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+        self._latency_total_ms += latency_ms
+        self._latency_count += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "frames_sent": self.frames_sent,
+            "bytes_sent": self.bytes_sent,
+            "bytes_flushed": self.bytes_flushed,
+            "last_latency_ms": self.last_latency_ms,
+            "avg_latency_ms": self._latency_total_ms / self._latency_count if self._latency_count else None,
+            "max_latency_ms": self.max_latency_ms
+        }
+
+
+class AudioPublisher:
+    """
+    Plays synthesized PCM into a room at real-time pace.
+
+    Queued audio is resampled to the room rate and cut into fixed frames
+    of ``frame_ms``. A pacing task hands frames to ``sink`` against a
+    monotonic clock, staying ``lead_ms`` ahead so the track never starves
+    on scheduling jitter. When playback starts from silence, it waits up
+    to ``prebuffer_ms`` for audio to build up, so short gaps between TTS
+    chunks do not turn into audible gaps. ``flush`` drops everything
+    queued, e.g. on barge-in.
+    """
+
+    def __init__(
+        self,
+        sink: FrameSink,
+        sample_rate: int = 48000,
+        frame_ms: int = 20,
+        lead_ms: int = 60,
+        prebuffer_ms: int = 40,
+        max_queue_ms: int = 30000
+    ):
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.lead_ms = lead_ms
+        self.prebuffer_ms = prebuffer_ms
+        self.metrics = PlaybackMetrics()
+        self._queue = AudioRingBuffer(max(sample_rate * max_queue_ms // 1000, self.frame_samples))
+        # (sample position, time queued) of audio whose first frame has not been played yet
+        self._pending_latency: Deque[Tuple[int, float]] = deque()
+        self._queued_total = 0
+        self._played_total = 0
+        self._generation = 0
+        self._data_ready: Optional[asyncio.Event] = None
+        self._space_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def queued_ms(self) -> float:
+        return len(self._queue) * 1000 / self.sample_rate
+
+    def start(self) -> None:
+        """Start the pacing task if it is not running; must be called from a running event loop"""
+        if self._task is None:
+            self._data_ready = asyncio.Event()
+            self._space_ready = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def enqueue(self, pcm: PCMData, sample_rate: int) -> None:
+        """
+        Queue 16-bit mono PCM for playback.
+
+        The audio is padded to a whole number of frames. Waits while the
+        queue is full, so synthesis cannot run arbitrarily far ahead.
+
+        Args:
+            pcm: Audio to play
+            sample_rate: Sample rate of ``pcm``
+        """
+        self.start()
+        samples = np.frombuffer(pcm, dtype=np.int16) if not isinstance(pcm, np.ndarray) else pcm
+        samples = resample(samples, sample_rate, self.sample_rate)
+        if not len(samples):
+            return
+        padding = -len(samples) % self.frame_samples
+        if padding:
+            samples = np.concatenate([samples, np.zeros(padding, dtype=np.int16)])
+
+        self._pending_latency.append((self._queued_total, time.perf_counter()))
+        generation = self._generation
+        offset = 0
+        while offset < len(samples):
+            if generation != self._generation:
+                # Flushed while waiting for room: the rest of this audio is dropped too
+                return
+            if not self._queue.free:
+                self._space_ready.clear()
+                await self._space_ready.wait()
+                continue
+            count = min(self._queue.free, len(samples) - offset)
+            self._queue.write(samples[offset:offset + count])
+            self._queued_total += count
+            offset += count
+            self._data_ready.set()
+
+    async def flush(self) -> int:
+        """
+        Drop all queued audio.
+
+        Returns:
+            Number of audio bytes dropped
+        """
+        dropped = self._queue.clear() * 2
+        self._generation += 1
+        self._played_total = self._queued_total
+        self._pending_latency.clear()
+        self.metrics.bytes_flushed += dropped
+        if self._space_ready is not None:
+            self._space_ready.set()
+        return dropped
+
+    async def close(self) -> None:
+        """Stop playback, dropping anything still queued"""
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.wait([self._task])
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        frame_s = self.frame_ms / 1000
+        clock: Optional[float] = None
+        frames = 0
+        while True:
+            if len(self._queue) < self.frame_samples:
+                clock = None
+                self._data_ready.clear()
+                await self._data_ready.wait()
+                # Jitter buffer: let a little audio build up before starting to play
+                deadline = loop.time() + self.prebuffer_ms / 1000
+                while self.queued_ms < self.prebuffer_ms and loop.time() < deadline:
+                    self._data_ready.clear()
+                    try:
+                        await asyncio.wait_for(self._data_ready.wait(), deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+                continue
+
+            if clock is None:
+                clock = loop.time()
+                frames = 0
+
+            generation = self._generation
+            try:
+                await self.sink(self._queue.peek(self.frame_samples))
+            except Exception as e:
+                logger.error(f"Error publishing audio frame: {str(e)}")
+            if generation != self._generation:
+                # Flushed while the frame was being sent
+                continue
+            self._queue.discard(self.frame_samples)
+            self._space_ready.set()
+            self._record_played(self.frame_samples)
+
+            frames += 1
+            delay = clock + frames * frame_s - self.lead_ms / 1000 - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def _record_played(self, samples: int) -> None:
+        self._played_total += samples
+        self.metrics.frames_sent += 1
+        self.metrics.bytes_sent += samples * 2
+        now = time.perf_counter()
+        while self._pending_latency and self._pending_latency[0][0] < self._played_total:
+            _, queued_at = self._pending_latency.popleft()
+            self.metrics.record_latency((now - queued_at) * 1000 + self.frame_ms)
+
+
+async def publish_to_room(room, sample_rate: int = 48000, frame_ms: int = 20, **kwargs) -> AudioPublisher:
+    """
+    Publish an audio track in a LiveKit room and return a publisher feeding it.
+
+    Args:
+        room: Connected ``livekit.rtc.Room``
+        sample_rate: Sample rate of the published track
+        frame_ms: Duration of each frame handed to LiveKit
+        **kwargs: Further AudioPublisher options
+
+    Returns:
+        The started publisher
+    """
+    from livekit import rtc
+
+    source = rtc.AudioSource(sample_rate, 1)
+    track = rtc.LocalAudioTrack.create_audio_track("ai-voice", source)
+    options = rtc.TrackPublishOptions()
+    options.source = rtc.TrackSource.SOURCE_MICROPHONE
+    await room.local_participant.publish_track(track, options)
+
+    async def sink(samples: np.ndarray) -> None:
+        frame = rtc.AudioFrame.create(sample_rate, 1, len(samples))
+        np.copyto(np.frombuffer(frame.data, dtype=np.int16), samples)
+        # capture_frame is a coroutine in newer SDKs
+        result = source.capture_frame(frame)
+        if inspect.isawaitable(result):
+            await result
+
+    publisher = AudioPublisher(sink, sample_rate=sample_rate, frame_ms=frame_ms, **kwargs)
+    publisher.start()
+    logger.info(f"Publishing agent audio at {sample_rate} Hz in {frame_ms} ms frames")
+    return publisher
@@ -2,10 +2,15 @@ import asyncio
 import logging
 import uuid
 from typing import Dict, Any, Optional, List
+import numpy as np
 from livekit import rtc
 from livekit.rtc import Room
 from app.config.config import get_settings
+from app.service.audio_publisher import AudioPublisher, publish_to_room
+from app.utils.audio_dsp import StreamResampler, to_mono
 from app.utils.livekit_auth import create_livekit_token
+from app.utils.ring_buffer import AudioRingBuffer
+from app.utils.vad import VADSegmenter, create_speech_detector
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -19,29 +24,60 @@ class AudioProcessor:
     Helper class for processing audio in LiveKit sessions.
     """
     
-    def __init__(self, session_id: str, transcription_callback, response_callback):
+    def __init__(self, session_id: str, transcription_callback, response_callback, end_of_utterance_callback=None):
         self.session_id = session_id
         self.transcription_callback = transcription_callback
         self.response_callback = response_callback
-        self.audio_buffer = bytearray()
-        self.chunk_size = settings.AUDIO_CHUNK_SIZE
+        self.end_of_utterance_callback = end_of_utterance_callback
+        self.sample_rate = settings.AUDIO_SAMPLE_RATE
+        # AUDIO_CHUNK_SIZE is in bytes of 16-bit audio
+        self.chunk_samples = settings.AUDIO_CHUNK_SIZE // 2
+        # Incoming audio waits here until VAD has classified it; speech is copied out once per chunk
+        self.ring = AudioRingBuffer(
+            max(self.sample_rate * settings.AUDIO_RING_BUFFER_MS // 1000, self.chunk_samples * 2)
+        )
+        # Only speech (plus a little padding) is forwarded to STT
+        self.segmenter = VADSegmenter(
+            sample_rate=settings.AUDIO_SAMPLE_RATE,
+            silence_ms=settings.VAD_SILENCE_MS,
+            detector=create_speech_detector(
+                settings.VAD_MODE, settings.AUDIO_SAMPLE_RATE, settings.VAD_ENERGY_THRESHOLD
+            ),
+            frame_ms=settings.VAD_FRAME_MS
+        )
+        # Callbacks run one after another so audio always reaches STT before its end-of-utterance
+        self._callback_chain: Optional[asyncio.Future] = None
         self.room = None
-        self.task = None
+        # Plays the agent's speech into the room
+        self.publisher: Optional[AudioPublisher] = None
+        # Reads the user's microphone track; only one input is segmented at a time
+        self.input_track_sid: Optional[str] = None
+        self.input_task: Optional[asyncio.Task] = None
+        # Converts the track's rate to sample_rate, keeping filter state across frames
+        self._input_resampler: Optional[StreamResampler] = None
     
     async def start(self, room_name: str, token: str):
         """Start processing audio in a LiveKit room."""
         try:
-            # Connect to the room
             self.room = Room()
-            await self.room.connect(settings.LIVEKIT_WS_URL, token)
-            logger.info(f"Connected to room {room_name} as {self.room.local_participant.identity}")
             
-            # Set up listeners for participants
+            # Set up listeners before connecting, so tracks of participants
+            # already in the room are picked up when they are auto-subscribed
             self.room.on(rtc.RoomEvent.ParticipantConnected, self._on_participant_connected)
             self.room.on(rtc.RoomEvent.ParticipantDisconnected, self._on_participant_disconnected)
+            self.room.on(rtc.RoomEvent.TrackSubscribed, self._on_track_subscribed)
+            self.room.on(rtc.RoomEvent.TrackUnsubscribed, self._on_track_unsubscribed)
             
-            # With newer LiveKit SDK, we don't need to manually register existing participants
-            # The participant_connected event will be fired for each participant
+            # Connect to the room
+            await self.room.connect(settings.LIVEKIT_WS_URL, token)
+            logger.info(f"Connected to room {room_name} as {self.room.local_participant.identity}")
+            
+            self.publisher = await publish_to_room(
+                self.room,
+                sample_rate=settings.AUDIO_OUTPUT_SAMPLE_RATE,
+                frame_ms=settings.AUDIO_OUTPUT_FRAME_MS,
+                prebuffer_ms=settings.AUDIO_OUTPUT_PREBUFFER_MS
+            )
             
             return True
         except Exception as e:
@@ -51,12 +87,24 @@ class AudioProcessor:
     async def stop(self):
         """Stop the audio processor."""
         try:
-            if self.task:
-                self.task.cancel()
+            if self.input_task:
+                self.input_task.cancel()
+            
+            if self.publisher:
+                await self.publisher.close()
+                logger.info(f"Playback metrics for session {self.session_id}: {self.publisher.metrics.as_dict()}")
                 
             if self.room:
                 await self.room.disconnect()
-                
+            
+            if self.ring.overruns:
+                logger.warning(
+                    f"Dropped {self.ring.overruns / self.sample_rate:.1f}s of incoming audio "
+                    f"in session {self.session_id} because processing fell behind"
+                )
+            logger.info(
+                f"VAD skipped {self.segmenter.dropped_ms / 1000:.1f}s of silence before STT in session {self.session_id}"
+            )
             return True
         except Exception as e:
             logger.error(f"Error stopping audio processor: {str(e)}")
@@ -71,82 +119,118 @@ class AudioProcessor:
         logger.info(f"Participant {participant.identity} disconnected")
     
     async def _setup_participant(self, participant):
-        """Set up listeners for participant's audio tracks."""
+        """Start reading audio tracks the participant already has subscribed."""
         logger.info(f"Setting up participant {participant.identity}")
         
-        # Instead of using participant.on(), directly process available tracks
-        # and set up room event handlers to catch future track subscriptions
-        
-        # Process any existing tracks
-        for publication in participant.tracks.values():
+        # Renamed from `tracks` in newer LiveKit SDKs
+        publications = getattr(participant, "track_publications", None) or getattr(participant, "tracks", {})
+        for publication in publications.values():
             if publication.subscribed and publication.track:
                 await self._process_track(publication.track, publication, participant)
-        
-        # Make sure room has event handlers for future track subscriptions
-        if not hasattr(self, '_track_subscription_handler_set'):
-            self.room.on(rtc.RoomEvent.TrackSubscribed, self._on_track_subscribed)
-            self._track_subscription_handler_set = True
     
     def _on_track_subscribed(self, track, publication, participant):
         """Handle new track subscription."""
         asyncio.create_task(self._process_track(track, publication, participant))
     
+    def _on_track_unsubscribed(self, track, publication, participant):
+        """Stop reading a track that went away."""
+        if track.sid == self.input_track_sid and self.input_task:
+            self.input_task.cancel()
+            self.input_track_sid = None
+    
     async def _process_track(self, track, publication, participant):
         """Process a track after subscription."""
-        if track.kind == rtc.TrackKind.AUDIO:
-            logger.info(f"Processing audio track from {participant.identity}")
-            # Set up data handler for audio track
-            # Note: The Python SDK may have a different way to handle audio data
-            # Instead of track.on("data"), we need to use the appropriate SDK method
-            # This depends on the specific version of the LiveKit Python SDK
-            try:
-                track.add_data_listener(self._process_audio_data)
-                logger.info(f"Added data listener for track from {participant.identity}")
-            except AttributeError as e:
-                logger.error(f"Error adding data listener: {str(e)}. The SDK may not support this method.")
-                # Alternative approach - check SDK documentation for the correct method
+        if track.kind != rtc.TrackKind.KIND_AUDIO or track.sid == self.input_track_sid:
+            return
+        
+        logger.info(f"Processing audio track from {participant.identity}")
+        # The newest microphone track replaces the previous one
+        if self.input_task:
+            self.input_task.cancel()
+        self.input_track_sid = track.sid
+        self._input_resampler = None
+        self.input_task = asyncio.create_task(self._read_track(track))
     
-    def _process_audio_data(self, data):
-        """Process incoming audio data."""
-        self.audio_buffer.extend(data)
+    async def _read_track(self, track):
+        """Feed every frame of an audio track through VAD to the transcription callback."""
+        stream = rtc.AudioStream(track)
+        try:
+            async for event in stream:
+                self._process_audio_frame(event.frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading audio track: {str(e)}")
+        finally:
+            await stream.aclose()
+    
+    def _process_audio_frame(self, frame):
+        """Buffer one incoming audio frame and act on the speech segments it completes."""
+        self.ring.write(self._frame_samples(frame))
+        for event in self.segmenter.consume(self.ring, self.chunk_samples):
+            if event.type == "audio":
+                self._dispatch(self.transcription_callback, event.audio, self.session_id)
+            elif event.type == "speech_end" and self.end_of_utterance_callback:
+                self._dispatch(self.end_of_utterance_callback, self.session_id)
+    
+    def _frame_samples(self, frame) -> np.ndarray:
+        """
+        View a LiveKit audio frame as 16-bit mono samples at the processing rate.
         
-        # Process when we have enough data
-        if len(self.audio_buffer) >= self.chunk_size:
-            # Pass to transcription callback - handle as async
-            buffer_copy = bytes(self.audio_buffer)
-            self.audio_buffer.clear()
-            
-            # Call the transcription callback in an async-safe way
-            asyncio.create_task(self._safe_transcription_callback(buffer_copy))
+        Frames already in that format are returned as a view of the SDK's buffer;
+        only other channel counts or rates allocate a converted copy.
+        """
+        samples = to_mono(np.frombuffer(frame.data, dtype=np.int16), frame.num_channels)
+        if frame.sample_rate == self.sample_rate:
+            return samples
+        if self._input_resampler is None or self._input_resampler.from_rate != frame.sample_rate:
+            self._input_resampler = StreamResampler(frame.sample_rate, self.sample_rate)
+        return self._input_resampler.process(samples)
     
-    async def _safe_transcription_callback(self, audio_data):
-        """Safely call the transcription callback."""
+    def _dispatch(self, callback, *args):
+        """Run a callback after any previously dispatched ones, without blocking the caller."""
+        self._callback_chain = asyncio.ensure_future(self._safe_callback(self._callback_chain, callback, *args))
+    
+    async def _safe_callback(self, previous, callback, *args):
+        """Safely call a callback once the previous one has finished."""
+        if previous is not None:
+            await asyncio.wait([previous])
         try:
-            if asyncio.iscoroutinefunction(self.transcription_callback):
-                await self.transcription_callback(audio_data, self.session_id)
+            if asyncio.iscoroutinefunction(callback):
+                await callback(*args)
             else:
-                self.transcription_callback(audio_data, self.session_id)
+                callback(*args)
         except Exception as e:
-            logger.error(f"Error in transcription callback: {str(e)}")
+            logger.error(f"Error in audio callback: {str(e)}")
+    
+    async def flush_audio(self) -> int:
+        """
+        Drop audio queued for playback, e.g. when the user barges in.
+        
+        Returns:
+            Number of audio bytes dropped
+        """
+        if not self.publisher:
+            return 0
+        return await self.publisher.flush()
     
-    async def send_audio(self, audio_data: bytes):
-        """Send audio data to the room."""
-        if not self.room or not self.room.local_participant:
+    async def send_audio(self, audio_data: bytes, sample_rate: int) -> bool:
+        """
+        Queue 16-bit mono PCM for playback in the room.
+        
+        Args:
+            audio_data: Raw PCM samples
+            sample_rate: Sample rate of the samples; resampled to the track rate
+            
+        Returns:
+            True if the audio was queued, False otherwise
+        """
+        if not self.publisher:
             logger.error("Cannot send audio - no active room connection")
             return False
         
         try:
-            # Create a local audio track if needed
-            if not hasattr(self, 'audio_track'):
-                # Get the local participant
-                local_participant = self.room.local_participant
-                
-                # Create an audio track
-                track_options = rtc.LocalTrackOptions(name="ai-voice")
-                self.audio_track = await local_participant.create_audio_track(track_options)
-            
-            # Send the audio data
-            await self.audio_track.write_data(audio_data)
+            await self.publisher.enqueue(audio_data, sample_rate)
             return True
         except Exception as e:
             logger.error(f"Error sending audio: {str(e)}")
@@ -213,7 +297,8 @@ async def setup_audio_processor(
     session_id: str,
     room_name: str,
     transcription_callback,
-    response_callback
+    response_callback,
+    end_of_utterance_callback=None
 ) -> bool:
     """
     Set up an audio processor in a LiveKit room.
@@ -223,6 +308,7 @@ async def setup_audio_processor(
         room_name: Name of the LiveKit room
         transcription_callback: Callback function for transcription
         response_callback: Callback function for AI responses
+        end_of_utterance_callback: Callback when VAD detects the speaker has stopped
         
     Returns:
         True if successful, False otherwise
@@ -240,7 +326,8 @@ async def setup_audio_processor(
         processor = AudioProcessor(
             session_id=session_id,
             transcription_callback=transcription_callback,
-            response_callback=response_callback
+            response_callback=response_callback,
+            end_of_utterance_callback=end_of_utterance_callback
         )
         
         # Start the processor
@@ -294,13 +381,14 @@ async def close_session(session_id: str) -> bool:
     return False
 
 
-async def send_audio_to_room(session_id: str, audio_data: bytes) -> bool:
+async def send_audio_to_room(session_id: str, audio_data: bytes, sample_rate: Optional[int] = None) -> bool:
     """
     Send audio data to a LiveKit room.
     
     Args:
         session_id: Unique identifier for the session
-        audio_data: Audio data bytes to send
+        audio_data: Raw 16-bit mono PCM to play
+        sample_rate: Sample rate of the PCM (defaults to AUDIO_SAMPLE_RATE, the TTS output rate)
         
     Returns:
         True if successful, False otherwise
@@ -311,7 +399,43 @@ async def send_audio_to_room(session_id: str, audio_data: bytes) -> bool:
     
     try:
         processor = active_sessions[session_id]["processor"]
-        return await processor.send_audio(audio_data)
+        return await processor.send_audio(audio_data, sample_rate or settings.AUDIO_SAMPLE_RATE)
     except Exception as e:
         logger.error(f"Error sending audio to room: {str(e)}")
         return False
+
+
+async def flush_room_audio(session_id: str) -> int:
+    """
+    Drop audio queued for playback in a LiveKit room.
+    
+    Args:
+        session_id: Unique identifier for the session
+        
+    Returns:
+        Number of audio bytes dropped
+    """
+    if session_id not in active_sessions:
+        return 0
+    
+    try:
+        return await active_sessions[session_id]["processor"].flush_audio()
+    except Exception as e:
+        logger.error(f"Error flushing audio in room: {str(e)}")
+        return 0
+
+
+def get_playback_metrics(session_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Outbound audio metrics of a LiveKit session, including queue-to-playback latency.
+    
+    Args:
+        session_id: Unique identifier for the session
+        
+    Returns:
+        The metrics, or None if the session is not publishing audio
+    """
+    session = active_sessions.get(session_id)
+    if not session or not session["processor"].publisher:
+        return None
+    return session["processor"].publisher.metrics.as_dict()
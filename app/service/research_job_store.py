@@ -0,0 +1,155 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from app.models.model import ResearchJob
+
+# Take a free slot (or renew one already held) in a sorted set of job IDs scored by lease expiry.
+# KEYS[1] = slot set; ARGV = now, lease expiry, limit, job ID
+ACQUIRE_SLOT_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZSCORE', KEYS[1], ARGV[4]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+    return 1
+end
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+    return 1
+end
+return 0
+"""
+
+
+class ResearchJobStore(ABC):
+    """
+    Storage for research job records and the slots capping how many run at once.
+
+    Job records are kept for ``retention`` seconds after their last save.
+    A slot is held by one job until it is released or its ``lease`` runs
+    out, so a worker that dies mid-job cannot hold a slot forever; running
+    jobs renew their lease by acquiring again.
+    """
+
+    def __init__(self, retention: int, lease: int = 120):
+        self.retention = retention
+        self.lease = lease
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[ResearchJob]:
+        ...
+
+    @abstractmethod
+    async def save(self, job: ResearchJob) -> None:
+        ...
+
+    @abstractmethod
+    async def acquire_slot(self, job_id: str, limit: int) -> bool:
+        """
+        Take one of ``limit`` run slots for a job, or renew the one it holds.
+
+        Returns:
+            True if the job holds a slot
+        """
+
+    @abstractmethod
+    async def release_slot(self, job_id: str) -> None:
+        ...
+
+
+class InMemoryResearchJobStore(ResearchJobStore):
+    """Process-local job store; jobs and the concurrency cap cover this worker only"""
+
+    def __init__(self, retention: int, lease: int = 120):
+        super().__init__(retention, lease)
+        self._jobs: Dict[str, ResearchJob] = {}
+        self._expires_at: Dict[str, float] = {}
+        self._slots: Dict[str, float] = {}
+
+    async def get(self, job_id: str) -> Optional[ResearchJob]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def save(self, job: ResearchJob) -> None:
+        self._prune()
+        self._jobs[job.id] = job
+        self._expires_at[job.id] = time.monotonic() + self.retention
+
+    async def acquire_slot(self, job_id: str, limit: int) -> bool:
+        now = time.monotonic()
+        self._slots = {holder: expires for holder, expires in self._slots.items() if expires > now}
+        if job_id not in self._slots and len(self._slots) >= limit:
+            return False
+        self._slots[job_id] = now + self.lease
+        return True
+
+    async def release_slot(self, job_id: str) -> None:
+        self._slots.pop(job_id, None)
+
+    def _prune(self) -> None:
+        """Forget jobs older than the retention period"""
+        now = time.monotonic()
+        for job_id in [j for j, expires in self._expires_at.items() if expires <= now]:
+            self._expires_at.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+
+
+class RedisResearchJobStore(ResearchJobStore):
+    """
+    Job store shared by all workers.
+
+    Job records are JSON values with a Redis TTL; run slots are a sorted set
+    updated by a Lua script, so the concurrency cap holds across workers.
+    Redis calls run in a thread, connection setup included.
+    """
+
+    def __init__(self, retention: int, lease: int = 120, prefix: str = "research:job"):
+        super().__init__(retention, lease)
+        self.prefix = prefix
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+
+    @property
+    def _slots_key(self) -> str:
+        return f"{self.prefix}:slots"
+
+    async def _call(self, command):
+        from app.service.redis_service import RedisService
+        return await asyncio.to_thread(lambda: command(RedisService.get_instance()))
+
+    async def get(self, job_id: str) -> Optional[ResearchJob]:
+        payload = await self._call(lambda client: client.get(self._key(job_id)))
+        if payload is None:
+            return None
+        return ResearchJob.model_validate_json(payload)
+
+    async def save(self, job: ResearchJob) -> None:
+        payload = job.model_dump_json()
+        await self._call(lambda client: client.setex(self._key(job.id), self.retention, payload))
+
+    async def acquire_slot(self, job_id: str, limit: int) -> bool:
+        now = time.time()
+        acquired = await self._call(lambda client: client.eval(
+            ACQUIRE_SLOT_SCRIPT, 1, self._slots_key, now, now + self.lease, limit, job_id
+        ))
+        return bool(acquired)
+
+    async def release_slot(self, job_id: str) -> None:
+        await self._call(lambda client: client.zrem(self._slots_key, job_id))
+
+
+def create_research_job_store(backend: str, retention: int) -> ResearchJobStore:
+    """
+    Create the research job store for the configured backend.
+
+    Args:
+        backend: "memory" or "redis"
+        retention: Seconds a job record is kept after its last update
+
+    Returns:
+        The job store
+    """
+    if (backend or "memory").lower() == "redis":
+        return RedisResearchJobStore(retention)
+    return InMemoryResearchJobStore(retention)
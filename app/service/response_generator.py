@@ -6,6 +6,7 @@ import groq
 from app.config.config import get_settings
 from qdrant_client import QdrantClient
 from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+from app.utils.history import build_summary_prompt
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -178,11 +179,15 @@ Respond in a natural, conversational way. Keep responses concise but informative
         
         full_response = ""
         
-        async for chunk in response_stream:
-            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
-                content = chunk.choices[0].delta.content
-                full_response += content
-                yield content
+        try:
+            async for chunk in response_stream:
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    content = chunk.choices[0].delta.content
+                    full_response += content
+                    yield content
+        finally:
+            # Closing the HTTP stream stops generation when the consumer goes away (e.g. barge-in)
+            await response_stream.close()
         
         # Store the conversation in memory if session_id is provided
         if session_id:
@@ -206,3 +211,24 @@ Respond in a natural, conversational way. Keep responses concise but informative
     except Exception as e:
         logger.error(f"Error streaming response: {str(e)}")
         yield "I'm sorry, I'm having trouble processing your request right now."
+
+
+
+async def summarize_history(previous_summary: str, messages: List[Dict[str, Any]]) -> str:
+    """
+    Fold older conversation turns into a rolling summary using Groq API.
+    
+    Args:
+        previous_summary: Summary of turns folded in earlier
+        messages: Turns to add to the summary
+        
+    Returns:
+        Updated summary text
+    """
+    response = await groq_client.chat.completions.create(
+        model=settings.FAST_LLM,
+        messages=build_summary_prompt(previous_summary, messages),
+        temperature=0.2,
+        max_tokens=400,
+    )
+    return response.choices[0].message.content
@@ -0,0 +1,194 @@
+import asyncio
+import heapq
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.models.model import ChatSession
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, UUID]
+# Applies a change to a session in place; must not await, as it may be retried
+SessionUpdate = Callable[[ChatSession], None]
+
+
+class SessionStore(ABC):
+    """
+    Storage for chat sessions with sliding expiry.
+
+    Every ``save`` refreshes the session's time-to-live, so a session expires
+    after ``ttl`` seconds without activity.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    @abstractmethod
+    async def get(self, user_id: str, session_id: UUID) -> Optional[ChatSession]:
+        ...
+
+    @abstractmethod
+    async def save(self, session: ChatSession) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, user_id: str, session_id: UUID) -> bool:
+        ...
+
+    @abstractmethod
+    async def update(self, user_id: str, session_id: UUID, apply: SessionUpdate) -> Optional[ChatSession]:
+        """
+        Atomically change a stored session.
+
+        ``apply`` runs on the latest stored copy, so concurrent saves of
+        the same session are not overwritten with stale state.
+
+        Args:
+            user_id: Owner of the session
+            session_id: Session to change
+            apply: Mutates the session in place
+
+        Returns:
+            The updated session, or None if it does not exist
+        """
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local session store.
+
+    Expiry is tracked in a min-heap of (expires_at, key). Refreshing a session
+    pushes a new heap entry and leaves the old one behind; stale entries are
+    skipped when they surface. Eviction only ever pops entries that are due, so
+    the hot path never scans live sessions.
+    """
+
+    def __init__(self, ttl: int):
+        super().__init__(ttl)
+        self._sessions: Dict[SessionKey, ChatSession] = {}
+        self._expiry: Dict[SessionKey, float] = {}
+        self._heap: List[Tuple[float, SessionKey]] = []
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def get(self, user_id: str, session_id: UUID) -> Optional[ChatSession]:
+        self._evict_expired()
+        return self._sessions.get((user_id, session_id))
+
+    async def save(self, session: ChatSession) -> None:
+        self._evict_expired()
+        key = (session.user_id, session.id)
+        expires_at = time.monotonic() + self.ttl
+        self._sessions[key] = session
+        self._expiry[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+        # Refreshes leave stale heap entries behind; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._expiry) + 64:
+            self._heap = [(expires_at, key) for key, expires_at in self._expiry.items()]
+            heapq.heapify(self._heap)
+
+    async def delete(self, user_id: str, session_id: UUID) -> bool:
+        key = (user_id, session_id)
+        self._expiry.pop(key, None)
+        return self._sessions.pop(key, None) is not None
+
+    async def update(self, user_id: str, session_id: UUID, apply: SessionUpdate) -> Optional[ChatSession]:
+        # No await between reading and saving, so nothing can interleave
+        session = await self.get(user_id, session_id)
+        if session is None:
+            return None
+        apply(session)
+        await self.save(session)
+        return session
+
+    def _evict_expired(self) -> None:
+        """Drop sessions whose expiry has passed"""
+        now = time.monotonic()
+        evicted = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            # Skip entries superseded by a later refresh
+            if self._expiry.get(key) == expires_at:
+                del self._expiry[key]
+                del self._sessions[key]
+                evicted += 1
+        if evicted:
+            logger.info(f"Expired {evicted} chat sessions")
+
+
+class RedisSessionStore(SessionStore):
+    """Session store shared across workers, using Redis key TTLs for expiry"""
+
+    def __init__(self, ttl: int, prefix: str = "chat:session"):
+        super().__init__(ttl)
+        self.prefix = prefix
+
+    def _key(self, user_id: str, session_id: UUID) -> str:
+        return f"{self.prefix}:{user_id}:{session_id}"
+
+    async def _call(self, command):
+        """Run a Redis command in a thread; connecting may retry and sleep, so it runs there too"""
+        from app.service.redis_service import RedisService
+        return await asyncio.to_thread(lambda: command(RedisService.get_instance()))
+
+    async def get(self, user_id: str, session_id: UUID) -> Optional[ChatSession]:
+        key = self._key(user_id, session_id)
+        payload = await self._call(lambda client: client.get(key))
+        if payload is None:
+            return None
+        return ChatSession.model_validate_json(payload)
+
+    async def save(self, session: ChatSession) -> None:
+        key = self._key(session.user_id, session.id)
+        payload = session.model_dump_json()
+        await self._call(lambda client: client.setex(key, self.ttl, payload))
+
+    async def delete(self, user_id: str, session_id: UUID) -> bool:
+        key = self._key(user_id, session_id)
+        return bool(await self._call(lambda client: client.delete(key)))
+
+    async def update(self, user_id: str, session_id: UUID, apply: SessionUpdate) -> Optional[ChatSession]:
+        from redis.exceptions import WatchError
+        key = self._key(user_id, session_id)
+
+        def _update(client) -> Optional[ChatSession]:
+            with client.pipeline() as pipe:
+                # Optimistic transaction: retry if the session changed between read and write
+                while True:
+                    try:
+                        pipe.watch(key)
+                        payload = pipe.get(key)
+                        if payload is None:
+                            pipe.unwatch()
+                            return None
+                        session = ChatSession.model_validate_json(payload)
+                        apply(session)
+                        pipe.multi()
+                        pipe.setex(key, self.ttl, session.model_dump_json())
+                        pipe.execute()
+                        return session
+                    except WatchError:
+                        continue
+
+        return await self._call(_update)
+
+
+def create_session_store(backend: str, ttl: int) -> SessionStore:
+    """
+    Create the session store for the configured backend.
+
+    Args:
+        backend: "memory" or "redis"
+        ttl: Seconds of inactivity before a session expires
+
+    Returns:
+        The session store
+    """
+    if (backend or "memory").lower() == "redis":
+        return RedisSessionStore(ttl)
+    return InMemorySessionStore(ttl)
@@ -1,14 +1,10 @@
 import os
-import tempfile
-import numpy as np
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
 import asyncio
-import soundfile as sf
 from app.config.config import get_settings
 import logging
 from deepgram import Deepgram, DeepgramClientOptions
-from io import BytesIO
-from pydub import AudioSegment
+from app.utils.audio_format import is_wav, to_wav_bytes
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -34,67 +30,63 @@ def get_deepgram_client():
     return _deepgram_client
 
 
-async def transcribe_audio_chunk(audio_data: bytes) -> Tuple[str, float]:
+async def transcribe_audio_chunk(audio_data: bytes, sample_rate: Optional[int] = None) -> Tuple[str, float]:
     """
     Transcribe an audio chunk using Deepgram.
     
+    WAV input is sent as-is and headerless PCM is framed in memory; only
+    other containers are decoded (off the event loop) and converted to
+    mono at AUDIO_SAMPLE_RATE before sending.
+    
     Args:
-        audio_data: Raw audio bytes
+        audio_data: Audio file bytes, or raw 16-bit mono PCM when sample_rate is given
+        sample_rate: Sample rate of raw PCM input
         
     Returns:
         Tuple containing transcribed text and confidence score
     """
     client = get_deepgram_client()
     
-    # Create a temporary file to save the audio data
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_file:
-        temp_filename = temp_file.name
+    try:
+        if sample_rate is None and not is_wav(audio_data):
+            audio_bytes = await asyncio.to_thread(to_wav_bytes, audio_data, None, settings.AUDIO_SAMPLE_RATE)
+        else:
+            audio_bytes = to_wav_bytes(audio_data, sample_rate)
+        
+        # Configure transcription options for Deepgram SDK 3.2.0
+        options = {
+            "smart_format": True,
+            "model": settings.DEEPGRAM_MODEL,
+            "language": "en",
+            "diarize": False,
+            "punctuate": True,
+            "utterances": True
+        }
         
+        # Run transcription using Deepgram's updated API
+        response = await client.transcription.prerecorded.transcribe(
+            {"buffer": audio_bytes, "mimetype": "audio/wav"},
+            options
+        )
+        
+        # Extract transcription from the response
         try:
-            # Convert bytes to audio segment
-            audio = AudioSegment.from_file(BytesIO(audio_data))
-            
-            # Export to WAV format
-            audio.export(temp_filename, format="wav")
+            # Access the transcript from the response
+            transcription = response["results"]["channels"][0]["alternatives"][0]["transcript"]
             
-            # Read the audio file
-            with open(temp_filename, "rb") as audio_file:
-                audio_bytes = audio_file.read()
+            # Get confidence (if available)
+            confidence = 0.0
+            if "confidence" in response["results"]["channels"][0]["alternatives"][0]:
+                confidence = response["results"]["channels"][0]["alternatives"][0]["confidence"]
             
-            # Configure transcription options for Deepgram SDK 3.2.0
-            options = {
-                "smart_format": True,
-                "model": settings.DEEPGRAM_MODEL,
-                "language": "en",
-                "diarize": False,
-                "punctuate": True,
-                "utterances": True
-            }
-            
-            # Run transcription using Deepgram's updated API
-            response = await client.transcription.prerecorded.transcribe(
-                {"buffer": audio_bytes},
-                options
-            )
-            
-            # Extract transcription from the response
-            try:
-                # Access the transcript from the response
-                transcription = response["results"]["channels"][0]["alternatives"][0]["transcript"]
-                
-                # Get confidence (if available)
-                confidence = 0.0
-                if "confidence" in response["results"]["channels"][0]["alternatives"][0]:
-                    confidence = response["results"]["channels"][0]["alternatives"][0]["confidence"]
-                
-                return transcription, confidence
-            except (KeyError, IndexError) as e:
-                logger.error(f"Error parsing Deepgram response: {str(e)}")
-                return "", 0.0
-            
-        except Exception as e:
-            logger.error(f"Error transcribing audio with Deepgram: {str(e)}")
+            return transcription, confidence
+        except (KeyError, IndexError) as e:
+            logger.error(f"Error parsing Deepgram response: {str(e)}")
             return "", 0.0
+        
+    except Exception as e:
+        logger.error(f"Error transcribing audio with Deepgram: {str(e)}")
+        return "", 0.0
 
 
 async def process_streaming_audio(audio_stream):
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Awaitable, Callable, Optional, Tuple
+
+from app.config.config import get_settings
+from app.models.audio_models import TranscriptEvent
+from app.utils.audio_format import pcm_to_wav_bytes
+from app.utils.vad import EnergyVAD, VADEvent, VADSegmenter
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Transcribes one complete WAV utterance, returning (text, confidence)
+Transcriber = Callable[[bytes], Awaitable[Tuple[str, float]]]
+
+# Deepgram closes a live socket after about 10 s without audio or a KeepAlive,
+# and VAD gating means nothing is streamed while the speaker is silent
+KEEPALIVE_INTERVAL = 3.0
+RECONNECT_ATTEMPTS = 3
+RECONNECT_DELAY = 0.5
+
+
+class StreamingSTTSession(ABC):
+    """
+    A persistent speech-to-text session for one voice conversation.
+
+    Raw 16-bit mono PCM is pushed in with ``send`` as it arrives; transcripts
+    come back through ``events`` as "speech_started", "interim", "final" and
+    "endpoint" events. An "endpoint" means the speaker has finished a turn.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._events: asyncio.Queue = asyncio.Queue()
+
+    @abstractmethod
+    async def start(self) -> None:
+        ...
+
+    @abstractmethod
+    async def send(self, pcm: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Finalize the current utterance now, e.g. when local VAD has seen the speaker stop"""
+
+    @abstractmethod
+    async def finish(self) -> None:
+        ...
+
+    async def events(self) -> AsyncIterator[TranscriptEvent]:
+        """Yield transcript events until the session finishes"""
+        while True:
+            event = await self._events.get()
+            if event is None:
+                return
+            yield event
+
+    def _emit(self, event: TranscriptEvent) -> None:
+        self._events.put_nowait(event)
+
+    def _close_events(self) -> None:
+        self._events.put_nowait(None)
+
+
+class DeepgramStreamingSession(StreamingSTTSession):
+    """Deepgram live transcription over one websocket, kept alive through silences and reopened if dropped"""
+
+    def __init__(self, sample_rate: int, endpointing_ms: int, keepalive_interval: float = KEEPALIVE_INTERVAL):
+        super().__init__(sample_rate)
+        self.endpointing_ms = endpointing_ms
+        self.keepalive_interval = keepalive_interval
+        self._connection = None
+        self._finalizing = False
+        self._finished = False
+        self._last_sent = 0.0
+        self._keepalive_task: Optional[asyncio.Task] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._connection = await self._open_connection()
+        self._last_sent = time.monotonic()
+        self._keepalive_task = asyncio.ensure_future(self._keep_alive())
+        logger.info("Deepgram live transcription session started")
+
+    async def _open_connection(self):
+        """Open a live transcription websocket with this session's handlers registered"""
+        from deepgram import DeepgramClient, LiveOptions, LiveTranscriptionEvents
+
+        client = DeepgramClient(settings.DEEPGRAM_API_KEY)
+        connection = client.listen.asynclive.v("1")
+        connection.on(LiveTranscriptionEvents.Transcript, self._on_transcript)
+        connection.on(LiveTranscriptionEvents.SpeechStarted, self._on_speech_started)
+        connection.on(LiveTranscriptionEvents.UtteranceEnd, self._on_utterance_end)
+        connection.on(LiveTranscriptionEvents.Error, self._on_error)
+        connection.on(LiveTranscriptionEvents.Close, self._on_close)
+
+        options = LiveOptions(
+            model=settings.DEEPGRAM_MODEL,
+            language="en",
+            smart_format=True,
+            punctuate=True,
+            encoding="linear16",
+            channels=1,
+            sample_rate=self.sample_rate,
+            interim_results=True,
+            endpointing=self.endpointing_ms,
+            # Fallback end-of-turn signal when background noise prevents endpointing
+            utterance_end_ms="1000",
+            vad_events=True
+        )
+        if not await connection.start(options):
+            raise RuntimeError("Failed to open Deepgram live transcription connection")
+        return connection
+
+    async def send(self, pcm: bytes) -> None:
+        await self._send(pcm)
+
+    async def flush(self) -> None:
+        # Silence is not streamed between utterances, so ask Deepgram to finalize explicitly
+        if self._connection is not None:
+            self._finalizing = True
+            await self._send(json.dumps({"type": "Finalize"}))
+
+    async def finish(self) -> None:
+        self._finished = True
+        for task in (self._keepalive_task, self._reconnect_task):
+            if task is not None:
+                task.cancel()
+        self._keepalive_task = self._reconnect_task = None
+        if self._connection is not None:
+            await self._connection.finish()
+            self._connection = None
+        self._close_events()
+
+    async def _send(self, data) -> None:
+        # Audio arriving while the socket is being reopened is dropped
+        if self._connection is not None:
+            await self._connection.send(data)
+            self._last_sent = time.monotonic()
+
+    async def _keep_alive(self) -> None:
+        """Send KeepAlive whenever no audio has gone out for a whole interval"""
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            if time.monotonic() - self._last_sent < self.keepalive_interval:
+                continue
+            try:
+                await self._send(json.dumps({"type": "KeepAlive"}))
+            except Exception as e:
+                logger.warning(f"Deepgram KeepAlive failed: {str(e)}")
+
+    async def _reconnect(self) -> None:
+        for attempt in range(1, RECONNECT_ATTEMPTS + 1):
+            try:
+                connection = await self._open_connection()
+            except Exception as e:
+                logger.warning(f"Deepgram reconnect attempt {attempt} failed: {str(e)}")
+                await asyncio.sleep(RECONNECT_DELAY * attempt)
+                continue
+            if self._finished:
+                await connection.finish()
+                return
+            self._connection = connection
+            self._finalizing = False
+            self._last_sent = time.monotonic()
+            logger.info("Deepgram live transcription connection reopened")
+            return
+        logger.error("Giving up on Deepgram live transcription after repeated reconnect failures")
+        self._close_events()
+
+    async def _on_transcript(self, client, result, **kwargs) -> None:
+        alternative = result.channel.alternatives[0]
+        if alternative.transcript:
+            self._emit(TranscriptEvent(
+                type="final" if result.is_final else "interim",
+                text=alternative.transcript,
+                confidence=alternative.confidence
+            ))
+        if result.speech_final or (result.is_final and self._finalizing):
+            self._finalizing = False
+            self._emit(TranscriptEvent(type="endpoint"))
+
+    async def _on_speech_started(self, client, speech_started, **kwargs) -> None:
+        self._emit(TranscriptEvent(type="speech_started"))
+
+    async def _on_utterance_end(self, client, utterance_end, **kwargs) -> None:
+        self._emit(TranscriptEvent(type="endpoint"))
+
+    async def _on_error(self, client, error, **kwargs) -> None:
+        logger.error(f"Deepgram live transcription error: {error}")
+
+    async def _on_close(self, client, close, **kwargs) -> None:
+        if self._finished:
+            logger.info("Deepgram live transcription connection closed")
+            return
+        # Closed underneath us (idle timeout, network drop): reopen from a task,
+        # since this handler runs inside the old connection's receive loop
+        logger.warning("Deepgram live transcription connection closed unexpectedly, reconnecting")
+        self._connection = None
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+
+class LocalStreamingSession(StreamingSTTSession):
+    """
+    Offline stand-in with local endpointing.
+
+    Speech is segmented by an energy VAD; after ``endpointing_ms`` of
+    silence the buffered utterance is transcribed once by ``transcriber``
+    and a "final" and an "endpoint" event are emitted. With ``interim_ms``
+    set, the utterance so far is also transcribed at that interval for
+    "interim" events. Transcription runs on a worker task, so ``send``
+    never waits on it.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        endpointing_ms: int,
+        transcriber: Optional[Transcriber] = None,
+        energy_threshold: float = 500.0,
+        interim_ms: int = 0
+    ):
+        super().__init__(sample_rate)
+        self.endpointing_ms = endpointing_ms
+        self.transcriber = transcriber or _transcribe_prerecorded
+        self.interim_ms = interim_ms
+        self._segmenter = VADSegmenter(sample_rate, endpointing_ms, EnergyVAD(energy_threshold))
+        self._utterance = bytearray()
+        self._since_interim_ms = 0.0
+        self._jobs: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._worker = asyncio.ensure_future(self._work())
+
+    async def send(self, pcm: bytes) -> None:
+        for event in self._segmenter.process(pcm):
+            self._handle(event)
+
+    async def flush(self) -> None:
+        for event in self._segmenter.flush():
+            self._handle(event)
+
+    async def finish(self) -> None:
+        await self.flush()
+        self._jobs.put_nowait(None)
+        if self._worker is not None:
+            await self._worker
+            self._worker = None
+        self._close_events()
+
+    def _handle(self, event: VADEvent) -> None:
+        if event.type == "speech_start":
+            self._since_interim_ms = 0.0
+            self._emit(TranscriptEvent(type="speech_started"))
+        elif event.type == "audio":
+            self._utterance.extend(event.audio)
+            self._since_interim_ms += len(event.audio) // 2 * 1000.0 / self.sample_rate
+            if self.interim_ms and self._since_interim_ms >= self.interim_ms:
+                self._jobs.put_nowait(("interim", bytes(self._utterance)))
+                self._since_interim_ms = 0.0
+        elif event.type == "speech_end" and self._utterance:
+            self._jobs.put_nowait(("final", bytes(self._utterance)))
+            self._utterance.clear()
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._jobs.get()
+            if job is None:
+                return
+            kind, pcm = job
+            try:
+                text, confidence = await self.transcriber(pcm_to_wav_bytes(pcm, self.sample_rate))
+            except Exception as e:
+                logger.error(f"Local transcription failed: {str(e)}")
+                text, confidence = "", 0.0
+            if text:
+                self._emit(TranscriptEvent(type=kind, text=text, confidence=confidence))
+            if kind == "final":
+                self._emit(TranscriptEvent(type="endpoint"))
+
+
+async def _transcribe_prerecorded(wav: bytes) -> Tuple[str, float]:
+    from app.service.speech_to_text import transcribe_audio_chunk
+    return await transcribe_audio_chunk(wav)
+
+
+def create_stt_session(
+    provider: str,
+    sample_rate: int,
+    transcriber: Optional[Transcriber] = None
+) -> StreamingSTTSession:
+    """
+    Create a streaming speech-to-text session.
+
+    Args:
+        provider: "deepgram" or "local"
+        sample_rate: Sample rate of the 16-bit mono PCM that will be sent
+        transcriber: Utterance transcriber for the local provider
+
+    Returns:
+        The (not yet started) session
+    """
+    if (provider or "deepgram").lower() == "local":
+        return LocalStreamingSession(sample_rate, settings.DEEPGRAM_ENDPOINTING_MS, transcriber=transcriber)
+    return DeepgramStreamingSession(sample_rate, settings.DEEPGRAM_ENDPOINTING_MS)
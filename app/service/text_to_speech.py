@@ -1,103 +1,118 @@
-import os
-import tempfile
 import asyncio
 import logging
-from pathlib import Path
-import soundfile as sf
+from typing import AsyncIterator, Optional, Tuple
+
 import numpy as np
-from typing import Dict, Any, Optional, Tuple
-import io
 
-from elevenlabs import generate, save, set_api_key, Voice, VoiceSettings
-from elevenlabs.api import Models
 from app.config.config import get_settings
+from app.service.tts_cache import PREWARM_PHRASES, CachedTTSProvider, create_audio_cache
+from app.service.tts_providers import TTSProvider, create_tts_provider
+from app.utils.audio_dsp import resample
+from app.utils.audio_format import pcm_to_wav_bytes
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
-# Initialize the ElevenLabs API key
-api_key = settings.ELEVENLABS_API_KEY
-if api_key:
-    set_api_key(api_key)
-else:
+if not settings.ELEVENLABS_API_KEY and settings.TTS_PROVIDER == "elevenlabs":
     logger.warning("ELEVENLABS_API_KEY not set in settings or environment variables")
 
-# Default voice settings for natural, mentor-like speech
-default_voice_settings = VoiceSettings(
-    stability=0.75,
-    similarity_boost=0.75,
-    style=0.0,
-    use_speaker_boost=True
+# Streaming synthesis shared by every voice session, as raw PCM at the LiveKit sample rate
+tts_provider: TTSProvider = create_tts_provider(settings.TTS_PROVIDER, settings.AUDIO_SAMPLE_RATE)
+
+# Repeated utterances are replayed from the cache instead of resynthesized
+tts_cache = create_audio_cache(
+    settings.TTS_CACHE_BACKEND,
+    max_bytes=settings.TTS_CACHE_MAX_BYTES,
+    directory=settings.TTS_CACHE_DIR,
+    ttl=settings.TTS_CACHE_TTL
 )
+if tts_cache is not None:
+    tts_provider = CachedTTSProvider(tts_provider, tts_cache, max_chars=settings.TTS_CACHE_MAX_CHARS)
+
+
+def _to_pipeline_rate(pcm: bytes, sample_rate: int) -> bytes:
+    """Resample synthesized PCM to AUDIO_SAMPLE_RATE when the provider could not produce it directly"""
+    if sample_rate == settings.AUDIO_SAMPLE_RATE or not pcm:
+        return pcm
+    return resample(np.frombuffer(pcm, dtype=np.int16), sample_rate, settings.AUDIO_SAMPLE_RATE).tobytes()
+
+
+async def prewarm_tts_cache() -> int:
+    """
+    Synthesize the common phrases missing from the TTS cache.
+
+    Returns:
+        Number of phrases that had to be synthesized
+    """
+    if not isinstance(tts_provider, CachedTTSProvider):
+        return 0
+    return await tts_provider.prewarm(PREWARM_PHRASES)
 
 
 async def text_to_speech(text: str, voice_id: str = None) -> Tuple[bytes, int]:
     """
-    Convert text to speech using ElevenLabs.
-    
+    Convert text to speech as a WAV file at AUDIO_SAMPLE_RATE.
+
     Args:
         text: The text to convert to speech
         voice_id: ElevenLabs voice ID or name (uses default from settings if not specified)
-        
+
     Returns:
         Tuple containing audio data as bytes and sample rate
     """
-    voice_id = voice_id or settings.ELEVENLABS_VOICE_ID
-    
-    if not api_key:
-        logger.error("ELEVENLABS_API_KEY not available. Cannot generate speech.")
-        return bytes(), settings.AUDIO_SAMPLE_RATE
-    
     try:
-        # Generate audio using ElevenLabs API
-        audio_data = await asyncio.to_thread(
-            generate,
-            text=text,
-            voice=voice_id,
-            model=Models.ELEVEN_MULTILINGUAL_V2,  # Using their multilingual v2 model for better quality
-            output_format="wav",
-            voice_settings=default_voice_settings
-        )
-        
-        # Save to a temporary file to get the proper WAV format
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_file:
-            await asyncio.to_thread(save, audio_data, temp_file.name)
-            
-            # Read wav file to get proper format and sample rate
-            audio, sample_rate = sf.read(temp_file.name)
-            
-            # Convert back to bytes for streaming
-            buffer = io.BytesIO()
-            sf.write(buffer, audio, sample_rate, format='WAV')
-            buffer.seek(0)
-            wav_bytes = buffer.read()
-            
-            return wav_bytes, sample_rate
-        
+        pcm, sample_rate = await tts_provider.synthesize(text, voice_id)
+        pcm = _to_pipeline_rate(pcm, sample_rate)
+        return pcm_to_wav_bytes(pcm, settings.AUDIO_SAMPLE_RATE), settings.AUDIO_SAMPLE_RATE
     except Exception as e:
-        logger.error(f"Error in ElevenLabs text-to-speech conversion: {str(e)}")
+        logger.error(f"Error in text-to-speech conversion: {str(e)}")
         # Return empty audio in case of error
         return bytes(), settings.AUDIO_SAMPLE_RATE
 
 
-async def stream_text_to_speech(text: str, chunk_size: int = 1024, voice_id: str = None):
+async def synthesize_pcm(
+    text: str,
+    voice_id: str = None,
+    cancel: Optional[asyncio.Event] = None
+) -> Tuple[bytes, int]:
     """
-    Stream audio data from text-to-speech conversion.
-    
+    Convert text to raw 16-bit mono PCM at AUDIO_SAMPLE_RATE, skipping any container encoding.
+
     Args:
         text: The text to convert to speech
-        chunk_size: The size of audio chunks to stream
         voice_id: ElevenLabs voice ID or name (uses default from settings if not specified)
-        
+        cancel: Stops synthesis early when set
+
+    Returns:
+        Tuple containing PCM bytes and sample rate
+    """
+    try:
+        pcm, sample_rate = await tts_provider.synthesize(text, voice_id, cancel)
+        return _to_pipeline_rate(pcm, sample_rate), settings.AUDIO_SAMPLE_RATE
+    except Exception as e:
+        logger.error(f"Error in text-to-speech conversion: {str(e)}")
+        return bytes(), settings.AUDIO_SAMPLE_RATE
+
+
+async def stream_text_to_speech(
+    text: str,
+    voice_id: str = None,
+    cancel: Optional[asyncio.Event] = None
+) -> AsyncIterator[bytes]:
+    """
+    Stream audio data as it is synthesized.
+
+    Args:
+        text: The text to convert to speech
+        voice_id: ElevenLabs voice ID or name (uses default from settings if not specified)
+        cancel: Stops synthesis early when set
+
     Yields:
-        Audio data chunks
+        16-bit mono PCM chunks at tts_provider.sample_rate
     """
-    voice_id = voice_id or settings.ELEVENLABS_VOICE_ID
-    audio_bytes, _ = await text_to_speech(text, voice_id)
-    
-    # Stream the audio in chunks
-    for i in range(0, len(audio_bytes), chunk_size):
-        chunk = audio_bytes[i:i+chunk_size]
-        yield chunk
-        # Add a small delay to simulate real-time streaming
-        await asyncio.sleep(0.01)
+    stream = tts_provider.stream(text, voice_id, cancel)
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()
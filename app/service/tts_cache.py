@@ -0,0 +1,234 @@
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+from app.service.tts_providers import TTSProvider
+from app.utils.cache import CacheStats, RedisCache
+
+logger = logging.getLogger(__name__)
+
+# Utterances worth having ready before anyone asks for them
+PREWARM_PHRASES = [
+    "I'm sorry, I'm having trouble processing your request right now.",
+    "Hello! How can I help you today?",
+    "Sure.",
+    "Let me think about that.",
+    "Could you say that again?",
+]
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class DiskAudioStore:
+    """Shared tier keeping one raw PCM file per cache key under ``directory``"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, audio: bytes) -> None:
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(audio)
+        # Atomic, so concurrent workers never read a partial file
+        os.replace(temp_path, path)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def set(self, key: str, audio: bytes) -> None:
+        await asyncio.to_thread(self._write, key, audio)
+
+
+class RedisAudioStore:
+    """Shared tier in Redis; audio is base64-encoded as the client decodes responses to str"""
+
+    def __init__(self, prefix: str, ttl: Optional[int] = None):
+        self._cache = RedisCache("tts:redis", prefix=prefix, default_ttl=ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._cache.get(key)
+        return base64.b64decode(value) if value is not None else None
+
+    async def set(self, key: str, audio: bytes) -> None:
+        await self._cache.set(key, base64.b64encode(audio).decode("ascii"))
+
+
+class AudioCache:
+    """
+    Byte-bounded LRU of synthesized audio in front of an optional shared tier.
+
+    The memory tier evicts least recently used entries once the total
+    size passes ``max_bytes``. Shared-tier hits are copied into memory.
+    Like the string caches, failures are logged and count as misses.
+    """
+
+    def __init__(self, max_bytes: int, shared=None):
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.stats = CacheStats()
+        self.evictions = 0
+        self.size_bytes = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= len(previous)
+        self._entries[key] = audio
+        self.size_bytes += len(audio)
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= len(evicted)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[bytes]:
+        audio = self._entries.get(key)
+        if audio is not None:
+            self._entries.move_to_end(key)
+        elif self.shared is not None:
+            try:
+                audio = await self.shared.get(key)
+            except Exception as e:
+                self.stats.errors += 1
+                logger.warning(f"[tts] Cache get failed: {str(e)}")
+            if audio is not None:
+                self._remember(key, audio)
+
+        if audio is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return audio
+
+    async def set(self, key: str, audio: bytes) -> None:
+        self._remember(key, audio)
+        self.stats.sets += 1
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, audio)
+            except Exception as e:
+                self.stats.errors += 1
+                logger.warning(f"[tts] Cache set failed: {str(e)}")
+
+    def stats_dict(self) -> Dict[str, Any]:
+        stats = self.stats.as_dict()
+        stats.update({
+            "entries": len(self._entries),
+            "bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        })
+        return stats
+
+
+class CachedTTSProvider(TTSProvider):
+    """
+    Serves repeated utterances from an audio cache instead of resynthesizing them.
+
+    Keys hash the normalized text with the provider's voice, model and
+    output settings, so changing any of them never replays stale audio.
+    Only texts up to ``max_chars`` are cached, and audio is stored only
+    when synthesis ran to completion, never after a cancellation.
+    """
+
+    def __init__(self, provider: TTSProvider, cache: AudioCache, max_chars: int = 300, chunk_bytes: int = 3200):
+        super().__init__(provider.sample_rate)
+        self.provider = provider
+        self.cache = cache
+        self.max_chars = max_chars
+        self.chunk_bytes = chunk_bytes
+
+    def cache_id(self, voice_id: Optional[str]) -> str:
+        return self.provider.cache_id(voice_id)
+
+    def cache_key(self, text: str, voice_id: Optional[str] = None) -> str:
+        normalized = _WHITESPACE.sub(" ", text.strip())
+        return hashlib.sha256(f"{self.cache_id(voice_id)}\n{normalized}".encode("utf-8")).hexdigest()
+
+    async def _stream(self, text: str, voice_id: Optional[str]) -> AsyncIterator[bytes]:
+        key = self.cache_key(text, voice_id) if len(text) <= self.max_chars else None
+        if key is not None:
+            audio = await self.cache.get(key)
+            if audio is not None:
+                for start in range(0, len(audio), self.chunk_bytes):
+                    yield audio[start:start + self.chunk_bytes]
+                return
+
+        chunks = []
+        upstream = self.provider.stream(text, voice_id)
+        try:
+            async for chunk in upstream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            await upstream.aclose()
+        # Only reached when the consumer read the whole utterance
+        if key is not None and chunks:
+            await self.cache.set(key, b"".join(chunks))
+
+    async def prewarm(self, phrases: Iterable[str], voice_id: Optional[str] = None) -> int:
+        """
+        Make sure each phrase is cached, synthesizing only the missing ones.
+
+        Returns:
+            Number of phrases that had to be synthesized
+        """
+        synthesized = 0
+        for phrase in phrases:
+            key = self.cache_key(phrase, voice_id)
+            if await self.cache.get(key) is not None:
+                continue
+            try:
+                pcm, _ = await self.synthesize(phrase, voice_id)
+                synthesized += bool(pcm)
+            except Exception as e:
+                logger.warning(f"Could not prewarm TTS phrase '{phrase}': {str(e)}")
+        logger.info(f"TTS cache prewarmed; {synthesized} phrase(s) synthesized")
+        return synthesized
+
+
+def create_audio_cache(backend: str, max_bytes: int, directory: str, ttl: Optional[int] = None) -> Optional[AudioCache]:
+    """
+    Create the synthesized-audio cache.
+
+    Args:
+        backend: "memory", "disk" (memory in front of files), "redis" (memory in front of Redis) or "none"
+        max_bytes: Capacity of the memory tier
+        directory: Location of the disk tier
+        ttl: Expiry of Redis entries in seconds
+
+    Returns:
+        The cache, or None when caching is disabled
+    """
+    backend = (backend or "none").lower()
+    if backend == "memory":
+        return AudioCache(max_bytes)
+    if backend == "disk":
+        return AudioCache(max_bytes, shared=DiskAudioStore(directory))
+    if backend == "redis":
+        return AudioCache(max_bytes, shared=RedisAudioStore("tts", ttl=ttl))
+    if backend != "none":
+        logger.warning(f"Unknown cache backend '{backend}' for tts, caching disabled")
+    return None
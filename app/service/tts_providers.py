@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Raw PCM sample rates ElevenLabs can stream
+ELEVENLABS_PCM_RATES = (16000, 22050, 24000, 44100)
+VOICE_ID_PATTERN = re.compile(r"^[A-Za-z0-9]{20}$")
+
+
+class TTSProvider:
+    """
+    Text-to-speech that streams audio while it is being synthesized.
+
+    ``stream`` yields 16-bit mono PCM at ``sample_rate`` in whole-sample
+    chunks. Setting the ``cancel`` event, closing the stream or cancelling
+    the consuming task stops synthesis and releases the upstream request,
+    so an interrupted response stops costing synthesis time.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+
+    def _stream(self, text: str, voice_id: Optional[str]) -> AsyncIterator[bytes]:
+        """Provider-specific synthesis as an async generator of raw PCM"""
+        raise NotImplementedError
+
+    def cache_id(self, voice_id: Optional[str]) -> str:
+        """Everything besides the text that changes the synthesized audio"""
+        return f"{type(self).__name__}:{voice_id}:{self.sample_rate}"
+
+    async def stream(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        cancel: Optional[asyncio.Event] = None
+    ) -> AsyncIterator[bytes]:
+        """Yield PCM chunks for the text as they are synthesized"""
+        if cancel is not None and cancel.is_set():
+            return
+        upstream = self._stream(text, voice_id)
+        carry = b""
+        try:
+            async for chunk in upstream:
+                if cancel is not None and cancel.is_set():
+                    logger.debug("Speech synthesis cancelled")
+                    return
+                chunk = carry + chunk
+                # Network chunks can split a sample; hold the odd byte back
+                usable = len(chunk) - len(chunk) % 2
+                carry = chunk[usable:]
+                if usable:
+                    yield chunk[:usable]
+        finally:
+            await upstream.aclose()
+
+    async def synthesize(
+        self,
+        text: str,
+        voice_id: Optional[str] = None,
+        cancel: Optional[asyncio.Event] = None
+    ) -> Tuple[bytes, int]:
+        """
+        Synthesize the whole text.
+
+        Returns:
+            Tuple of 16-bit mono PCM bytes and sample rate
+        """
+        chunks = []
+        stream = self.stream(text, voice_id, cancel)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+        finally:
+            await stream.aclose()
+        return b"".join(chunks), self.sample_rate
+
+
+class ElevenLabsTTSProvider(TTSProvider):
+    """ElevenLabs streaming synthesis, requesting raw PCM so nothing needs decoding"""
+
+    # Default voice settings for natural, mentor-like speech
+    VOICE_SETTINGS = {"stability": 0.75, "similarity_boost": 0.75, "style": 0.0, "use_speaker_boost": True}
+
+    def __init__(self, sample_rate: int, voice_id: str, model_id: str):
+        if sample_rate not in ELEVENLABS_PCM_RATES:
+            logger.warning(f"ElevenLabs cannot stream PCM at {sample_rate} Hz; using 16000 Hz")
+            sample_rate = 16000
+        super().__init__(sample_rate)
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self._client = None
+        self._voice_settings = None
+        self._voice_ids: Dict[str, str] = {}
+
+    def _get_client(self):
+        if self._client is None:
+            from elevenlabs import VoiceSettings
+            from elevenlabs.client import AsyncElevenLabs
+
+            if not settings.ELEVENLABS_API_KEY:
+                raise ValueError("ELEVENLABS_API_KEY not found in environment variables or settings")
+            self._client = AsyncElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
+            self._voice_settings = VoiceSettings(**self.VOICE_SETTINGS)
+        return self._client
+
+    def cache_id(self, voice_id: Optional[str]) -> str:
+        voice_settings = ",".join(f"{name}={value}" for name, value in sorted(self.VOICE_SETTINGS.items()))
+        return f"elevenlabs:{self.model_id}:{voice_id or self.voice_id}:pcm_{self.sample_rate}:{voice_settings}"
+
+    async def _resolve_voice(self, voice: str) -> str:
+        """Voice names (e.g. "Antoni") are looked up once; IDs pass straight through"""
+        if VOICE_ID_PATTERN.match(voice):
+            return voice
+        if voice not in self._voice_ids:
+            response = await self._get_client().voices.get_all()
+            self._voice_ids.update({v.name: v.voice_id for v in response.voices})
+            if voice not in self._voice_ids:
+                raise ValueError(f"Unknown ElevenLabs voice: {voice}")
+        return self._voice_ids[voice]
+
+    async def _stream(self, text: str, voice_id: Optional[str]) -> AsyncIterator[bytes]:
+        client = self._get_client()
+        voice = await self._resolve_voice(voice_id or self.voice_id)
+        async for chunk in client.text_to_speech.convert_as_stream(
+            voice,
+            text=text,
+            model_id=self.model_id,
+            output_format=f"pcm_{self.sample_rate}",
+            voice_settings=self._voice_settings
+        ):
+            yield chunk
+
+
+class FakeTTSProvider(TTSProvider):
+    """
+    Offline provider for tests and local development.
+
+    Produces a quiet tone lasting ``ms_per_char`` per character, in
+    ``chunk_ms`` chunks, each taking ``chunk_delay`` seconds to "synthesize".
+    Requested texts are recorded in ``requests`` and every chunk produced
+    counts towards ``chunks_synthesized``.
+    """
+
+    def __init__(self, sample_rate: int = 16000, ms_per_char: float = 60.0, chunk_ms: int = 40, chunk_delay: float = 0.0):
+        super().__init__(sample_rate)
+        self.ms_per_char = ms_per_char
+        self.chunk_ms = chunk_ms
+        self.chunk_delay = chunk_delay
+        self.requests: List[str] = []
+        self.chunks_synthesized = 0
+
+    def cache_id(self, voice_id: Optional[str]) -> str:
+        return f"fake:{self.ms_per_char}:{self.sample_rate}"
+
+    async def _stream(self, text: str, voice_id: Optional[str]) -> AsyncIterator[bytes]:
+        self.requests.append(text)
+        total = int(self.sample_rate * len(text) * self.ms_per_char / 1000)
+        chunk_samples = int(self.sample_rate * self.chunk_ms / 1000)
+        for start in range(0, total, chunk_samples):
+            await asyncio.sleep(self.chunk_delay)
+            t = np.arange(start, min(start + chunk_samples, total)) / self.sample_rate
+            self.chunks_synthesized += 1
+            yield (np.sin(2 * np.pi * 220 * t) * 3000).astype(np.int16).tobytes()
+
+
+def create_tts_provider(provider: str, sample_rate: int) -> TTSProvider:
+    """
+    Create a streaming text-to-speech provider.
+
+    Args:
+        provider: "elevenlabs" or "fake"
+        sample_rate: Preferred PCM sample rate; check ``sample_rate`` on the result
+
+    Returns:
+        The provider
+    """
+    if (provider or "elevenlabs").lower() == "fake":
+        return FakeTTSProvider(sample_rate)
+    return ElevenLabsTTSProvider(sample_rate, settings.ELEVENLABS_VOICE_ID, settings.ELEVENLABS_MODEL)
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional
+
+from app.utils.history import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Drops audio queued for playback, returning the number of bytes dropped
+AudioFlusher = Callable[[], Awaitable[int]]
+
+
+@dataclass
+class Turn:
+    """Progress of one assistant response, updated while it is generated and spoken"""
+    generated_text: str = ""
+    tokens: int = 0
+    spoken: List[str] = field(default_factory=list)
+    audio_bytes_synthesized: int = 0
+    audio_bytes_sent: int = 0
+
+    @property
+    def spoken_text(self) -> str:
+        return " ".join(self.spoken)
+
+    def unspoken_tokens(self) -> int:
+        """Generated tokens whose speech was never handed on for playback"""
+        return max(count_tokens(self.generated_text) - count_tokens(self.spoken_text), 0)
+
+
+class BargeInStats:
+    """
+    What interruptions saved.
+
+    ``tokens_saved`` counts generated tokens that were never synthesized or
+    played; ``bytes_saved`` counts synthesized or queued audio that was
+    never played. Neither includes output the LLM never had to generate.
+    """
+
+    def __init__(self):
+        self.interruptions = 0
+        self.tokens_saved = 0
+        self.bytes_saved = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "interruptions": self.interruptions,
+            "tokens_saved": self.tokens_saved,
+            "bytes_saved": self.bytes_saved
+        }
+
+
+class TurnManager:
+    """
+    Runs at most one assistant response per voice session.
+
+    Starting a response cancels the one still in flight, so replies never
+    queue up behind each other. ``interrupt`` is called when the user
+    starts speaking: it cancels generation and synthesis, flushes audio
+    already queued for playback and records what was saved.
+    """
+
+    def __init__(self, session_id: str, flush_audio: Optional[AudioFlusher] = None):
+        self.session_id = session_id
+        self.flush_audio = flush_audio
+        self.stats = BargeInStats()
+        self.turn: Optional[Turn] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def responding(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, respond: Callable[[Turn], Coroutine[Any, Any, Any]]) -> asyncio.Task:
+        """
+        Start a new response, interrupting any current one.
+
+        Args:
+            respond: Coroutine function producing the response; it receives the
+                Turn to record its progress in
+
+        Returns:
+            The task running the response
+        """
+        self._cancel_current()
+        turn = Turn()
+        self.turn = turn
+        self._task = asyncio.ensure_future(respond(turn))
+        return self._task
+
+    async def interrupt(self) -> bool:
+        """
+        Barge-in: stop the current response and drop its queued audio.
+
+        Returns:
+            True if a response was generating or still playing
+        """
+        turn = self.turn
+        was_responding = self.responding
+        self._cancel_current()
+        self.turn = None
+
+        flushed = 0
+        if self.flush_audio is not None:
+            try:
+                flushed = await self.flush_audio()
+            except Exception as e:
+                logger.error(f"Error flushing audio for session {self.session_id}: {str(e)}")
+        if not was_responding and not flushed:
+            return False
+
+        tokens_saved = turn.unspoken_tokens() if turn else 0
+        bytes_saved = flushed
+        if turn is not None:
+            bytes_saved += max(turn.audio_bytes_synthesized - turn.audio_bytes_sent, 0)
+        self.stats.interruptions += 1
+        self.stats.tokens_saved += tokens_saved
+        self.stats.bytes_saved += bytes_saved
+        logger.info(
+            f"Barge-in on session {self.session_id}: response cancelled after {turn.tokens if turn else 0} tokens, "
+            f"saved {tokens_saved} tokens and {bytes_saved} audio bytes"
+        )
+        return True
+
+    async def close(self) -> None:
+        """Cancel any response in flight and wait for it to stop"""
+        task = self._task
+        self._cancel_current()
+        if task is not None:
+            await asyncio.wait([task])
+
+    def _cancel_current(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
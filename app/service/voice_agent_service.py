@@ -3,59 +3,110 @@ import logging
 import uuid
 from typing import Dict, Any, Optional, List, Callable
 
-from app.service.speech_to_text import transcribe_audio_chunk
-from app.service.response_generator import generate_response, stream_response
-from app.service.text_to_speech import text_to_speech, stream_text_to_speech
+from app.service.stt_providers import StreamingSTTSession, create_stt_session
+from app.service.response_generator import stream_response, summarize_history
+from app.service.text_to_speech import synthesize_pcm
+from app.service.voice_pipeline import PipelineMetrics, synthesize_stream
+from app.service.turn_manager import Turn, TurnManager
 from app.service.livekit_service import (
     create_room, 
     get_room_token,
     setup_audio_processor,
-    close_session
+    close_session,
+    flush_room_audio
 )
 
+from app.config.config import get_settings
+from app.utils.history import ConversationHistoryManager
+
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
 # Store active conversations
 active_conversations: Dict[str, Dict[str, Any]] = {}
 
+# Final transcripts below this confidence are ignored
+MIN_TRANSCRIPT_CONFIDENCE = 0.6
+
+# Bounds the history sent per turn; older turns are summarized in the background
+history_manager = ConversationHistoryManager(
+    max_tokens=settings.HISTORY_MAX_TOKENS,
+    recent_messages=settings.HISTORY_RECENT_MESSAGES,
+    summarizer=summarize_history
+)
+
 
 async def handle_transcription(audio_data: bytes, session_id: str):
     """
-    Handle transcription of audio data.
+    Forward audio to the session's streaming transcription.
     
     Args:
-        audio_data: Audio data bytes
+        audio_data: 16-bit mono PCM audio bytes
         session_id: Session identifier
     """
-    if session_id not in active_conversations:
+    conversation = active_conversations.get(session_id)
+    if conversation is None or conversation.get("stt") is None:
         logger.warning(f"Session {session_id} not found for transcription")
         return
     
-    # Transcribe the audio
-    text, confidence = await transcribe_audio_chunk(audio_data)
+    await conversation["stt"].send(audio_data)
+
+
+async def handle_end_of_utterance(session_id: str):
+    """
+    Finalize transcription as soon as VAD sees the speaker stop.
     
-    if not text or confidence < 0.6:  # Threshold for confidence
+    Args:
+        session_id: Session identifier
+    """
+    conversation = active_conversations.get(session_id)
+    if conversation is None or conversation.get("stt") is None:
         return
     
-    # Store the transcription
-    conversation = active_conversations[session_id]
-    if "transcription_buffer" not in conversation:
-        conversation["transcription_buffer"] = ""
-    
-    conversation["transcription_buffer"] += text + " "
+    await conversation["stt"].flush()
+
+
+async def consume_transcripts(session_id: str, stt: StreamingSTTSession):
+    """
+    Collect final transcripts into the utterance buffer and respond at each endpoint.
     
-    # Check if the transcription contains a stopping pattern (like silence or end of sentence)
-    if "." in text or "?" in text or "!" in text or len(conversation["transcription_buffer"]) > 200:
-        # Process the complete utterance
-        await process_utterance(session_id)
+    Args:
+        session_id: Session identifier
+        stt: The session's streaming transcription
+    """
+    async for event in stt.events():
+        conversation = active_conversations.get(session_id)
+        if conversation is None:
+            continue
+        
+        if event.type == "speech_started" and settings.VOICE_BARGE_IN:
+            # The user is talking over the assistant: stop generating and speaking
+            await conversation["turns"].interrupt()
+        elif event.type == "final" and event.text and event.confidence >= MIN_TRANSCRIPT_CONFIDENCE:
+            conversation["transcription_buffer"] = f"{conversation.get('transcription_buffer', '')}{event.text} "
+        elif event.type == "endpoint" and conversation.get("transcription_buffer", "").strip():
+            # Respond in the background so transcripts keep flowing while the reply is generated
+            conversation["turns"].start(lambda turn: process_utterance(session_id, turn))
 
 
-async def process_utterance(session_id: str):
+async def _track_tokens(tokens, turn: Turn):
+    """Record streamed response text on the turn as it passes through"""
+    try:
+        async for token in tokens:
+            turn.tokens += 1
+            turn.generated_text += token
+            yield token
+    finally:
+        await tokens.aclose()
+
+
+async def process_utterance(session_id: str, turn: Optional[Turn] = None):
     """
     Process a complete user utterance.
     
     Args:
         session_id: Session identifier
+        turn: Progress record of this response, kept by the session's TurnManager
     """
     if session_id not in active_conversations:
         logger.warning(f"Session {session_id} not found for utterance processing")
@@ -74,24 +125,44 @@ async def process_utterance(session_id: str):
     if "history" not in conversation:
         conversation["history"] = []
     
+    # Prior turns only; generate_response appends the current query itself
+    prior_history = history_manager.build(session_id, conversation["history"])
     conversation["history"].append({"role": "user", "content": transcription})
     
-    # Generate AI response
-    response = await generate_response(
+    # Speak the response sentence by sentence while it is still being generated
+    turn = turn or Turn()
+    metrics = PipelineMetrics()
+    tokens = stream_response(
         query=transcription,
-        conversation_history=conversation["history"],
+        conversation_history=prior_history,
         session_id=session_id
     )
+    sentences = synthesize_stream(
+        _track_tokens(tokens, turn),
+        synthesize_pcm,
+        max_concurrency=settings.VOICE_TTS_CONCURRENCY,
+        max_sentence_chars=settings.VOICE_SENTENCE_MAX_CHARS,
+        metrics=metrics
+    )
+    try:
+        async for sentence in sentences:
+            turn.audio_bytes_synthesized += len(sentence.audio)
+            # Send the audio response back through LiveKit
+            if sentence.audio and "response_callback" in conversation:
+                await conversation["response_callback"](sentence.text, sentence.audio, session_id)
+            turn.spoken.append(sentence.text)
+            turn.audio_bytes_sent += len(sentence.audio)
+    finally:
+        await sentences.aclose()
+        # Only what reached the user belongs in the history, even after a barge-in
+        if turn.spoken:
+            conversation["history"].append({"role": "assistant", "content": turn.spoken_text})
     
-    # Add to conversation history
-    conversation["history"].append({"role": "assistant", "content": response})
-    
-    # Convert to speech
-    audio_bytes, sample_rate = await text_to_speech(response)
-    
-    # Send the audio response back through LiveKit
-    if "response_callback" in conversation:
-        await conversation["response_callback"](response, audio_bytes, session_id)
+    conversation["last_turn_metrics"] = metrics.as_dict()
+    logger.info(
+        f"Voice turn for session {session_id}: first audio after {metrics.first_audio_ms or 0:.0f} ms, "
+        f"{metrics.sentences} sentences in {metrics.total_ms:.0f} ms"
+    )
 
 
 async def initialize_voice_agent(
@@ -109,6 +180,9 @@ async def initialize_voice_agent(
         
     Returns:
         Session information including session_id, room_name, and token
+        
+    Raises:
+        RuntimeError: If the agent could not join the room; nothing is left running
     """
     # Generate a session ID
     session_id = str(uuid.uuid4())
@@ -127,22 +201,38 @@ async def initialize_voice_agent(
         metadata={"session_id": session_id}
     )
     
-    # Store the conversation context
+    # One streaming transcription session for the whole conversation
+    stt = create_stt_session(settings.STT_PROVIDER, settings.AUDIO_SAMPLE_RATE)
+    await stt.start()
+    
+    # Store the conversation context before any audio can arrive for it
     active_conversations[session_id] = {
         "user_id": user_id,
         "room_name": room_name,
         "history": [],
         "transcription_buffer": "",
-        "response_callback": response_callback
+        "response_callback": response_callback,
+        "stt": stt,
+        "stt_task": asyncio.ensure_future(consume_transcripts(session_id, stt)),
+        "turns": TurnManager(session_id, flush_audio=lambda: flush_room_audio(session_id))
     }
     
     # Set up the audio processor
-    await setup_audio_processor(
-        session_id=session_id,
-        room_name=room_name,
-        transcription_callback=handle_transcription,
-        response_callback=response_callback
-    )
+    try:
+        ready = await setup_audio_processor(
+            session_id=session_id,
+            room_name=room_name,
+            transcription_callback=handle_transcription,
+            response_callback=response_callback,
+            end_of_utterance_callback=handle_end_of_utterance
+        )
+    except Exception:
+        await _close_conversation(session_id, active_conversations.pop(session_id))
+        raise
+    
+    if not ready:
+        await _close_conversation(session_id, active_conversations.pop(session_id))
+        raise RuntimeError(f"Failed to set up the audio processor for room {room_name}")
     
     return {
         "session_id": session_id,
@@ -159,12 +249,31 @@ async def terminate_voice_agent(session_id: str) -> bool:
         session_id: Session identifier
         
     Returns:
-        True if successful, False otherwise
+        True if the LiveKit session was closed, False otherwise
     """
     success = await close_session(session_id)
     
-    if success and session_id in active_conversations:
-        del active_conversations[session_id]
-        return True
+    # Tear down our side even if LiveKit had already dropped the session
+    conversation = active_conversations.pop(session_id, None)
+    if conversation is not None:
+        await _close_conversation(session_id, conversation)
     
-    return False
+    return success
+
+
+async def _close_conversation(session_id: str, conversation: Dict[str, Any]):
+    """
+    Stop a conversation's turns and transcription and forget its history.
+    
+    Args:
+        session_id: Session identifier
+        conversation: The conversation removed from active_conversations
+    """
+    await conversation["turns"].close()
+    logger.info(f"Barge-in stats for session {session_id}: {conversation['turns'].stats.as_dict()}")
+    try:
+        await conversation["stt"].finish()
+    except Exception as e:
+        logger.error(f"Error closing transcription for session {session_id}: {str(e)}")
+    conversation["stt_task"].cancel()
+    history_manager.forget(session_id)
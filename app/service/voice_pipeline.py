@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Synthesizes one sentence, returning (audio bytes, sample rate)
+Synthesizer = Callable[[str], Awaitable[Tuple[bytes, int]]]
+
+# End of a sentence: terminal punctuation (plus closing quotes/brackets) followed by whitespace
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+# Words whose trailing period does not end a sentence
+ABBREVIATIONS = frozenset(["mr.", "mrs.", "ms.", "dr.", "prof.", "sr.", "jr.", "st.", "vs.", "etc.", "e.g.", "i.e.", "approx."])
+
+
+class SentenceSegmenter:
+    """
+    Groups streamed LLM tokens into sentences for speech synthesis.
+
+    A sentence is released as soon as its terminator and the following
+    whitespace arrive. A sentence still running at ``max_chars`` is cut at
+    the last comma or space, so a long sentence cannot hold back audio.
+    """
+
+    def __init__(self, max_chars: int = 200):
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        """Add streamed text and return the sentences it completes"""
+        self._buffer += token
+        sentences = []
+        search_from = 0
+        while True:
+            match = SENTENCE_END.search(self._buffer, search_from)
+            if match is None:
+                break
+            candidate = self._buffer[:match.start() + 1].strip()
+            last_word = candidate.rsplit(None, 1)[-1].lower() if candidate else ""
+            if last_word in ABBREVIATIONS:
+                search_from = match.end()
+                continue
+            if candidate:
+                sentences.append(self._buffer[:match.end()].strip())
+            self._buffer = self._buffer[match.end():]
+            search_from = 0
+
+        while len(self._buffer) > self.max_chars:
+            window = self._buffer[:self.max_chars]
+            cut = window.rfind(", ") + 1 or window.rfind(" ")
+            if cut <= 0:
+                cut = self.max_chars
+            sentences.append(self._buffer[:cut].strip())
+            self._buffer = self._buffer[cut:].lstrip()
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream ends"""
+        remainder, self._buffer = self._buffer.strip(), ""
+        return remainder or None
+
+
+@dataclass
+class SynthesizedSentence:
+    index: int
+    text: str
+    audio: bytes
+    sample_rate: int
+
+
+@dataclass
+class PipelineMetrics:
+    """Latency of one voice response, in milliseconds from when it was requested"""
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_ms: Optional[float] = None
+    first_sentence_ms: Optional[float] = None
+    first_audio_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    sentences: int = 0
+
+    def mark(self, name: str) -> None:
+        if getattr(self, name) is None:
+            setattr(self, name, (time.perf_counter() - self.started_at) * 1000)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "first_token_ms": self.first_token_ms,
+            "first_sentence_ms": self.first_sentence_ms,
+            "first_audio_ms": self.first_audio_ms,
+            "total_ms": self.total_ms,
+            "sentences": self.sentences
+        }
+
+
+async def synthesize_stream(
+    tokens: AsyncIterator[str],
+    synthesize: Synthesizer,
+    max_concurrency: int = 2,
+    max_sentence_chars: int = 200,
+    metrics: Optional[PipelineMetrics] = None
+) -> AsyncIterator[SynthesizedSentence]:
+    """
+    Turn a stream of LLM tokens into audio, sentence by sentence.
+
+    Sentences are synthesized as soon as they are complete, up to
+    ``max_concurrency`` at a time, while the LLM keeps streaming. Audio is
+    yielded strictly in sentence order, so the first sentence can be
+    played while later ones are still being generated. Closing the
+    generator cancels the token stream and any synthesis in flight.
+
+    Args:
+        tokens: Streamed response text
+        synthesize: Text-to-speech for one sentence
+        max_concurrency: Sentences synthesized at the same time
+        max_sentence_chars: Longest text sent to TTS in one piece
+        metrics: Optional latency metrics to fill in
+
+    Yields:
+        Synthesized sentences in order
+    """
+    metrics = metrics or PipelineMetrics()
+    segmenter = SentenceSegmenter(max_sentence_chars)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    pending: asyncio.Queue = asyncio.Queue()
+
+    async def synthesize_one(index: int, text: str) -> SynthesizedSentence:
+        async with semaphore:
+            audio, sample_rate = await synthesize(text)
+        return SynthesizedSentence(index, text, audio, sample_rate)
+
+    def schedule(text: str) -> None:
+        metrics.mark("first_sentence_ms")
+        pending.put_nowait(asyncio.ensure_future(synthesize_one(metrics.sentences, text)))
+        metrics.sentences += 1
+
+    async def produce() -> None:
+        try:
+            async for token in tokens:
+                metrics.mark("first_token_ms")
+                for sentence in segmenter.feed(token):
+                    schedule(sentence)
+            remainder = segmenter.flush()
+            if remainder:
+                schedule(remainder)
+        finally:
+            pending.put_nowait(None)
+            # Stop the LLM stream right away when cancelled rather than at garbage collection
+            aclose = getattr(tokens, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            task = await pending.get()
+            if task is None:
+                break
+            try:
+                sentence = await task
+            except Exception as e:
+                logger.error(f"Error synthesizing sentence: {str(e)}")
+                continue
+            if sentence.audio:
+                metrics.mark("first_audio_ms")
+            yield sentence
+        # Surface a failure of the token stream itself
+        await producer
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            task = pending.get_nowait()
+            if task is not None:
+                task.cancel()
+        metrics.mark("total_ms")
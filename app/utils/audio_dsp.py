@@ -0,0 +1,185 @@
+from math import gcd
+from typing import Optional
+
+import numpy as np
+from scipy import signal
+
+# Full scale of 16-bit PCM
+INT16_SCALE = 32768.0
+
+
+def int16_to_float32(samples: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Scale 16-bit PCM samples to float32 in [-1, 1).
+
+    Args:
+        samples: int16 samples
+        out: Optional float32 array of the same shape to write into
+
+    Returns:
+        The float samples (``out`` when given)
+    """
+    return np.multiply(samples, np.float32(1 / INT16_SCALE), out=out, dtype=np.float32)
+
+
+def float32_to_int16(
+    samples: np.ndarray,
+    out: Optional[np.ndarray] = None,
+    scratch: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Scale float samples to 16-bit PCM, clipping anything outside [-1, 1).
+
+    Args:
+        samples: Float samples
+        out: Optional int16 array of the same shape to write into
+        scratch: Optional float32 work array of the same shape; pass ``samples``
+            itself to convert without allocating, at the cost of overwriting it
+
+    Returns:
+        The int16 samples (``out`` when given)
+    """
+    scaled = np.multiply(samples, np.float32(INT16_SCALE), out=scratch, dtype=np.float32)
+    np.clip(scaled, -INT16_SCALE, INT16_SCALE - 1, out=scaled)
+    if out is None:
+        return scaled.astype(np.int16)
+    np.copyto(out, scaled, casting="unsafe")
+    return out
+
+
+def _saturate_int16(values: np.ndarray) -> np.ndarray:
+    """Clip float values already at int16 scale to its range, in place, and convert"""
+    np.clip(values, -INT16_SCALE, INT16_SCALE - 1, out=values)
+    return values.astype(np.int16)
+
+
+def to_mono(samples: np.ndarray, channels: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Mix interleaved channels down to one by averaging them.
+
+    Mono input is returned unchanged without copying.
+
+    Args:
+        samples: Interleaved samples
+        channels: Number of interleaved channels
+        out: Optional array of ``len(samples) // channels`` samples to write into
+
+    Returns:
+        The mono samples, in the input dtype
+    """
+    if channels <= 1:
+        return samples
+    frames = samples.reshape(-1, channels)
+    if out is None:
+        out = np.empty(len(frames), dtype=samples.dtype)
+    if np.issubdtype(samples.dtype, np.integer):
+        # Sum in a wider type so loud channels do not overflow before dividing
+        np.floor_divide(frames.sum(axis=1, dtype=np.int32), channels, out=out, casting="unsafe")
+    else:
+        np.mean(frames, axis=1, out=out)
+    return out
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    Resample a complete mono signal with a polyphase anti-aliasing filter.
+
+    Suited to whole utterances; use StreamResampler for audio that arrives
+    in consecutive blocks, which this would filter with audible seams.
+
+    Args:
+        samples: int16 or float samples
+        from_rate: Sample rate of ``samples``
+        to_rate: Sample rate wanted
+
+    Returns:
+        The resampled signal in the input dtype; same-rate input is returned unchanged
+    """
+    if from_rate == to_rate or not len(samples):
+        return samples
+    divisor = gcd(from_rate, to_rate)
+    resampled = signal.resample_poly(samples.astype(np.float32, copy=False), to_rate // divisor, from_rate // divisor)
+    if samples.dtype == np.int16:
+        return _saturate_int16(resampled)
+    return resampled.astype(samples.dtype, copy=False)
+
+
+class StreamResampler:
+    """
+    Resamples a block-by-block mono stream with a stateful FIR filter.
+
+    Filter state and the decimation phase carry over between calls, so
+    the output equals resampling the whole stream at once, delayed by
+    half the filter length. Cost grows with the upsampling factor, so it
+    is meant for small ratios such as 48 kHz to 16 kHz.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, taps_per_phase: int = 16):
+        divisor = gcd(from_rate, to_rate)
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        self.up = to_rate // divisor
+        self.down = from_rate // divisor
+        factor = max(self.up, self.down)
+        self._taps = (signal.firwin(taps_per_phase * factor + 1, 1 / factor) * self.up).astype(np.float32)
+        self._state = np.zeros(len(self._taps) - 1, dtype=np.float32)
+        self._phase = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next block of int16 samples"""
+        if self.up == self.down:
+            return samples
+        upsampled = np.zeros(len(samples) * self.up, dtype=np.float32)
+        upsampled[::self.up] = samples
+        filtered, self._state = signal.lfilter(self._taps, 1.0, upsampled, zi=self._state)
+        output = filtered[self._phase::self.down]
+        # Keep every down-th sample of the whole stream, not of each block
+        self._phase = (self._phase - len(upsampled)) % self.down
+        return _saturate_int16(output)
+
+
+def rms_dbfs(samples: np.ndarray) -> float:
+    """Level of int16 samples in dB relative to full scale; -inf for silence"""
+    if not len(samples):
+        return float("-inf")
+    rms = np.sqrt(np.mean(np.square(samples, dtype=np.float32)))
+    return float(20 * np.log10(rms / INT16_SCALE)) if rms > 0 else float("-inf")
+
+
+def apply_gain(samples: np.ndarray, gain: float) -> np.ndarray:
+    """
+    Scale samples by ``gain`` in place, saturating int16 at full scale.
+
+    Returns:
+        ``samples``
+    """
+    if samples.dtype == np.int16:
+        scaled = np.multiply(samples, np.float32(gain), dtype=np.float32)
+        np.clip(scaled, -INT16_SCALE, INT16_SCALE - 1, out=scaled)
+        np.copyto(samples, scaled, casting="unsafe")
+    else:
+        np.multiply(samples, gain, out=samples, casting="unsafe")
+    return samples
+
+
+def normalize_gain(samples: np.ndarray, target_dbfs: float = -20.0, max_gain_db: float = 20.0) -> float:
+    """
+    Bring int16 samples to a target RMS level in place.
+
+    Gain is capped at ``max_gain_db`` so near-silence is not blown up
+    into noise. Silent input is left untouched.
+
+    Args:
+        samples: int16 samples, modified in place
+        target_dbfs: RMS level wanted
+        max_gain_db: Largest boost applied
+
+    Returns:
+        The gain applied, in dB
+    """
+    level = rms_dbfs(samples)
+    if level == float("-inf"):
+        return 0.0
+    gain_db = min(target_dbfs - level, max_gain_db)
+    apply_gain(samples, 10 ** (gain_db / 20))
+    return gain_db
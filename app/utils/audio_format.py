@@ -0,0 +1,120 @@
+import io
+import logging
+import wave
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import soundfile as sf
+
+from app.utils.audio_dsp import float32_to_int16, resample, to_mono
+
+logger = logging.getLogger(__name__)
+
+PCMData = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+def is_wav(data: bytes) -> bool:
+    """Whether the bytes start with a RIFF/WAVE header"""
+    return len(data) >= 12 and data[:4] == b"RIFF" and data[8:12] == b"WAVE"
+
+
+def pcm_to_wav_bytes(pcm: PCMData, sample_rate: int, channels: int = 1) -> bytes:
+    """
+    Frame 16-bit PCM as a WAV file in memory.
+
+    Args:
+        pcm: Interleaved 16-bit samples, as bytes or an int16 array
+        sample_rate: Sample rate in Hz
+        channels: Number of interleaved channels
+
+    Returns:
+        The WAV file bytes
+    """
+    if isinstance(pcm, np.ndarray):
+        pcm = pcm.astype(np.int16, copy=False).tobytes()
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def read_wav_bytes(data: bytes) -> Tuple[np.ndarray, int, int]:
+    """
+    Read an integer-PCM WAV file from memory.
+
+    Returns:
+        Tuple of interleaved int16 samples, sample rate and channel count
+
+    Raises:
+        wave.Error: If the data is not an integer-PCM WAV file (e.g. float WAV)
+    """
+    with wave.open(io.BytesIO(data), "rb") as wav:
+        width = wav.getsampwidth()
+        frames = wav.readframes(wav.getnframes())
+        sample_rate, channels = wav.getframerate(), wav.getnchannels()
+
+    if width == 2:
+        samples = np.frombuffer(frames, dtype=np.int16)
+    elif width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif width == 4:
+        samples = (np.frombuffer(frames, dtype=np.int32) >> 16).astype(np.int16)
+    else:
+        raise wave.Error(f"Unsupported WAV sample width: {width} bytes")
+    return samples, sample_rate, channels
+
+
+def decode_audio(data: bytes) -> Tuple[np.ndarray, int, int]:
+    """
+    Decode an audio file from memory to 16-bit PCM.
+
+    WAV is parsed directly and formats libsndfile understands (FLAC, OGG,
+    float WAV, ...) are decoded in-process. Only other containers such as
+    MP3 or WebM fall back to pydub, which spawns ffmpeg.
+
+    Returns:
+        Tuple of interleaved int16 samples, sample rate and channel count
+    """
+    if is_wav(data):
+        try:
+            return read_wav_bytes(data)
+        except (wave.Error, EOFError):
+            pass
+
+    try:
+        # Read as float: libsndfile does not rescale float files when reading integers
+        samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+        return float32_to_int16(samples.reshape(-1)), sample_rate, samples.shape[1]
+    except RuntimeError:
+        pass
+
+    from pydub import AudioSegment
+    logger.debug("Decoding audio container with ffmpeg")
+    segment = AudioSegment.from_file(io.BytesIO(data)).set_sample_width(2)
+    return np.frombuffer(segment.raw_data, dtype=np.int16), segment.frame_rate, segment.channels
+
+
+def to_wav_bytes(data: bytes, sample_rate: Optional[int] = None, target_rate: Optional[int] = None) -> bytes:
+    """
+    Get WAV bytes for audio in any supported format.
+
+    Args:
+        data: An audio file, or headerless 16-bit mono PCM when ``sample_rate`` is given
+        sample_rate: Sample rate of headerless PCM input
+        target_rate: If given, decoded audio is mixed to mono and resampled to this rate
+
+    Returns:
+        WAV file bytes; WAV input is returned unchanged
+    """
+    if sample_rate is not None:
+        return pcm_to_wav_bytes(data, sample_rate)
+    if is_wav(data):
+        return data
+    samples, rate, channels = decode_audio(data)
+    if target_rate is not None:
+        samples = resample(to_mono(samples, channels), rate, target_rate)
+        rate, channels = target_rate, 1
+    return pcm_to_wav_bytes(samples, rate, channels)
@@ -0,0 +1,322 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CacheUnavailableError(Exception):
+    """Raised by a backend that is skipping calls because it is known to be down"""
+
+
+class CacheStats:
+    """Hit/miss counters for a cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.errors = 0
+        self.skipped = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "sets": self.sets,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "hit_rate": round(self.hit_rate, 4)
+        }
+
+
+class BaseCache(ABC):
+    """
+    Async string cache with TTL support and hit/miss metrics.
+
+    Subclasses implement ``_get``, ``_set`` and ``_delete``; the public methods
+    record stats and never raise, so a broken cache only costs a miss.
+    """
+
+    def __init__(self, name: str, default_ttl: Optional[int] = None):
+        self.name = name
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            value = await self._get(key)
+        except CacheUnavailableError:
+            self.stats.skipped += 1
+            value = None
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"[{self.name}] Cache get failed: {str(e)}")
+            value = None
+
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[int] = None) -> bool:
+        try:
+            await self._set(key, value, ttl if ttl is not None else self.default_ttl)
+            self.stats.sets += 1
+            return True
+        except CacheUnavailableError:
+            self.stats.skipped += 1
+            return False
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"[{self.name}] Cache set failed: {str(e)}")
+            return False
+
+    async def delete(self, key: str) -> bool:
+        try:
+            return await self._delete(key)
+        except CacheUnavailableError:
+            self.stats.skipped += 1
+            return False
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning(f"[{self.name}] Cache delete failed: {str(e)}")
+            return False
+
+    def stats_dict(self) -> Dict[str, Any]:
+        return self.stats.as_dict()
+
+    @abstractmethod
+    async def _get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def _set(self, key: str, value: str, ttl: Optional[int]) -> None:
+        ...
+
+    @abstractmethod
+    async def _delete(self, key: str) -> bool:
+        ...
+
+
+class MemoryCache(BaseCache):
+    """In-process LRU cache with per-entry expiry"""
+
+    def __init__(self, name: str, max_entries: int = 1000, default_ttl: Optional[int] = None):
+        super().__init__(name, default_ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], str]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def _get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def _set(self, key: str, value: str, ttl: Optional[int]) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _delete(self, key: str) -> bool:
+        return self._entries.pop(key, None) is not None
+
+
+class CircuitBreaker:
+    """
+    Stops calling a dependency for ``cooldown`` seconds after it fails.
+
+    Until a call has succeeded (at startup, or after a cooldown) only one
+    probe call is let through at a time, so an outage costs one slow call
+    per cooldown rather than one per request.
+    """
+
+    def __init__(self, cooldown: float = 30.0):
+        self.cooldown = cooldown
+        self._healthy = False
+        self._probing = False
+        self._open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    def allow(self) -> bool:
+        if self._healthy:
+            return True
+        if self.is_open or self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def release(self) -> None:
+        """Let another probe through after one ended without an outcome"""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self._healthy = True
+        self._probing = False
+        self._open_until = 0.0
+
+    def record_failure(self) -> None:
+        self._healthy = False
+        self._probing = False
+        self._open_until = time.monotonic() + self.cooldown
+
+
+class RedisCache(BaseCache):
+    """
+    Cache shared across workers, stored in Redis with native TTLs.
+
+    Connecting and every command run in a worker thread, bounded by
+    ``timeout``, so a slow or unreachable Redis never blocks the event
+    loop. After a failure the circuit breaker skips Redis for a while and
+    calls degrade to misses.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prefix: str,
+        default_ttl: Optional[int] = None,
+        timeout: float = 2.0,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        super().__init__(name, default_ttl)
+        self.prefix = prefix
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def _call(self, command: Callable[[Any], Any]) -> Any:
+        """Run ``command`` on the Redis client in a thread, through the circuit breaker"""
+        if not self.breaker.allow():
+            raise CacheUnavailableError(f"{self.name} is unavailable")
+
+        def run():
+            from app.service.redis_service import RedisService
+            return command(RedisService.get_instance())
+
+        try:
+            result = await asyncio.wait_for(asyncio.to_thread(run), self.timeout)
+        except asyncio.CancelledError:
+            # The caller gave up; that says nothing about Redis
+            self.breaker.release()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def _get(self, key: str) -> Optional[str]:
+        return await self._call(lambda client: client.get(self._key(key)))
+
+    async def _set(self, key: str, value: str, ttl: Optional[int]) -> None:
+        if ttl:
+            await self._call(lambda client: client.setex(self._key(key), ttl, value))
+        else:
+            await self._call(lambda client: client.set(self._key(key), value))
+
+    async def _delete(self, key: str) -> bool:
+        return bool(await self._call(lambda client: client.delete(self._key(key))))
+
+
+class TieredCache(BaseCache):
+    """
+    Two-level cache: a process-local memory tier in front of a shared tier.
+
+    Reads try memory first and backfill it on a shared-tier hit; writes go to
+    both tiers. The memory tier keeps its own (usually shorter) TTL.
+    """
+
+    def __init__(self, name: str, memory: MemoryCache, shared: BaseCache, default_ttl: Optional[int] = None):
+        super().__init__(name, default_ttl)
+        self.memory = memory
+        self.shared = shared
+
+    def stats_dict(self) -> Dict[str, Any]:
+        stats = self.stats.as_dict()
+        stats["tiers"] = {"memory": self.memory.stats_dict(), "shared": self.shared.stats_dict()}
+        return stats
+
+    async def _get(self, key: str) -> Optional[str]:
+        value = await self.memory.get(key)
+        if value is not None:
+            return value
+        value = await self.shared.get(key)
+        if value is not None:
+            await self.memory.set(key, value)
+        return value
+
+    async def _set(self, key: str, value: str, ttl: Optional[int]) -> None:
+        memory_ttl = self.memory.default_ttl
+        if ttl and (not memory_ttl or ttl < memory_ttl):
+            memory_ttl = ttl
+        await self.memory.set(key, value, ttl=memory_ttl)
+        await self.shared.set(key, value, ttl=ttl)
+
+    async def _delete(self, key: str) -> bool:
+        in_memory = await self.memory.delete(key)
+        in_shared = await self.shared.delete(key)
+        return in_memory or in_shared
+
+
+def create_cache(
+    backend: str,
+    name: str,
+    prefix: str,
+    default_ttl: Optional[int] = None,
+    max_entries: int = 1000
+) -> Optional[BaseCache]:
+    """
+    Create a cache for the configured backend.
+
+    Args:
+        backend: "memory", "redis", "tiered" (memory in front of Redis) or "none"
+        name: Name used in logs and metrics
+        prefix: Redis key prefix
+        default_ttl: Expiry in seconds applied when ``set`` gets no TTL
+        max_entries: Capacity of the in-memory backend
+
+    Returns:
+        The cache, or None when caching is disabled
+    """
+    backend = (backend or "none").lower()
+    if backend == "memory":
+        return MemoryCache(name, max_entries=max_entries, default_ttl=default_ttl)
+    if backend == "redis":
+        return RedisCache(name, prefix=prefix, default_ttl=default_ttl)
+    if backend == "tiered":
+        return TieredCache(
+            name,
+            memory=MemoryCache(f"{name}:memory", max_entries=max_entries, default_ttl=default_ttl),
+            shared=RedisCache(f"{name}:redis", prefix=prefix, default_ttl=default_ttl),
+            default_ttl=default_ttl
+        )
+    if backend != "none":
+        logger.warning(f"Unknown cache backend '{backend}' for {name}, caching disabled")
+    return None
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or its encoding files unavailable
+    _encoding = None
+
+# Fixed per-message overhead for role and separators in chat formats
+MESSAGE_OVERHEAD_TOKENS = 4
+
+Summarizer = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count tokens in text.
+
+    Uses tiktoken's cl100k encoding when available and falls back to a
+    four-characters-per-token estimate otherwise.
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+
+def count_message_tokens(message: Dict[str, str]) -> int:
+    """Count tokens for a single chat message including its overhead"""
+    return count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+def build_summary_prompt(previous_summary: str, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Build the chat messages asking an LLM to fold older turns into a rolling summary.
+
+    Args:
+        previous_summary: Summary of turns folded in earlier (may be empty)
+        messages: Turns to fold into the summary
+
+    Returns:
+        Chat messages for the summarization call
+    """
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    content = (
+        "Update the running summary of this conversation with the new turns. "
+        "Keep names, decisions, open questions and facts the user shared. "
+        "Reply with the summary only, in at most 200 words.\n\n"
+        f"Current summary:\n{previous_summary or '(none)'}\n\n"
+        f"New turns:\n{transcript}"
+    )
+    return [{"role": "user", "content": content}]
+
+
+class ConversationHistoryManager:
+    """
+    Keeps the prompt history for a conversation within a token budget.
+
+    The most recent messages are kept verbatim; anything older is replaced by
+    a rolling summary. Summaries are regenerated in background tasks, so a turn
+    never waits on summarization; until a refresh lands, the previous summary
+    is used.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        recent_messages: int = 8,
+        summarizer: Optional[Summarizer] = None,
+        max_conversations: int = 10000,
+    ):
+        self.max_tokens = max_tokens
+        self.recent_messages = recent_messages
+        self.summarizer = summarizer
+        self.max_conversations = max_conversations
+        # conversation key -> (number of leading messages covered, summary text)
+        self._summaries: "OrderedDict[str, Tuple[int, str]]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def build(self, key: str, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Build the bounded history to send with the next completion.
+
+        Args:
+            key: Identifies the conversation (e.g. session id)
+            messages: Full conversation history, oldest first
+
+        Returns:
+            An optional summary system message followed by the recent window
+        """
+        window_start = self._window_start(messages)
+        window = messages[window_start:]
+        if window_start == 0:
+            return list(window)
+
+        covered, summary = self._summaries.get(key, (0, ""))
+        if key in self._summaries:
+            self._summaries.move_to_end(key)
+        if covered < window_start:
+            self._schedule_refresh(key, messages[:window_start])
+
+        if not summary:
+            return list(window)
+        return [{"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}] + window
+
+    def forget(self, key: str) -> None:
+        """Drop the cached summary for a conversation"""
+        self._summaries.pop(key, None)
+        task = self._refreshing.pop(key, None)
+        if task:
+            task.cancel()
+
+    def _window_start(self, messages: List[Dict[str, str]]) -> int:
+        """Index of the oldest message kept verbatim"""
+        # Reserve room for the summary so the whole prompt stays in budget
+        budget = self.max_tokens - (self.max_tokens // 5 if len(messages) > self.recent_messages else 0)
+        used = 0
+        start = len(messages)
+        while start > 0 and len(messages) - start < self.recent_messages:
+            tokens = count_message_tokens(messages[start - 1])
+            # Always keep the newest message, even if it alone exceeds the budget
+            if used + tokens > budget and start < len(messages):
+                break
+            used += tokens
+            start -= 1
+        return start
+
+    def _schedule_refresh(self, key: str, older: List[Dict[str, str]]) -> None:
+        """Fold messages that left the window into the summary off the hot path"""
+        if self.summarizer is None or key in self._refreshing:
+            return
+        try:
+            task = asyncio.get_running_loop().create_task(self._refresh(key, list(older)))
+        except RuntimeError:
+            return  # No running loop; summaries only refresh from async callers
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: str, older: List[Dict[str, str]]) -> None:
+        covered, summary = self._summaries.get(key, (0, ""))
+        new_messages = older[covered:]
+        if not new_messages:
+            return
+        try:
+            updated = await self.summarizer(summary, new_messages)
+        except Exception as e:
+            logger.warning(f"Failed to refresh conversation summary for {key}: {str(e)}")
+            return
+        if updated:
+            self._summaries[key] = (len(older), updated.strip())
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.max_conversations:
+                self._summaries.popitem(last=False)
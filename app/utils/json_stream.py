@@ -0,0 +1,95 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JSONArrayItemExtractor:
+    """
+    Pull completed items out of a JSON object while it is still streaming.
+
+    Feed text chunks as they arrive; every object inside one of the watched
+    top-level arrays (e.g. "nodes" or "connections") is returned as soon as
+    its closing brace is seen. Text before the first ``{`` (such as a code
+    fence) is ignored. Only structure is tracked, so each chunk is scanned
+    once and nothing is re-parsed.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = set(keys)
+        self._text = ""
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[str] = None
+        self._array_key: Optional[str] = None
+        self._item_start: Optional[int] = None
+        self._done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Consume the next chunk of streamed text.
+
+        Returns:
+            (array key, item) pairs for items completed by this chunk
+        """
+        items = []
+        offset = len(self._text)
+        self._text += chunk
+
+        for index, char in enumerate(chunk):
+            if self._done:
+                break
+            position = offset + index
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_start is not None:
+                        self._last_key = self._text[self._string_start:position]
+                        self._string_start = None
+                continue
+
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                # Top-level strings may be keys; remember where they start
+                self._string_start = position + 1 if self._depth == 1 else None
+            elif char in "{[":
+                if self._depth == 1 and char == "[":
+                    self._array_key = self._last_key if self._last_key in self.keys else None
+                elif self._depth == 2 and char == "{" and self._array_key:
+                    self._item_start = position
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 2 and char == "}" and self._item_start is not None:
+                    item = self._parse(self._text[self._item_start:position + 1])
+                    if item is not None:
+                        items.append((self._array_key, item))
+                    self._item_start = None
+                elif self._depth == 1:
+                    self._array_key = None
+                elif self._depth == 0:
+                    self._done = True
+
+        return items
+
+    @staticmethod
+    def _parse(fragment: str) -> Optional[Dict[str, Any]]:
+        try:
+            item = json.loads(fragment)
+        except ValueError as e:
+            logger.debug(f"Skipping unparseable streamed item: {str(e)}")
+            return None
+        return item if isinstance(item, dict) else None
@@ -0,0 +1,64 @@
+import re
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+KeywordTable = Iterable[Tuple[Hashable, float, Iterable[str]]]
+
+_SEPARATORS = re.compile(r"[\s\-_]+")
+
+
+def _normalize(phrase: str) -> str:
+    return _SEPARATORS.sub(" ", phrase.strip().lower())
+
+
+class KeywordMatcher:
+    """
+    Weighted multi-keyword classifier backed by a single compiled regex.
+
+    Every phrase from every label is folded into one alternation anchored on
+    word boundaries, so a query is scanned once no matter how many phrases
+    there are, and short keywords such as "er" only match whole words.
+    Spaces, hyphens and underscores inside a phrase are interchangeable, and
+    plural forms match too. Each match adds the phrase's weight to its
+    label; the highest total wins, with ties going to the label listed first.
+    Phrases that normalize to the same text count once per label, at their
+    highest weight.
+    """
+
+    def __init__(self, table: KeywordTable):
+        self._phrases: Dict[str, Dict[Hashable, float]] = defaultdict(dict)
+        self._priority: Dict[Hashable, int] = {}
+        for label, weight, phrases in table:
+            self._priority.setdefault(label, len(self._priority))
+            for phrase in phrases:
+                weights = self._phrases[_normalize(phrase)]
+                weights[label] = max(weight, weights.get(label, weight))
+
+        # Longest phrases first so "message queue" wins over "message" at the same position
+        alternatives = sorted(self._phrases, key=len, reverse=True)
+        pattern = "|".join(r"[\s\-_]+".join(map(re.escape, phrase.split())) for phrase in alternatives)
+        self._pattern = re.compile(rf"\b(?:{pattern})(?:e?s)?\b", re.IGNORECASE)
+
+    def _lookup(self, matched: str) -> Dict[Hashable, float]:
+        phrase = _normalize(matched)
+        if phrase in self._phrases:
+            return self._phrases[phrase]
+        for suffix in ("es", "s"):
+            if phrase.endswith(suffix) and phrase[:-len(suffix)] in self._phrases:
+                return self._phrases[phrase[:-len(suffix)]]
+        return {}
+
+    def scores(self, text: str) -> Dict[Hashable, float]:
+        """Total keyword weight per label found in the text"""
+        totals: Dict[Hashable, float] = defaultdict(float)
+        for match in self._pattern.finditer(text):
+            for label, weight in self._lookup(match.group()).items():
+                totals[label] += weight
+        return dict(totals)
+
+    def best(self, text: str, default: Optional[Hashable] = None) -> Optional[Hashable]:
+        """Label with the highest score, or ``default`` when nothing matches"""
+        totals = self.scores(text)
+        if not totals:
+            return default
+        return max(totals, key=lambda label: (totals[label], -self._priority[label]))
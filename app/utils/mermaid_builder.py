@@ -0,0 +1,153 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+# Node type -> (opening, closing) delimiters around the quoted label; anything else is a rectangle
+NODE_SHAPES: Dict[str, Tuple[str, str]] = {
+    **dict.fromkeys(["database", "db", "data_store", "storage", "persistence"], ('[("', '")]')),
+    **dict.fromkeys(["vector_db", "vector_database", "document_store"], ('[("', '")]')),
+    **dict.fromkeys(["agent", "worker", "processor", "consumer", "daemon"], ('{"', '"}')),
+    **dict.fromkeys(["processing", "function", "compute", "lambda", "serverless"], ('[["', '"]]')),
+}
+DEFAULT_SHAPE = ('["', '"]')
+
+# Node type -> default fill/stroke, applied when the diagram gives the node no style of its own
+TYPE_STYLES: Dict[str, str] = {
+    **dict.fromkeys(["ui", "frontend", "client", "web", "mobile"], "fill:#D4F1F9,stroke:#1E90FF"),
+    **dict.fromkeys(["database", "db", "data_store", "persistence"], "fill:#E1D5E7,stroke:#9673A6"),
+    **dict.fromkeys(["vector_db", "vector_database"], "fill:#DAE8FC,stroke:#6C8EBF"),
+    **dict.fromkeys(["api", "service", "microservice"], "fill:#F5F5F5,stroke:#666666"),
+    **dict.fromkeys(["llm", "model", "ml_model"], "fill:#FFE6CC,stroke:#D79B00"),
+    **dict.fromkeys(["queue", "message_broker", "event_bus"], "fill:#FFF2CC,stroke:#D6B656"),
+    **dict.fromkeys(["auth", "security"], "fill:#F8CECC,stroke:#B85450"),
+    "cache": "fill:#D5E8D4,stroke:#82B366",
+    **dict.fromkeys(["external", "third_party"], "fill:#F5F5F5,stroke:#666666"),
+}
+
+# Connection types drawn as dotted arrows; everything else is a solid arrow
+DOTTED_CONNECTIONS = frozenset(["response", "return", "callback", "data_flow", "etl", "stream", "batch"])
+
+TITLE_STYLE = "fill:#FFFFFF,stroke:#FFFFFF,color:#000000,font-size:16px"
+
+
+def _text(value: Any) -> str:
+    return value if isinstance(value, str) else ("" if value is None else str(value))
+
+
+@dataclass
+class ArchitectureNode:
+    id: str
+    label: str = ""
+    type: str = ""
+    technology: str = ""
+
+
+@dataclass
+class ArchitectureConnection:
+    source: str
+    target: str
+    label: str = ""
+    type: str = ""
+    protocol: str = ""
+
+
+@dataclass
+class ArchitectureCluster:
+    id: str
+    label: str = ""
+    nodes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ArchitectureGraph:
+    """Architecture diagram as returned by the LLM: nodes, connections, clusters and styles"""
+    title: str = "Architecture Diagram"
+    nodes: List[ArchitectureNode] = field(default_factory=list)
+    connections: List[ArchitectureConnection] = field(default_factory=list)
+    clusters: List[ArchitectureCluster] = field(default_factory=list)
+    styles: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ArchitectureGraph":
+        return cls(
+            title=_text(data.get("title", "Architecture Diagram")),
+            nodes=[
+                ArchitectureNode(
+                    id=_text(node.get("id")),
+                    label=_text(node.get("label")),
+                    type=_text(node.get("type")).lower(),
+                    technology=_text(node.get("technology"))
+                )
+                for node in data.get("nodes") or []
+            ],
+            connections=[
+                ArchitectureConnection(
+                    source=_text(connection.get("from")),
+                    target=_text(connection.get("to")),
+                    label=_text(connection.get("label")),
+                    type=_text(connection.get("type")).lower(),
+                    protocol=_text(connection.get("protocol"))
+                )
+                for connection in data.get("connections") or []
+            ],
+            clusters=[
+                ArchitectureCluster(
+                    id=_text(cluster.get("id")),
+                    label=_text(cluster.get("label")),
+                    nodes=[_text(node_id) for node_id in cluster.get("nodes") or []]
+                )
+                for cluster in data.get("clusters") or []
+            ],
+            styles=dict(data.get("styles") or {})
+        )
+
+
+class MermaidIdMap(dict):
+    """Memoized node ID normalization, so each distinct ID is rewritten once per render"""
+
+    def __missing__(self, node_id: str) -> str:
+        normalized = self[node_id] = node_id.replace("-", "_")
+        return normalized
+
+
+def render_mermaid(graph: ArchitectureGraph) -> str:
+    """
+    Render an architecture graph as a Mermaid flowchart.
+
+    Output is built as a list of lines joined once, with shapes and default
+    styles looked up in dispatch tables, so rendering is linear in the size of
+    the graph.
+    """
+    ids = MermaidIdMap()
+    lines = ["flowchart TD", f'    title["{graph.title}"]']
+    append = lines.append
+
+    for cluster in graph.clusters:
+        append(f'    subgraph {ids[cluster.id]}["{cluster.label}"]')
+        lines.extend(f"        {ids[node_id]}" for node_id in cluster.nodes)
+        append("    end")
+
+    for node in graph.nodes:
+        label = node.label
+        if node.technology and not label.endswith(f"({node.technology})"):
+            label = f"{label} ({node.technology})"
+        opening, closing = NODE_SHAPES.get(node.type, DEFAULT_SHAPE)
+        append(f"    {ids[node.id]}{opening}{label}{closing}")
+
+    for connection in graph.connections:
+        arrow = "-.->" if connection.type in DOTTED_CONNECTIONS else "-->"
+        append(f"    {ids[connection.source]} {arrow} {ids[connection.target]}")
+
+    for node_id, style in graph.styles.items():
+        append(f"    style {ids[node_id]} fill:{style.get('color', '#FFFFFF')},stroke:{style.get('border', '#000000')}")
+
+    for node in graph.nodes:
+        node_id = ids[node.id]
+        # Style keys are matched after normalization, as the diagram prompt asks for underscore IDs
+        if node_id not in graph.styles:
+            type_style = TYPE_STYLES.get(node.type)
+            if type_style:
+                append(f"    style {node_id} {type_style}")
+
+    append(f"    style title {TITLE_STYLE}")
+    lines.append("")
+    return "\n".join(lines)
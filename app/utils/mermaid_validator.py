@@ -0,0 +1,385 @@
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+DIAGRAM_HEADERS = (
+    "flowchart", "graph", "sequenceDiagram", "stateDiagram-v2", "stateDiagram",
+    "classDiagram", "erDiagram", "gantt", "mindmap", "pie", "journey", "timeline",
+    "gitGraph", "quadrantChart"
+)
+
+CODE_FENCE = re.compile(r"```[\w-]*\s*\n?(.*?)(?:\n?```|$)", re.DOTALL)
+
+# Flowchart node shapes: opening delimiter -> closing delimiter, longest openers first.
+# An opener may have several closers, e.g. [/ ... /] and the trapezoid [/ ... \]
+NODE_SHAPES = (
+    ("(((", ")))"), ("[[", "]]"), ("[(", ")]"), ("((", "))"), ("([", "])"), ("{{", "}}"),
+    ("[/", "/]"), ("[/", "\\]"), ("[\\", "\\]"), ("[\\", "/]"),
+    ("[", "]"), ("(", ")"), ("{", "}"), (">", "]"),
+)
+# Expanded node syntax, A@{ shape: rect, label: "..." }, passed through as-is
+SHAPE_DATA = "@{"
+
+# Links such as -->, ---, -.->, ==>, --o, <-->, with an optional |label| (which may follow a space)
+EDGE = re.compile(r"\s*(?:<?(?:-{2,}|={2,}|-\.+-?)[->ox]?|~~~)(?:\s*\|[^|]*\|)?\s*")
+# Links with inline text: A -- label --> B, A -. label .-> B, A == label ==> B
+TEXT_EDGE = re.compile(
+    r"\s*<?(?:--\s+[^|\n]+?\s+-{2,}[->ox]?|-\.\s+[^|\n]+?\s+\.-+[->ox]?|==\s+[^|\n]+?\s+={2,}[=>ox]?)\s*"
+)
+
+ID_CHARS = re.compile(r"[^\w]")
+# Characters that break the Mermaid parser inside an unquoted label
+LABEL_SPECIAL = re.compile(r"[()\[\]{}<>|\"';:#&%@]")
+RESERVED_IDS = {"end", "subgraph", "graph", "flowchart", "style", "class", "click", "default"}
+STATEMENT_KEYWORDS = ("style ", "classDef ", "class ", "click ", "linkStyle ", "direction ", "%%")
+
+
+def strip_code_fences(text: str) -> str:
+    """Return the diagram inside a Markdown code fence, or the text unchanged"""
+    match = CODE_FENCE.search(text)
+    return match.group(1).strip() if match else text.strip()
+
+
+def _header(line: str) -> Optional[str]:
+    for header in DIAGRAM_HEADERS:
+        if line == header or line.startswith(header + " ") or line.startswith(header + ";"):
+            return header
+    return None
+
+
+def _is_flowchart(syntax: str) -> bool:
+    first = syntax.lstrip().split("\n", 1)[0].strip()
+    return _header(first) in ("flowchart", "graph")
+
+
+def normalize_id(node_id: str) -> str:
+    """Make a node ID safe for Mermaid: word characters only, not a keyword, not starting with a digit"""
+    node_id = ID_CHARS.sub("_", node_id.strip())
+    if not node_id:
+        return "node"
+    if node_id.lower() in RESERVED_IDS:
+        return node_id + "_"
+    return node_id
+
+
+def quote_label(label: str) -> str:
+    """Quote a node label when it contains characters Mermaid would misparse"""
+    stripped = label.strip()
+    # Already quoted, possibly followed by the slash of a trapezoid-style closer
+    unslashed = stripped.rstrip("/\\")
+    if len(unslashed) >= 2 and unslashed[0] == '"' and unslashed[-1] == '"':
+        return label
+    if not LABEL_SPECIAL.search(stripped):
+        return label
+    return '"' + stripped.replace('"', "#quot;") + '"'
+
+
+def validate_mermaid(syntax: str) -> List[str]:
+    """
+    Check Mermaid syntax for the breakages LLM output commonly has.
+
+    Structural checks (header, code fences) apply to every diagram type;
+    flowcharts are additionally checked for subgraph/end balance, node IDs
+    and unquoted labels.
+
+    Returns:
+        Human-readable problems; empty when none were found
+    """
+    if not syntax or not syntax.strip():
+        return ["empty diagram"]
+
+    errors = []
+    if "```" in syntax:
+        errors.append("contains Markdown code fences")
+
+    lines = [line.strip() for line in strip_code_fences(syntax).split("\n")]
+    lines = [line for line in lines if line and not line.startswith("%%")]
+    if not lines or _header(lines[0]) is None:
+        errors.append("missing diagram type header")
+        return errors
+    if _header(lines[0]) not in ("flowchart", "graph"):
+        return errors
+
+    depth = 0
+    for number, line in enumerate(lines[1:], start=2):
+        if line.startswith("subgraph"):
+            depth += 1
+        elif line == "end":
+            depth -= 1
+            if depth < 0:
+                errors.append(f"line {number}: 'end' without matching subgraph")
+                depth = 0
+        elif not line.startswith(STATEMENT_KEYWORDS):
+            for node_id, label in _parse_nodes(line):
+                if normalize_id(node_id) != node_id:
+                    errors.append(f"line {number}: invalid node id '{node_id}'")
+                if label is not None and quote_label(label) != label:
+                    errors.append(f"line {number}: unquoted label with special characters '{label.strip()}'")
+    if depth > 0:
+        errors.append(f"{depth} subgraph(s) missing 'end'")
+    return errors
+
+
+def repair_mermaid(syntax: str) -> str:
+    """
+    Fix common breakages in generated Mermaid syntax.
+
+    Strips code fences and prose before the diagram header. For flowcharts it
+    also normalizes node IDs, quotes labels containing special characters and
+    balances subgraph/end blocks. Valid syntax comes back unchanged apart from
+    surrounding whitespace.
+    """
+    lines = strip_code_fences(syntax).split("\n")
+
+    # Drop any explanation the model put before the diagram
+    for index, line in enumerate(lines):
+        if _header(line.strip()):
+            lines = lines[index:]
+            break
+
+    if not lines or _header(lines[0].strip()) not in ("flowchart", "graph"):
+        return "\n".join(lines).strip()
+
+    repaired = [lines[0].rstrip()]
+    depth = 0
+    for line in lines[1:]:
+        stripped = line.strip()
+        indent = line[:len(line) - len(line.lstrip())]
+        if not stripped:
+            repaired.append("")
+        elif stripped.startswith("subgraph"):
+            depth += 1
+            repaired.append(line.rstrip())
+        elif stripped == "end":
+            # An 'end' closing nothing would end the whole diagram early
+            if depth > 0:
+                depth -= 1
+                repaired.append(line.rstrip())
+        elif stripped.startswith(("style ", "class ", "click ")):
+            keyword, _, rest = stripped.partition(" ")
+            targets, _, remainder = rest.partition(" ")
+            targets = ",".join(normalize_id(target) for target in targets.split(","))
+            repaired.append(f"{indent}{keyword} {targets} {remainder}".rstrip())
+        elif stripped.startswith(STATEMENT_KEYWORDS):
+            repaired.append(line.rstrip())
+        else:
+            repaired.append(indent + _repair_statement(stripped))
+    repaired.extend(["end"] * depth)
+    return "\n".join(repaired).strip()
+
+
+def _match_shape(line: str, position: int) -> Optional[Tuple[str, str]]:
+    for opener, closer in NODE_SHAPES:
+        if line.startswith(opener, position):
+            return opener, closer
+    return None
+
+
+def _match_node(line: str, position: int) -> Optional[Tuple[str, str, int]]:
+    """Shape of the node label opening at ``position`` and the index where its closer starts"""
+    fallback = None
+    for opener, closer in NODE_SHAPES:
+        if not line.startswith(opener, position):
+            continue
+        close = _find_close(line, position + len(opener), closer)
+        if close < len(line):
+            return opener, closer, close
+        if fallback is None:
+            fallback = (opener, closer, close)
+    return fallback
+
+
+def _find_shape_data(line: str, start: int) -> int:
+    """Index just past the '}' closing a ``@{...}`` block opening at ``start``, skipping quoted text"""
+    in_quote = False
+    for position in range(start + len(SHAPE_DATA), len(line)):
+        if line[position] == '"':
+            in_quote = not in_quote
+        elif line[position] == "}" and not in_quote:
+            return position + 1
+    return len(line)
+
+
+def _find_close(line: str, start: int, closer: str) -> int:
+    """Index of the closing delimiter of a node label starting at ``start``"""
+    if line.startswith('"', start):
+        quote_end = line.find('"', start + 1)
+        if quote_end != -1 and line.startswith(closer, quote_end + 1):
+            return quote_end + 1
+    position = line.find(closer, start)
+    while position != -1:
+        after = line[position + len(closer):]
+        # The real close is followed by whitespace, a link, a class, '&' or the end of the line
+        if not after or after[0] in " \t&;" or after.startswith(":::") or EDGE.match(after):
+            return position
+        position = line.find(closer, position + 1)
+    return len(line)
+
+
+def _scan(line: str) -> List[Tuple[str, str, Optional[Tuple[str, str, str]]]]:
+    """Split a flowchart statement into (kind, text, shape) tokens"""
+    tokens = []
+    position = 0
+    while position < len(line):
+        edge = TEXT_EDGE.match(line, position) or EDGE.match(line, position)
+        if edge and edge.end() > position and edge.group().strip():
+            tokens.append(("edge", edge.group(), None))
+            position = edge.end()
+            continue
+        if line[position] in " \t&;":
+            tokens.append(("text", line[position], None))
+            position += 1
+            continue
+        if line.startswith(":::", position):
+            end = position + 3
+            while end < len(line) and (line[end].isalnum() or line[end] in "_-"):
+                end += 1
+            tokens.append(("text", line[position:end], None))
+            position = end
+            continue
+
+        end = position
+        while end < len(line) and line[end] not in " \t&;" and not _match_shape(line, end):
+            if end > position and EDGE.match(line, end) and EDGE.match(line, end).group().strip():
+                break
+            if line.startswith((":::", SHAPE_DATA), end):
+                break
+            end += 1
+        if end == position:
+            # A label with no ID in front; keep it as-is
+            tokens.append(("text", line[position], None))
+            position += 1
+            continue
+
+        node_id = line[position:end]
+        if line.startswith(SHAPE_DATA, end):
+            close = _find_shape_data(line, end)
+            tokens.append(("node", node_id, None))
+            tokens.append(("text", line[end:close], None))
+            position = close
+            continue
+        shape = _match_node(line, end)
+        if shape:
+            opener, closer, close = shape
+            label_start = end + len(opener)
+            tokens.append(("node", node_id, (opener, line[label_start:close], closer)))
+            position = close + len(closer)
+        else:
+            tokens.append(("node", node_id, None))
+            position = end
+    return tokens
+
+
+def _parse_nodes(line: str) -> List[Tuple[str, Optional[str]]]:
+    return [(text, shape[1] if shape else None) for kind, text, shape in _scan(line) if kind == "node"]
+
+
+def _repair_statement(line: str) -> str:
+    parts = []
+    for kind, text, shape in _scan(line):
+        if kind != "node":
+            parts.append(text)
+        elif shape is None:
+            parts.append(normalize_id(text))
+        else:
+            opener, label, closer = shape
+            parts.append(f"{normalize_id(text)}{opener}{quote_label(label)}{closer}")
+    return "".join(parts)
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort repair of JSON produced by an LLM.
+
+    Extracts the outermost object or array from surrounding prose or code
+    fences, converts Python literals and smart quotes, drops trailing commas
+    and closes strings, arrays and objects left open by a truncated
+    completion.
+    """
+    text = strip_code_fences(text).replace("“", '"').replace("”", '"')
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if starts:
+        text = text[min(starts):]
+
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    position = 0
+    while position < len(text):
+        char = text[position]
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                out[-1] = "\\n"
+            position += 1
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            # Trailing comma before a close
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(char)
+            position += 1
+            if not stack:
+                break
+            continue
+        else:
+            for literal, replacement in (("True", "true"), ("False", "false"), ("None", "null")):
+                if text.startswith(literal, position) and not (out and (out[-1].isalnum() or out[-1] == "_")):
+                    out.append(replacement)
+                    position += len(literal)
+                    break
+            else:
+                out.append(char)
+                position += 1
+            continue
+        out.append(char)
+        position += 1
+
+    # Close whatever a truncated completion left open
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    repaired = "".join(out).rstrip()
+    if stack:
+        repaired = re.sub(r"[,:]\s*$", "", repaired)
+        if stack[-1] == "}":
+            # A key left without its value
+            repaired = re.sub(r'(?<=[{,])\s*"(?:[^"\\]|\\.)*"$', "", repaired)
+            repaired = re.sub(r",\s*$", "", repaired)
+        repaired += "".join(reversed(stack))
+    return repaired
+
+
+def parse_json(text: str) -> Tuple[Any, bool]:
+    """
+    Parse JSON from an LLM response, repairing it when needed.
+
+    Returns:
+        Tuple of the parsed value and whether a repair was needed
+
+    Raises:
+        ValueError: If the text cannot be parsed even after repair
+    """
+    candidate = strip_code_fences(text)
+    try:
+        return json.loads(candidate), False
+    except ValueError:
+        pass
+    return json.loads(repair_json(text)), True
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity FIFO of audio samples backed by one preallocated array.
+
+    Every sample is stored twice, at ``i`` and ``i + capacity``, so any
+    window of up to ``capacity`` samples is a contiguous slice: ``peek``
+    and ``read`` return numpy views without copying. A view stays valid
+    until that region is overwritten by later writes, so consumers that
+    keep audio past the next ``write`` must copy it. When a write does not
+    fit, the oldest samples are dropped and counted in ``overruns``.
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.overruns = 0
+        self._data = np.zeros(capacity * 2, dtype=dtype)
+        self._read = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        Append samples, dropping the oldest ones if the buffer is full.
+
+        Args:
+            samples: 1-D array of samples; converted to the buffer dtype on copy
+
+        Returns:
+            Number of samples dropped to make room
+        """
+        count = len(samples)
+        if count > self.capacity:
+            samples = samples[count - self.capacity:]
+            count = self.capacity
+        dropped = max(count - self.free, 0)
+        if dropped:
+            self.discard(dropped)
+            self.overruns += dropped
+
+        start = (self._read + self._size) % self.capacity
+        first = min(count, self.capacity - start)
+        for offset in (start, start + self.capacity):
+            self._data[offset:offset + first] = samples[:first]
+        if count > first:
+            rest = count - first
+            for offset in (0, self.capacity):
+                self._data[offset:offset + rest] = samples[first:]
+        self._size += count
+        return dropped
+
+    def peek(self, count: int, offset: int = 0) -> np.ndarray:
+        """Return a view of ``count`` samples starting ``offset`` samples after the oldest one"""
+        if offset < 0 or count < 0 or offset + count > self._size:
+            raise ValueError(f"Cannot peek {count} samples at {offset}; {self._size} buffered")
+        start = self._read + offset
+        return self._data[start:start + count]
+
+    def read(self, count: int) -> np.ndarray:
+        """Remove the ``count`` oldest samples and return a view of them"""
+        view = self.peek(count)
+        self.discard(count)
+        return view
+
+    def discard(self, count: int) -> None:
+        """Drop the ``count`` oldest samples"""
+        count = min(count, self._size)
+        self._read = (self._read + count) % self.capacity
+        self._size -= count
+
+    def clear(self) -> int:
+        """Drop everything buffered, returning the number of samples dropped"""
+        dropped = self._size
+        self._read = 0
+        self._size = 0
+        return dropped
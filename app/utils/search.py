@@ -15,6 +15,7 @@ import asyncio
 from functools import lru_cache
 from sentence_transformers import SentenceTransformer
 import torch
+from app.utils.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +48,8 @@ class QdrantSearch:
         
         self._init_search_params()
         self._init_payload_selector()
+        # Concurrent requests for the same text share one encode call
+        self._embedding_flight = SingleFlight("embedding")
         logger.info("QdrantSearch initialized with exact search for optimal results")
 
     def _init_search_params(self):
@@ -87,7 +90,9 @@ class QdrantSearch:
         """Async wrapper for cached embedding generation"""
         try:
             # Use run_in_executor to run CPU-intensive operation in thread pool
-            embedding = await asyncio.to_thread(self._get_embedding_cached, text)
+            embedding = await self._embedding_flight.do(
+                text, lambda: asyncio.to_thread(self._get_embedding_cached, text)
+            )
             return list(embedding)  # Convert back to list for JSON serialization
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Compare-and-delete so a leader never releases a lock that expired and was re-acquired
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Build a deterministic key from arbitrary JSON-serializable parts.
+
+    Args:
+        parts: Values identifying the computation (query, options, model, ...)
+
+    Returns:
+        Hex digest suitable for use as a singleflight or cache key
+    """
+    key_str = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(key_str.encode()).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls so they share one in-flight computation.
+
+    The first caller for a key becomes the leader and runs the computation; every
+    caller that arrives while it is running awaits the same result. With
+    ``distributed=True`` the leader also takes a Redis lock, so identical calls on
+    other workers wait for the leader's result instead of recomputing it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        distributed: bool = False,
+        lock_ttl: float = 120.0,
+        result_ttl: int = 30,
+        poll_interval: float = 0.1,
+        serializer: Callable[[Any], str] = json.dumps,
+        deserializer: Callable[[str], Any] = json.loads,
+    ):
+        self.name = name
+        self.distributed = distributed
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self.serializer = serializer
+        self.deserializer = deserializer
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.stats = {"leaders": 0, "coalesced": 0, "remote_hits": 0}
+
+    def in_flight(self) -> int:
+        """Number of computations currently running in this process"""
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run ``fn`` once per key among concurrent callers.
+
+        Args:
+            key: Identifies the computation; identical calls must use the same key
+            fn: Zero-argument coroutine factory performing the computation
+
+        Returns:
+            The result of the shared computation
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            logger.debug(f"[{self.name}] Joining in-flight call for key {key[:16]}")
+        else:
+            self.stats["leaders"] += 1
+            if self.distributed:
+                task = asyncio.ensure_future(self._run_distributed(key, fn))
+            else:
+                task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        # Shield so one cancelled caller does not cancel the computation for the rest
+        return await asyncio.shield(task)
+
+    async def _run_distributed(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` under a Redis lock, or wait for another worker's result"""
+        from app.service.redis_service import RedisService
+
+        lock_key = f"singleflight:{self.name}:lock:{key}"
+        result_key = f"singleflight:{self.name}:result:{key}"
+        token = uuid.uuid4().hex
+
+        def _acquire():
+            # Connecting may retry and sleep, so it runs in the thread too
+            client = RedisService.get_instance()
+            return client, client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+
+        try:
+            client, acquired = await asyncio.to_thread(_acquire)
+        except Exception as e:
+            logger.warning(f"[{self.name}] Redis unavailable, coalescing locally only: {str(e)}")
+            return await fn()
+
+        if acquired:
+            try:
+                result = await fn()
+                try:
+                    await asyncio.to_thread(
+                        client.setex, result_key, self.result_ttl, self.serializer(result)
+                    )
+                except Exception as e:
+                    logger.warning(f"[{self.name}] Failed to publish result: {str(e)}")
+                return result
+            finally:
+                try:
+                    await asyncio.to_thread(client.eval, _RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning(f"[{self.name}] Failed to release lock: {str(e)}")
+
+        # Another worker is computing this key; wait for its published result
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            try:
+                payload = await asyncio.to_thread(client.get, result_key)
+                if payload is not None:
+                    self.stats["remote_hits"] += 1
+                    return self.deserializer(payload)
+                if not await asyncio.to_thread(client.exists, lock_key):
+                    # Leader finished without a result (error) or released early
+                    payload = await asyncio.to_thread(client.get, result_key)
+                    if payload is not None:
+                        self.stats["remote_hits"] += 1
+                        return self.deserializer(payload)
+                    break
+            except Exception as e:
+                logger.warning(f"[{self.name}] Error polling for remote result: {str(e)}")
+                break
+            await asyncio.sleep(self.poll_interval)
+
+        logger.info(f"[{self.name}] No remote result for key {key[:16]}, computing locally")
+        return await fn()
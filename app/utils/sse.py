@@ -0,0 +1,30 @@
+import json
+from typing import Any, AsyncIterator, Dict
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Format a single server-sent event.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        The event encoded as an SSE frame
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def sse_stream(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Encode a stream of {"event": ..., "data": ...} dicts as SSE frames"""
+    async for event in events:
+        yield format_sse(event["event"], event["data"])
+
+
+# Disable proxy buffering (nginx) so events reach the client as they are produced
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
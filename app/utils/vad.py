@@ -0,0 +1,209 @@
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional
+
+import numpy as np
+
+from app.utils.ring_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Classifies one frame of int16 samples as speech (True) or not
+SpeechDetector = Callable[[np.ndarray], bool]
+
+
+class EnergyVAD:
+    """Treats a frame as speech when its RMS level reaches ``threshold``"""
+
+    def __init__(self, threshold: float = 500.0):
+        self.threshold = threshold
+
+    def __call__(self, frame: np.ndarray) -> bool:
+        if not frame.size:
+            return False
+        return float(np.sqrt(np.mean(frame.astype(np.float32) ** 2))) >= self.threshold
+
+
+class WebRTCVAD:
+    """Model-based detection with the optional ``webrtcvad`` package; frames must be 10, 20 or 30 ms"""
+
+    def __init__(self, sample_rate: int, aggressiveness: int = 2):
+        import webrtcvad
+
+        self.sample_rate = sample_rate
+        self._vad = webrtcvad.Vad(aggressiveness)
+
+    def __call__(self, frame: np.ndarray) -> bool:
+        return self._vad.is_speech(frame.astype(np.int16, copy=False).tobytes(), self.sample_rate)
+
+
+def create_speech_detector(mode: str, sample_rate: int, energy_threshold: float = 500.0) -> SpeechDetector:
+    """
+    Create a speech detector.
+
+    Args:
+        mode: "energy" or "webrtc"; "webrtc" falls back to energy when webrtcvad is not installed
+        sample_rate: Sample rate of the frames that will be classified
+        energy_threshold: RMS level counted as speech by the energy detector
+
+    Returns:
+        The detector
+    """
+    if (mode or "energy").lower() == "webrtc":
+        try:
+            return WebRTCVAD(sample_rate)
+        except ImportError:
+            logger.warning("webrtcvad is not installed; falling back to energy-based VAD")
+    return EnergyVAD(energy_threshold)
+
+
+@dataclass
+class VADEvent:
+    """Segmenter output of type "speech_start", "audio" (PCM to transcribe) or "speech_end"."""
+    type: str
+    audio: bytes = b""
+
+
+class VADSegmenter:
+    """
+    Splits a 16-bit mono PCM stream into utterances.
+
+    Input of any size is cut into fixed frames and each frame is classified
+    by ``detector``. Silence between utterances is dropped, apart from a
+    short pre-roll kept so the first syllable is not clipped. Once
+    ``silence_ms`` of silence follows speech, the utterance ends with a
+    "speech_end" event; the trailing silence up to that point is passed
+    through so downstream endpointing sees it too.
+
+    ``process`` takes PCM bytes; ``consume`` does the same segmentation
+    directly on an ``AudioRingBuffer``, classifying zero-copy frame views
+    and copying audio out only once per emitted chunk.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        silence_ms: int,
+        detector: Optional[SpeechDetector] = None,
+        frame_ms: int = 20,
+        pre_roll_ms: int = 200
+    ):
+        self.sample_rate = sample_rate
+        self.silence_ms = silence_ms
+        self.detector = detector or EnergyVAD()
+        self.frame_ms = frame_ms
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * 2
+        self.pre_roll_samples = (pre_roll_ms // frame_ms) * self.frame_samples
+        self.in_speech = False
+        # Silence that never had to be sent on for transcription
+        self.dropped_ms = 0.0
+        self._remainder = bytearray()
+        self._pre_roll: Deque[bytes] = deque(maxlen=pre_roll_ms // frame_ms)
+        self._silence_run_ms = 0
+        # Samples at the head of the ring buffer that are already classified
+        self._classified = 0
+
+    def update(self, speech: bool) -> Optional[str]:
+        """Advance the segmentation by one classified frame, returning "speech_start", "speech_end" or None"""
+        if not self.in_speech:
+            if not speech:
+                return None
+            self.in_speech = True
+            self._silence_run_ms = 0
+            return "speech_start"
+        if speech:
+            self._silence_run_ms = 0
+            return None
+        self._silence_run_ms += self.frame_ms
+        if self._silence_run_ms >= self.silence_ms:
+            self.in_speech = False
+            return "speech_end"
+        return None
+
+    def process(self, pcm: bytes) -> List[VADEvent]:
+        """Feed PCM and return the events it completes, in order"""
+        self._remainder.extend(pcm)
+        usable = len(self._remainder) - len(self._remainder) % self.frame_bytes
+        frames = bytes(self._remainder[:usable])
+        del self._remainder[:usable]
+
+        events: List[VADEvent] = []
+        audio = bytearray()
+        for offset in range(0, usable, self.frame_bytes):
+            frame = frames[offset:offset + self.frame_bytes]
+            was_in_speech = self.in_speech
+            transition = self.update(self.detector(np.frombuffer(frame, dtype=np.int16)))
+
+            if not was_in_speech:
+                if transition is None:
+                    if len(self._pre_roll) == self._pre_roll.maxlen:
+                        self.dropped_ms += self.frame_ms
+                    self._pre_roll.append(frame)
+                    continue
+                events.append(VADEvent("speech_start"))
+                audio.extend(b"".join(self._pre_roll))
+                self._pre_roll.clear()
+
+            audio.extend(frame)
+            if transition == "speech_end":
+                events.append(VADEvent("audio", bytes(audio)))
+                events.append(VADEvent("speech_end"))
+                audio.clear()
+
+        if audio:
+            events.append(VADEvent("audio", bytes(audio)))
+        return events
+
+    def consume(self, ring: AudioRingBuffer, chunk_samples: int) -> List[VADEvent]:
+        """
+        Segment the samples buffered in ``ring``, removing what has been decided.
+
+        Silence between utterances is discarded from the ring apart from the
+        pre-roll. Speech stays buffered until ``chunk_samples`` have built
+        up or the utterance ends, and is then read out as one "audio" event.
+
+        Args:
+            ring: Buffer of 16-bit mono samples, written by the caller
+            chunk_samples: Speech handed on per "audio" event, rounded up to whole frames
+
+        Returns:
+            Events completed by the buffered samples, in order
+        """
+        # Samples lost to an overrun can no longer be classified
+        self._classified = min(self._classified, len(ring))
+        events: List[VADEvent] = []
+        while len(ring) - self._classified >= self.frame_samples:
+            frame = ring.peek(self.frame_samples, self._classified)
+            transition = self.update(self.detector(frame))
+            self._classified += self.frame_samples
+
+            if not self.in_speech and transition is None:
+                excess = self._classified - self.pre_roll_samples
+                if excess > 0:
+                    ring.discard(excess)
+                    self._classified -= excess
+                    self.dropped_ms += excess * 1000 / self.sample_rate
+                continue
+
+            if transition == "speech_start":
+                events.append(VADEvent("speech_start"))
+            if transition == "speech_end" or self._classified >= chunk_samples:
+                events.append(VADEvent("audio", ring.read(self._classified).tobytes()))
+                self._classified = 0
+            if transition == "speech_end":
+                events.append(VADEvent("speech_end"))
+        return events
+
+    def flush(self) -> List[VADEvent]:
+        """End the current utterance, if any, e.g. when the stream closes"""
+        if not self.in_speech:
+            return []
+        events = []
+        if self._remainder:
+            events.append(VADEvent("audio", bytes(self._remainder)))
+        self._remainder.clear()
+        self.in_speech = False
+        events.append(VADEvent("speech_end"))
+        return events
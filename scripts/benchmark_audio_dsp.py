@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark the audio conversions used in the voice loop.
+Reports the best time per call and how many times faster than real time
+each conversion runs, for typical frame and utterance sizes.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.audio_dsp import (
+    StreamResampler, float32_to_int16, int16_to_float32, normalize_gain, resample, to_mono
+)
+
+
+def tone(ms, sample_rate, channels=1):
+    t = np.arange(sample_rate * ms // 1000) / sample_rate
+    samples = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    return np.repeat(samples, channels) if channels > 1 else samples
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the audio DSP helpers")
+    parser.add_argument("--frame-ms", type=int, default=10, help="Size of a LiveKit frame")
+    parser.add_argument("--utterance-ms", type=int, default=3000, help="Size of a synthesized sentence")
+    parser.add_argument("--repeat", type=int, default=200, help="Runs per case; the best time is reported")
+    args = parser.parse_args()
+
+    frame_48k = tone(args.frame_ms, 48000)
+    stereo_48k = tone(args.frame_ms, 48000, channels=2)
+    utterance_16k = tone(args.utterance_ms, 16000)
+    utterance_24k = tone(args.utterance_ms, 24000)
+    utterance_float = int16_to_float32(utterance_16k)
+    float_out = np.empty_like(utterance_float)
+    int_out = np.empty_like(utterance_16k)
+    mono_out = np.empty(len(stereo_48k) // 2, dtype=np.int16)
+    stream = StreamResampler(48000, 16000)
+
+    cases = [
+        ("stereo -> mono (frame)", args.frame_ms, lambda: to_mono(stereo_48k, 2, out=mono_out)),
+        ("48k -> 16k stream (frame)", args.frame_ms, lambda: stream.process(frame_48k)),
+        ("16k -> 48k poly (utterance)", args.utterance_ms, lambda: resample(utterance_16k, 16000, 48000)),
+        ("24k -> 16k poly (utterance)", args.utterance_ms, lambda: resample(utterance_24k, 24000, 16000)),
+        ("int16 -> float32 (utterance)", args.utterance_ms, lambda: int16_to_float32(utterance_16k, out=float_out)),
+        ("float32 -> int16 (utterance)", args.utterance_ms,
+         lambda: float32_to_int16(utterance_float, out=int_out, scratch=float_out)),
+        ("normalize gain (utterance)", args.utterance_ms, lambda: normalize_gain(int_out)),
+    ]
+
+    print(f"{'conversion':<30} {'audio ms':>9} {'best us':>10} {'x real time':>12}")
+    for name, audio_ms, fn in cases:
+        elapsed = best_of(fn, args.repeat)
+        print(f"{name:<30} {audio_ms:>9} {elapsed * 1e6:>10.1f} {audio_ms / 1000 / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
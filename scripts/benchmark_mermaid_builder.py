@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Benchmark the architecture-to-Mermaid builder on large generated graphs.
+Reports parse and render time per size and checks that time per element
+stays roughly flat (linear scaling).
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.mermaid_builder import ArchitectureGraph, NODE_SHAPES, TYPE_STYLES, render_mermaid
+
+NODE_TYPES = sorted(set(NODE_SHAPES) | set(TYPE_STYLES)) + ["unknown"]
+CONNECTION_TYPES = ["api_call", "response", "data_flow", "event", "stream"]
+
+
+def generate_architecture(nodes, edges_per_node=2, clusters=20, seed=0):
+    """Generate a random architecture JSON document of the given size."""
+    rng = random.Random(seed)
+    node_ids = [f"component-{i}" for i in range(nodes)]
+    return {
+        "type": "software_architecture",
+        "title": f"Generated Architecture ({nodes} nodes)",
+        "nodes": [
+            {
+                "id": node_id,
+                "label": f"Component {i}",
+                "type": rng.choice(NODE_TYPES),
+                "technology": rng.choice(["", "Python", "Go", "Postgres"])
+            }
+            for i, node_id in enumerate(node_ids)
+        ],
+        "connections": [
+            {
+                "from": node_id,
+                "to": rng.choice(node_ids),
+                "type": rng.choice(CONNECTION_TYPES),
+                "protocol": rng.choice(["", "HTTP", "gRPC"])
+            }
+            for node_id in node_ids
+            for _ in range(edges_per_node)
+        ],
+        "clusters": [
+            {"id": f"cluster-{c}", "label": f"Cluster {c}", "nodes": node_ids[c::clusters]}
+            for c in range(clusters)
+        ],
+        "styles": {node_id: {"color": "#FFFFFF"} for node_id in node_ids[::10]}
+    }
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Mermaid architecture builder")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000], help="Node counts to benchmark")
+    parser.add_argument("--edges-per-node", type=int, default=2, help="Connections generated per node")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per size; the best time is reported")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>8} {'edges':>8} {'parse ms':>10} {'render ms':>10} {'us/element':>11} {'output KB':>10}")
+    for size in args.sizes:
+        data = generate_architecture(size, args.edges_per_node)
+        elements = size + size * args.edges_per_node
+        graph = ArchitectureGraph.from_dict(data)
+
+        parse_time = best_of(lambda: ArchitectureGraph.from_dict(data), args.repeat)
+        render_time = best_of(lambda: render_mermaid(graph), args.repeat)
+        output = render_mermaid(graph)
+
+        print(
+            f"{size:>8} {size * args.edges_per_node:>8} {parse_time * 1000:>10.2f} {render_time * 1000:>10.2f} "
+            f"{(parse_time + render_time) / elements * 1e6:>11.2f} {len(output) / 1024:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
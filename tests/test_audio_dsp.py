@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Unit tests for the vectorized audio conversion helpers.
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.audio_dsp import (
+    StreamResampler, apply_gain, float32_to_int16, int16_to_float32, normalize_gain, resample, rms_dbfs, to_mono
+)
+
+
+def tone(sample_rate: int, ms: int = 200, frequency: float = 440.0) -> np.ndarray:
+    t = np.arange(sample_rate * ms // 1000) / sample_rate
+    return (np.sin(2 * np.pi * frequency * t) * 8000).astype(np.int16)
+
+
+def dominant_frequency(samples: np.ndarray, sample_rate: int) -> float:
+    spectrum = np.abs(np.fft.rfft(samples))
+    return np.argmax(spectrum) * sample_rate / len(samples)
+
+
+@pytest.mark.unit
+class TestAudioDSP:
+    """Tests for resampling, format conversion, mixing and gain."""
+
+    def test_conversions_write_into_given_arrays(self):
+        samples = np.array([-32768, 0, 16384, 32767], dtype=np.int16)
+        floats = np.empty(4, dtype=np.float32)
+        assert int16_to_float32(samples, out=floats) is floats
+        ints = np.empty(4, dtype=np.int16)
+        assert float32_to_int16(floats, out=ints) is ints
+        assert np.array_equal(ints, samples)
+        assert list(float32_to_int16(np.array([1.5, -1.5], dtype=np.float32))) == [32767, -32768]
+
+    def test_polyphase_resample_keeps_pitch_and_length(self):
+        resampled = resample(tone(16000), 16000, 48000)
+        assert resampled.dtype == np.int16 and len(resampled) == 9600
+        assert dominant_frequency(resampled, 48000) == pytest.approx(440, abs=5)
+        assert rms_dbfs(resampled) == pytest.approx(rms_dbfs(tone(16000)), abs=0.5)
+
+    def test_downsampling_removes_content_above_nyquist(self):
+        # 10 kHz cannot be represented at 16 kHz and must not alias into the band
+        aliased = resample(tone(48000, frequency=10000), 48000, 16000)
+        assert rms_dbfs(aliased) < rms_dbfs(tone(48000)) - 40
+
+    def test_stream_resampler_is_seamless_across_blocks(self):
+        signal = tone(48000, ms=300)
+        blockwise = StreamResampler(48000, 16000)
+        blocks = np.concatenate([blockwise.process(signal[i:i + 480]) for i in range(0, len(signal), 480)])
+        assert np.array_equal(blocks, StreamResampler(48000, 16000).process(signal))
+        assert len(blocks) == len(signal) // 3
+
+    def test_mono_mix_without_overflow(self):
+        stereo = np.array([32767, 32767, -32768, 0], dtype=np.int16)
+        assert list(to_mono(stereo, 2)) == [32767, -16384]
+        mono = np.arange(4, dtype=np.int16)
+        assert to_mono(mono, 1) is mono
+
+    def test_gain_in_place(self):
+        samples = tone(16000)
+        assert normalize_gain(samples, target_dbfs=-10.0) > 0
+        assert rms_dbfs(samples) == pytest.approx(-10.0, abs=0.1)
+        loud = np.array([20000, -20000], dtype=np.int16)
+        assert list(apply_gain(loud, 2.0)) == [32767, -32768]
+        assert normalize_gain(np.zeros(10, dtype=np.int16)) == 0.0
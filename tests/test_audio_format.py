@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Unit tests for in-memory audio format helpers.
+"""
+
+import io
+import os
+import sys
+import numpy as np
+import pytest
+import soundfile as sf
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.audio_dsp import float32_to_int16, int16_to_float32
+from app.utils.audio_format import decode_audio, is_wav, pcm_to_wav_bytes, read_wav_bytes, to_wav_bytes
+
+SAMPLE_RATE = 16000
+
+
+def tone(ms: int = 100) -> np.ndarray:
+    t = np.arange(int(SAMPLE_RATE * ms / 1000)) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+
+
+@pytest.mark.unit
+class TestAudioFormat:
+    """Tests for WAV framing and in-memory decoding."""
+
+    def test_pcm_wav_round_trip(self):
+        samples = tone()
+        wav = pcm_to_wav_bytes(samples.tobytes(), SAMPLE_RATE)
+        assert is_wav(wav)
+        decoded, rate, channels = read_wav_bytes(wav)
+        assert (rate, channels) == (SAMPLE_RATE, 1)
+        np.testing.assert_array_equal(decoded, samples)
+
+    def test_wav_written_by_soundfile_is_readable(self):
+        samples = tone()
+        buffer = io.BytesIO()
+        sf.write(buffer, samples, SAMPLE_RATE, format="WAV", subtype="PCM_16")
+        decoded, rate, _ = read_wav_bytes(buffer.getvalue())
+        assert rate == SAMPLE_RATE
+        np.testing.assert_array_equal(decoded, samples)
+
+    def test_float_wav_and_flac_decode_in_process(self):
+        samples = tone()
+        for fmt, subtype in [("WAV", "FLOAT"), ("FLAC", "PCM_16")]:
+            buffer = io.BytesIO()
+            sf.write(buffer, int16_to_float32(samples), SAMPLE_RATE, format=fmt, subtype=subtype)
+            decoded, rate, channels = decode_audio(buffer.getvalue())
+            assert (rate, channels) == (SAMPLE_RATE, 1)
+            np.testing.assert_array_equal(decoded, samples)
+
+    def test_to_wav_bytes(self):
+        samples = tone()
+        wav = pcm_to_wav_bytes(samples, SAMPLE_RATE)
+        assert to_wav_bytes(wav) is wav
+        assert to_wav_bytes(samples.tobytes(), sample_rate=SAMPLE_RATE) == wav
+
+    def test_stereo_is_interleaved(self):
+        stereo = np.stack([tone(), -tone()], axis=1)
+        buffer = io.BytesIO()
+        sf.write(buffer, stereo, SAMPLE_RATE, format="FLAC")
+        decoded, _, channels = decode_audio(buffer.getvalue())
+        assert channels == 2
+        np.testing.assert_array_equal(decoded.reshape(-1, 2), stereo)
+
+    def test_float_int16_conversion_clips(self):
+        converted = float32_to_int16(np.array([-2.0, -1.0, 0.0, 0.5, 2.0], dtype=np.float32))
+        assert converted.tolist() == [-32768, -32768, 0, 16384, 32767]
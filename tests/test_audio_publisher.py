@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+Unit tests for outbound audio framing and pacing (offline).
+"""
+
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.service.audio_publisher import AudioPublisher
+
+
+class RecordingSink:
+    def __init__(self):
+        self.frames = []
+        self.times = []
+
+    async def __call__(self, samples):
+        self.frames.append(samples.copy())
+        self.times.append(time.perf_counter())
+
+
+def tone(ms: int, sample_rate: int = 16000) -> bytes:
+    t = np.arange(sample_rate * ms // 1000) / sample_rate
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16).tobytes()
+
+
+@pytest.mark.unit
+class TestAudioPublisher:
+    """Tests for resampling, fixed frames, pacing and flushing."""
+
+    async def test_resampled_into_fixed_frames(self):
+        sink = RecordingSink()
+        publisher = AudioPublisher(sink, sample_rate=48000, frame_ms=10, lead_ms=0, prebuffer_ms=0)
+        await publisher.enqueue(tone(45), 16000)
+        await asyncio.sleep(0.08)
+        await publisher.close()
+
+        # 45 ms at 48 kHz, padded to whole 10 ms frames
+        assert [len(frame) for frame in sink.frames] == [480] * 5
+        assert np.count_nonzero(sink.frames[-1][240:]) == 0
+        assert publisher.metrics.bytes_sent == 5 * 480 * 2
+
+    async def test_paced_at_real_time(self):
+        sink = RecordingSink()
+        publisher = AudioPublisher(sink, sample_rate=16000, frame_ms=10, lead_ms=20, prebuffer_ms=0)
+        await publisher.enqueue(tone(200), 16000)
+        await asyncio.sleep(0.3)
+        await publisher.close()
+
+        assert len(sink.frames) == 20
+        elapsed = sink.times[-1] - sink.times[0]
+        # 20 frames of 10 ms, the first ones sent early to build the lead
+        assert 0.15 <= elapsed <= 0.25
+        assert publisher.metrics.last_latency_ms is not None
+
+    async def test_flush_drops_queued_audio(self):
+        sink = RecordingSink()
+        publisher = AudioPublisher(sink, sample_rate=16000, frame_ms=10, lead_ms=0, prebuffer_ms=0)
+        await publisher.enqueue(tone(500), 16000)
+        await asyncio.sleep(0.05)
+        dropped = await publisher.flush()
+        sent = len(sink.frames)
+        await asyncio.sleep(0.05)
+
+        assert dropped > 0
+        assert len(sink.frames) <= sent + 1
+        assert publisher.metrics.bytes_flushed == dropped
+        await publisher.close()
+
+    async def test_full_queue_applies_backpressure(self):
+        sink = RecordingSink()
+        publisher = AudioPublisher(sink, sample_rate=16000, frame_ms=10, lead_ms=0, prebuffer_ms=0, max_queue_ms=50)
+        started = time.perf_counter()
+        await publisher.enqueue(tone(150), 16000)
+        # Only 50 ms fits, so queueing 150 ms waits for roughly 100 ms of playback
+        assert time.perf_counter() - started >= 0.08
+        await publisher.close()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Unit tests for the response cache backends.
+"""
+
+import asyncio
+import os
+import sys
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.cache import CircuitBreaker, MemoryCache, RedisCache, TieredCache, create_cache
+
+
+@pytest.mark.unit
+class TestMemoryCache:
+    """Tests for the in-process cache."""
+
+    async def test_get_set(self):
+        cache = MemoryCache("test")
+        assert await cache.get("key") is None
+        await cache.set("key", "value")
+        assert await cache.get("key") == "value"
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+        assert cache.stats.hit_rate == 0.5
+
+    async def test_ttl_expiry(self):
+        cache = MemoryCache("test", default_ttl=10)
+        with patch("app.utils.cache.time.monotonic", return_value=100.0):
+            await cache.set("key", "value")
+        with patch("app.utils.cache.time.monotonic", return_value=105.0):
+            assert await cache.get("key") == "value"
+        with patch("app.utils.cache.time.monotonic", return_value=111.0):
+            assert await cache.get("key") is None
+        assert len(cache) == 0
+
+    async def test_lru_eviction(self):
+        cache = MemoryCache("test", max_entries=2)
+        await cache.set("a", "1")
+        await cache.set("b", "2")
+        await cache.get("a")
+        await cache.set("c", "3")
+
+        assert await cache.get("a") == "1"
+        assert await cache.get("b") is None
+        assert await cache.get("c") == "3"
+
+    async def test_delete(self):
+        cache = MemoryCache("test")
+        await cache.set("key", "value")
+        assert await cache.delete("key") is True
+        assert await cache.get("key") is None
+
+
+@pytest.mark.unit
+class TestRedisCache:
+    """Tests for the Redis cache using a mocked client."""
+
+    async def test_set_uses_ttl_and_prefix(self):
+        client = MagicMock()
+        cache = RedisCache("test", prefix="llm:response", default_ttl=60)
+        with patch("app.service.redis_service.RedisService.get_instance", return_value=client):
+            await cache.set("key", "value")
+        client.setex.assert_called_once_with("llm:response:key", 60, "value")
+
+    async def test_errors_count_as_misses(self):
+        cache = RedisCache("test", prefix="p")
+        with patch(
+            "app.service.redis_service.RedisService.get_instance",
+            side_effect=Exception("down")
+        ):
+            assert await cache.get("key") is None
+        assert cache.stats.misses == 1
+        assert cache.stats.errors == 1
+
+    async def test_slow_connect_does_not_block_loop(self):
+        def slow_connect():
+            # Like RedisService retrying an unreachable server
+            time.sleep(0.5)
+            raise ConnectionError("down")
+
+        cache = RedisCache("test", prefix="p", timeout=0.1)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        started = time.perf_counter()
+        with patch("app.service.redis_service.RedisService.get_instance", side_effect=slow_connect):
+            assert await cache.get("key") is None
+        elapsed = time.perf_counter() - started
+        task.cancel()
+
+        # The call gave up at its timeout and the loop kept running meanwhile
+        assert elapsed < 0.3
+        assert ticks >= 5
+        assert cache.stats.misses == 1 and cache.stats.errors == 1
+
+    async def test_open_circuit_skips_redis(self):
+        cache = RedisCache("test", prefix="p", breaker=CircuitBreaker(cooldown=60))
+        stub = MagicMock(side_effect=ConnectionError("down"))
+        with patch("app.service.redis_service.RedisService.get_instance", stub):
+            assert await cache.get("a") is None
+            assert await cache.get("b") is None
+            assert await cache.set("c", "value") is False
+        assert stub.call_count == 1
+        assert cache.stats.skipped == 2
+        assert cache.stats.misses == 2
+
+    async def test_circuit_closes_after_cooldown(self):
+        client = MagicMock()
+        client.get.return_value = "value"
+        cache = RedisCache("test", prefix="p", breaker=CircuitBreaker(cooldown=10))
+        with patch("app.service.redis_service.RedisService.get_instance", side_effect=ConnectionError("down")):
+            await cache.get("key")
+        with patch("app.utils.cache.time.monotonic", return_value=time.monotonic() + 11), \
+                patch("app.service.redis_service.RedisService.get_instance", return_value=client):
+            assert await cache.get("key") == "value"
+        assert not cache.breaker.is_open
+
+
+@pytest.mark.unit
+class TestTieredCache:
+    """Tests for the memory-in-front-of-shared cache."""
+
+    async def test_shared_hit_backfills_memory(self):
+        memory, shared = MemoryCache("m"), MemoryCache("s")
+        cache = TieredCache("test", memory=memory, shared=shared)
+        await shared.set("key", "value")
+
+        assert await cache.get("key") == "value"
+        assert await memory.get("key") == "value"
+        assert cache.stats.hits == 1
+        assert cache.stats_dict()["tiers"]["shared"]["hits"] == 1
+
+    async def test_set_writes_both_tiers(self):
+        memory, shared = MemoryCache("m", default_ttl=10), MemoryCache("s")
+        cache = TieredCache("test", memory=memory, shared=shared)
+        with patch("app.utils.cache.time.monotonic", return_value=100.0):
+            await cache.set("key", "value", ttl=60)
+        with patch("app.utils.cache.time.monotonic", return_value=120.0):
+            # Memory tier keeps its shorter TTL; the shared tier still has the entry
+            assert await memory.get("key") is None
+            assert await cache.get("key") == "value"
+
+    async def test_unreachable_shared_tier_degrades_to_memory(self):
+        def slow_connect():
+            time.sleep(0.5)
+            raise ConnectionError("down")
+
+        cache = create_cache("tiered", "diagram", "diagram")
+        cache.shared.timeout = 0.1
+        started = time.perf_counter()
+        with patch("app.service.redis_service.RedisService.get_instance", side_effect=slow_connect):
+            for _ in range(5):
+                await cache.set("key", "value")
+                assert await cache.get("key") == "value"
+        # One probe hits the timeout; the open circuit skips Redis after that
+        assert time.perf_counter() - started < 0.3
+        assert cache.shared.stats.skipped >= 4
+
+
+@pytest.mark.unit
+def test_create_cache():
+    assert isinstance(create_cache("memory", "n", "p"), MemoryCache)
+    assert isinstance(create_cache("redis", "n", "p"), RedisCache)
+    assert isinstance(create_cache("tiered", "n", "p"), TieredCache)
+    assert create_cache("none", "n", "p") is None
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Unit tests for diagram descriptions and caching, with the completion calls stubbed (offline).
+"""
+
+import asyncio
+import os
+import sys
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require these; the stubbed calls never use them
+for key in ["GROQ_API_KEY", "QDRANT_URL", "QDRANT_API_KEY", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET",
+            "LIVEKIT_WS_URL", "DEEPGRAM_API_KEY", "ELEVENLABS_API_KEY"]:
+    os.environ.setdefault(key, "test")
+
+pytest.importorskip("qdrant_client")
+
+from app.core.diagram_chat import DEFAULT_DESCRIPTION, diagram
+from app.models.model import DiagramResponse
+from app.utils.cache import MemoryCache
+
+
+def _response(description=DEFAULT_DESCRIPTION, pending=True):
+    metadata = {"description_pending": True} if pending else {}
+    return DiagramResponse(diagram_type="flowchart", syntax="flowchart TD\n    A --> B", description=description, metadata=metadata)
+
+
+def _blocked_description(release: asyncio.Event, text="Two connected steps."):
+    async def describe(prompt):
+        await release.wait()
+        return text
+    return AsyncMock(side_effect=describe)
+
+
+async def _no_chunks():
+    return
+    yield
+
+
+@pytest.mark.unit
+class TestDiagramDescription:
+    """A diagram without an inline description is served at once and described in the background."""
+
+    async def test_served_before_description_then_cached(self):
+        cache = MemoryCache("diagram", max_entries=10)
+        release = asyncio.Event()
+        describe = _blocked_description(release)
+        with patch.object(diagram, "cache", cache), \
+                patch.object(diagram, "_generate_description", describe), \
+                patch.object(diagram, "_generate_diagram", AsyncMock(return_value=_response())):
+            first = await asyncio.wait_for(diagram.generate_diagram("draw a flowchart of two steps"), 1)
+            assert first.description == DEFAULT_DESCRIPTION
+            assert first.metadata["description_pending"] is True
+            assert len(diagram._description_tasks) == 1
+
+            release.set()
+            await asyncio.gather(*diagram._description_tasks)
+            second = await diagram.generate_diagram("draw a flowchart of two steps")
+
+        assert second.description == "Two connected steps."
+        assert "description_pending" not in second.metadata
+        assert describe.await_count == 1
+
+    async def test_no_background_call_without_cache(self):
+        describe = AsyncMock()
+        with patch.object(diagram, "cache", None), \
+                patch.object(diagram, "_generate_description", describe), \
+                patch.object(diagram, "_generate_diagram", AsyncMock(return_value=_response())):
+            response = await diagram.generate_diagram("draw a flowchart of two steps")
+
+        assert response.description == DEFAULT_DESCRIPTION
+        describe.assert_not_awaited()
+
+    async def test_stream_sends_description_after_diagram(self):
+        release = asyncio.Event()
+        groq_client = MagicMock()
+        groq_client.chat.completions.create = AsyncMock(return_value=_no_chunks())
+        events = []
+        with patch.object(diagram, "cache", None), \
+                patch.object(diagram, "groq_client", groq_client), \
+                patch.object(diagram, "_generate_description", _blocked_description(release)), \
+                patch.object(diagram, "_build_response", AsyncMock(return_value=_response())):
+            async for event in diagram.stream_diagram("draw a flowchart of two steps"):
+                events.append(event)
+                if event["event"] == "diagram":
+                    # The diagram arrives while the description is still being generated
+                    release.set()
+
+        assert [event["event"] for event in events] == ["start", "diagram", "description"]
+        assert events[1]["data"]["description"] == DEFAULT_DESCRIPTION
+        assert events[2]["data"] == {"description": "Two connected steps."}
+
+    async def test_inline_description_kept(self):
+        cache = MemoryCache("diagram", max_entries=10)
+        describe = AsyncMock()
+        response = _response(description="Inline description.", pending=False)
+        with patch.object(diagram, "cache", cache), patch.object(diagram, "_generate_description", describe):
+            assert await diagram._cache_response("key", response) is None
+
+        assert response.description == "Inline description."
+        describe.assert_not_awaited()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+Unit tests for token-budgeted conversation history.
+"""
+
+import os
+import sys
+import asyncio
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.history import ConversationHistoryManager, count_tokens, count_message_tokens
+
+
+def _conversation(turns, words=20):
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "word " * words})
+        messages.append({"role": "assistant", "content": f"answer {i} " + "word " * words})
+    return messages
+
+
+@pytest.mark.unit
+class TestTokenCounting:
+    """Tests for token counting helpers."""
+
+    def test_empty(self):
+        assert count_tokens("") == 0
+
+    def test_grows_with_text(self):
+        assert count_tokens("word " * 100) > count_tokens("word " * 10) > 0
+
+
+@pytest.mark.unit
+class TestConversationHistoryManager:
+    """Tests for history windowing and rolling summaries."""
+
+    def test_short_history_is_unchanged(self):
+        manager = ConversationHistoryManager(max_tokens=1000, recent_messages=8)
+        messages = _conversation(2)
+        assert manager.build("s", messages) == messages
+
+    def test_window_is_bounded(self):
+        manager = ConversationHistoryManager(max_tokens=300, recent_messages=8)
+        messages = _conversation(50)
+        window = manager.build("s", messages)
+
+        assert len(window) <= 8
+        assert window[-1] == messages[-1]
+        assert sum(count_message_tokens(m) for m in window) <= 300
+
+    def test_newest_message_always_kept(self):
+        manager = ConversationHistoryManager(max_tokens=10, recent_messages=8)
+        messages = _conversation(1, words=500)
+        assert manager.build("s", messages)[-1] == messages[-1]
+
+    async def test_summary_refreshes_in_background(self):
+        calls = []
+
+        async def summarizer(previous, messages):
+            calls.append((previous, len(messages)))
+            await asyncio.sleep(0)
+            return f"summary of {len(messages)}"
+
+        manager = ConversationHistoryManager(max_tokens=5000, recent_messages=4, summarizer=summarizer)
+        messages = _conversation(5)
+
+        # First build does not wait for the summary
+        first = manager.build("s", messages)
+        assert first == messages[-4:]
+
+        await asyncio.sleep(0.01)
+        second = manager.build("s", messages)
+        assert second[0]["role"] == "system"
+        assert "summary of 6" in second[0]["content"]
+        assert second[1:] == messages[-4:]
+        assert calls == [("", 6)]
+
+    async def test_summary_is_incremental(self):
+        calls = []
+
+        async def summarizer(previous, messages):
+            calls.append((previous, len(messages)))
+            return "updated"
+
+        manager = ConversationHistoryManager(max_tokens=5000, recent_messages=4, summarizer=summarizer)
+        messages = _conversation(5)
+        manager.build("s", messages)
+        await asyncio.sleep(0.01)
+
+        messages += _conversation(1)
+        manager.build("s", messages)
+        await asyncio.sleep(0.01)
+
+        assert calls[1] == ("updated", 2)
+
+    async def test_summarizer_errors_are_swallowed(self):
+        async def summarizer(previous, messages):
+            raise RuntimeError("provider down")
+
+        manager = ConversationHistoryManager(max_tokens=5000, recent_messages=2, summarizer=summarizer)
+        messages = _conversation(3)
+        manager.build("s", messages)
+        await asyncio.sleep(0.01)
+        assert manager.build("s", messages) == messages[-2:]
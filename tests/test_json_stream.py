@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Unit tests for the incremental JSON array item extractor.
+"""
+
+import json
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.json_stream import JSONArrayItemExtractor
+
+
+DOCUMENT = "```json\n" + json.dumps({
+    "title": "Tricky { [ title",
+    "nodes": [
+        {"id": "api", "label": "API \"gateway\" }"},
+        {"id": "db", "meta": {"replicas": [1, 2]}}
+    ],
+    "connections": [{"from": "api", "to": "db"}],
+    "styles": {"api": {"color": "#fff"}}
+}) + "\n```"
+
+
+def feed_in_chunks(extractor, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(extractor.feed(text[start:start + size]))
+    return items
+
+
+@pytest.mark.unit
+class TestJSONArrayItemExtractor:
+    """Tests for pulling items out of streamed architecture JSON."""
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 16, len(DOCUMENT)])
+    def test_items_independent_of_chunking(self, chunk_size):
+        extractor = JSONArrayItemExtractor(["nodes", "connections", "clusters"])
+        items = feed_in_chunks(extractor, DOCUMENT, chunk_size)
+
+        assert items == [
+            ("nodes", {"id": "api", "label": "API \"gateway\" }"}),
+            ("nodes", {"id": "db", "meta": {"replicas": [1, 2]}}),
+            ("connections", {"from": "api", "to": "db"}),
+        ]
+
+    def test_item_emitted_as_soon_as_closed(self):
+        extractor = JSONArrayItemExtractor(["nodes"])
+        assert extractor.feed('{"nodes": [{"id": "a"}') == [("nodes", {"id": "a"})]
+        assert extractor.feed(', {"id": ') == []
+        assert extractor.feed('"b"}]}') == [("nodes", {"id": "b"})]
+
+    def test_unwatched_arrays_ignored(self):
+        extractor = JSONArrayItemExtractor(["nodes"])
+        assert extractor.feed('{"styles": [{"a": 1}], "nodes": []}') == []
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Unit tests for the compiled weighted keyword matcher.
+"""
+
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.keyword_matcher import KeywordMatcher
+
+
+TABLE = [
+    ("architecture", 3.0, ["microservice", "event-driven", "message queue"]),
+    ("sequence", 5.0, ["sequence diagram"]),
+    ("sequence", 1.0, ["message", "interaction"]),
+    ("er", 1.0, ["er", "table"]),
+]
+
+
+@pytest.mark.unit
+class TestKeywordMatcher:
+    """Tests for weighted keyword scoring."""
+
+    @pytest.fixture
+    def matcher(self):
+        return KeywordMatcher(TABLE)
+
+    def test_whole_words_only(self, matcher):
+        # "er" must not match inside "user" or "server"
+        assert matcher.scores("user talks to the server") == {}
+        assert matcher.best("ER for a user table") == "er"
+
+    def test_plurals_and_separators(self, matcher):
+        assert matcher.scores("Microservices, event driven") == {"architecture": 6.0}
+        assert matcher.scores("event_driven interactions") == {"architecture": 3.0, "sequence": 1.0}
+
+    def test_longest_phrase_wins(self, matcher):
+        assert matcher.scores("a message queue") == {"architecture": 3.0}
+
+    def test_weights_decide(self, matcher):
+        assert matcher.best("sequence diagram of microservice login") == "sequence"
+        assert matcher.best("message between microservices") == "architecture"
+
+    def test_tie_goes_to_first_label_and_default(self, matcher):
+        tied = KeywordMatcher([("a", 1.0, ["alpha"]), ("b", 1.0, ["beta"])])
+        assert tied.best("beta alpha") == "a"
+        assert matcher.best("nothing relevant", default="fallback") == "fallback"
+
+    def test_equivalent_phrases_count_once(self):
+        matcher = KeywordMatcher([
+            ("er", 5.0, ["entity relationship", "entity-relationship"]),
+            ("er", 1.0, ["entity_relationship", "table"]),
+            ("class", 2.0, ["entity relationship"]),
+        ])
+        assert matcher.scores("an entity-relationship diagram") == {"er": 5.0, "class": 2.0}
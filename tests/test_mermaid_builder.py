@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Unit tests for the architecture graph Mermaid builder.
+"""
+
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.mermaid_builder import ArchitectureGraph, render_mermaid
+from app.utils.mermaid_validator import validate_mermaid
+
+
+ARCHITECTURE = {
+    "type": "software_architecture",
+    "title": "Shop Platform",
+    "nodes": [
+        {"id": "web-app", "label": "Web App", "type": "Frontend", "technology": "React"},
+        {"id": "ui", "label": "Admin", "type": "user_interface"},
+        {"id": "api-gateway", "label": "Gateway (Kong)", "type": "gateway", "technology": "Kong"},
+        {"id": "orders", "label": "Orders", "type": "microservice"},
+        {"id": "db", "label": "Orders DB", "type": "database", "technology": "Postgres"},
+        {"id": "vectors", "label": "Vectors", "type": "vector_db"},
+        {"id": "llm", "label": "LLM", "type": "llm"},
+        {"id": "agent", "label": "Planner", "type": "agent"},
+        {"id": "fn", "label": "Resize", "type": "lambda"},
+        {"id": "bus", "label": "Events", "type": "kafka"},
+        {"id": "queue", "label": "Jobs", "type": "queue"},
+        {"id": "cache", "label": "Cache", "type": "cache"},
+        {"id": "lb", "label": "LB", "type": "load_balancer"},
+        {"id": "stripe", "label": "Stripe", "type": "third_party"},
+        {"id": "auth", "label": "Auth", "type": "security"},
+        {"id": "misc", "label": "Misc", "type": "something_else"},
+        {"id": "styled-node", "label": "Styled", "type": "api"},
+        {"id": "orders2", "label": "Orders 2", "type": "service"}
+    ],
+    "connections": [
+        {"from": "web-app", "to": "api-gateway", "label": "calls", "protocol": "HTTPS"},
+        {"from": "api-gateway", "to": "orders", "type": "api_call"},
+        {"from": "orders", "to": "db", "type": "Data_Flow", "protocol": "SQL"},
+        {"from": "orders", "to": "web-app", "type": "response"},
+        {"from": "orders", "to": "bus"}
+    ],
+    "clusters": [
+        {"id": "front-end", "label": "Frontend", "nodes": ["web-app", "ui"]},
+        {"id": "backend", "label": "Backend", "nodes": ["orders", "db"]}
+    ],
+    "styles": {
+        "orders": {"color": "#123456", "border": "#654321"},
+        "styled-node": {"color": "#abcdef"}
+    }
+}
+
+# Output of the original string-concatenating converter for ARCHITECTURE
+EXPECTED_MERMAID = """\
+flowchart TD
+    title["Shop Platform"]
+    subgraph front_end["Frontend"]
+        web_app
+        ui
+    end
+    subgraph backend["Backend"]
+        orders
+        db
+    end
+    web_app["Web App (React)"]
+    ui["Admin"]
+    api_gateway["Gateway (Kong)"]
+    orders["Orders"]
+    db[("Orders DB (Postgres)")]
+    vectors[("Vectors")]
+    llm["LLM"]
+    agent{"Planner"}
+    fn[["Resize"]]
+    bus["Events"]
+    queue["Jobs"]
+    cache["Cache"]
+    lb["LB"]
+    stripe["Stripe"]
+    auth["Auth"]
+    misc["Misc"]
+    styled_node["Styled"]
+    orders2["Orders 2"]
+    web_app --> api_gateway
+    api_gateway --> orders
+    orders -.-> db
+    orders -.-> web_app
+    orders --> bus
+    style orders fill:#123456,stroke:#654321
+    style styled_node fill:#abcdef,stroke:#000000
+    style web_app fill:#D4F1F9,stroke:#1E90FF
+    style db fill:#E1D5E7,stroke:#9673A6
+    style vectors fill:#DAE8FC,stroke:#6C8EBF
+    style llm fill:#FFE6CC,stroke:#D79B00
+    style queue fill:#FFF2CC,stroke:#D6B656
+    style cache fill:#D5E8D4,stroke:#82B366
+    style stripe fill:#F5F5F5,stroke:#666666
+    style auth fill:#F8CECC,stroke:#B85450
+    style styled_node fill:#F5F5F5,stroke:#666666
+    style orders2 fill:#F5F5F5,stroke:#666666
+    style title fill:#FFFFFF,stroke:#FFFFFF,color:#000000,font-size:16px
+"""
+
+
+@pytest.mark.unit
+class TestMermaidBuilder:
+    """Tests for rendering architecture graphs."""
+
+    def test_matches_original_converter(self):
+        assert render_mermaid(ArchitectureGraph.from_dict(ARCHITECTURE)) == EXPECTED_MERMAID
+
+    def test_empty_graph(self):
+        rendered = render_mermaid(ArchitectureGraph.from_dict({"type": "ai_architecture"}))
+        assert rendered == (
+            "flowchart TD\n"
+            "    title[\"Architecture Diagram\"]\n"
+            "    style title fill:#FFFFFF,stroke:#FFFFFF,color:#000000,font-size:16px\n"
+        )
+
+    def test_large_graph(self):
+        nodes = [{"id": f"svc-{i}", "label": f"Service {i}", "type": "service"} for i in range(2000)]
+        connections = [{"from": f"svc-{i}", "to": f"svc-{(i + 1) % 2000}"} for i in range(2000)]
+        rendered = render_mermaid(ArchitectureGraph.from_dict({"nodes": nodes, "connections": connections}))
+
+        lines = rendered.splitlines()
+        # Header, title, nodes, connections, default styles and the title style
+        assert len(lines) == 2 + 2000 + 2000 + 2000 + 1
+        assert "    svc_1999 --> svc_0" in lines
+        assert validate_mermaid(rendered) == []
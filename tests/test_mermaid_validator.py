@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Unit tests for the local Mermaid validator and JSON repair.
+"""
+
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.mermaid_validator import parse_json, repair_mermaid, validate_mermaid
+
+
+@pytest.mark.unit
+class TestMermaidValidator:
+    """Tests for Mermaid validation and repair."""
+
+    def test_valid_diagram_passes_unchanged(self):
+        syntax = 'flowchart TD\n    A["Start"] --> B{Valid?}\n    B -->|Yes| C[(Database)]'
+        assert validate_mermaid(syntax) == []
+        assert repair_mermaid(syntax) == syntax
+
+    def test_strips_fences_and_prose(self):
+        syntax = "Here is the diagram:\n```mermaid\nsequenceDiagram\n    A->>B: hello\n```"
+        assert validate_mermaid(syntax)
+        assert repair_mermaid(syntax) == "sequenceDiagram\n    A->>B: hello"
+
+    def test_quotes_labels_and_normalizes_ids(self):
+        syntax = "flowchart LR\n    load-data[Load (raw) data] --> end\n    style load-data fill:#f9f"
+        repaired = repair_mermaid(syntax)
+        assert repaired == 'flowchart LR\n    load_data["Load (raw) data"] --> end_\n    style load_data fill:#f9f'
+        assert validate_mermaid(repaired) == []
+
+    def test_balances_subgraphs(self):
+        syntax = "flowchart TD\n    end\n    subgraph API\n        A --> B"
+        repaired = repair_mermaid(syntax)
+        assert repaired == "flowchart TD\n    subgraph API\n        A --> B\nend"
+        assert validate_mermaid(repaired) == []
+
+    @pytest.mark.parametrize("statement", [
+        "B[/Trap\\]",
+        "C[\\Trap alt/]",
+        'trap1[/"Trapezoid 1"\\] --> trap2[\\"Trapezoid 2"/]',
+        'parallel2["Parallelogram 2"\\]',
+        "A@{ shape: rect }",
+        'A@{ shape: rect, label: "a } b" } --> B[/Out/]',
+        "A -. text .-> B",
+        "A -. maybe .- B",
+        "A == text ==> B",
+        "A == v1.2 ==> B",
+        "A -- yes --> B -- no --> C",
+        "A --> |label with space| B",
+        "A -->|label with space| B",
+    ])
+    def test_valid_shapes_and_links_pass_unchanged(self, statement):
+        syntax = "flowchart TD\n    " + statement
+        assert validate_mermaid(syntax) == []
+        assert repair_mermaid(syntax) == syntax
+
+    def test_shape_data_node_id_still_normalized(self):
+        repaired = repair_mermaid("flowchart TD\n    load-data@{ shape: cyl } --> B")
+        assert repaired == "flowchart TD\n    load_data@{ shape: cyl } --> B"
+
+
+@pytest.mark.unit
+class TestParseJSON:
+    """Tests for tolerant JSON parsing."""
+
+    def test_valid_json_not_marked_repaired(self):
+        assert parse_json('{"nodes": []}') == ({"nodes": []}, False)
+
+    def test_trailing_commas_and_python_literals(self):
+        assert parse_json('```json\n{"a": [1, 2,], "b": True, "c": None,}\n```') == (
+            {"a": [1, 2], "b": True, "c": None}, True
+        )
+
+    def test_truncated_completion_closed(self):
+        data, repaired = parse_json('{"nodes": [{"id": "a"}, {"id": "b", "label": "Unfinish')
+        assert repaired
+        assert data == {"nodes": [{"id": "a"}, {"id": "b", "label": "Unfinish"}]}
+
+    def test_dangling_key_dropped(self):
+        assert parse_json('{"a": 1, "b":')[0] == {"a": 1}
+
+    def test_unrecoverable_raises(self):
+        with pytest.raises(ValueError):
+            parse_json("no json here")
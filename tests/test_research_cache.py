@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Unit tests for the research result cache.
+"""
+
+import os
+import sys
+import asyncio
+import pytest
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.research_cache import ResearchCache, normalize_query
+from app.models.model import ResearchResult
+from app.utils.cache import MemoryCache
+
+
+def _result(topic="topic"):
+    return ResearchResult(topic=topic, findings=[{"summary": "summary"}], sources=["source"])
+
+
+def _at(timestamp):
+    return patch("app.core.research_cache.time.time", return_value=timestamp)
+
+
+@pytest.mark.unit
+class TestResearchCache:
+    """Tests for freshness, staleness and near-duplicate matching."""
+
+    def test_normalize_query(self):
+        assert normalize_query("  What is RAG?! ") == normalize_query("what is rag")
+
+    async def test_fresh_hit(self):
+        cache = ResearchCache(MemoryCache("test"), fresh_ttl=100, stale_ttl=100)
+        with _at(1000.0):
+            await cache.store("What is RAG?", "research_report", _result())
+        with _at(1050.0):
+            result, stale = await cache.lookup("what is rag", "research_report")
+        assert result.topic == "topic"
+        assert stale is False
+
+    async def test_report_type_is_part_of_key(self):
+        cache = ResearchCache(MemoryCache("test"), fresh_ttl=100, stale_ttl=100)
+        await cache.store("query", "research_report", _result())
+        assert await cache.lookup("query", "quick_report") is None
+
+    async def test_stale_and_expired(self):
+        cache = ResearchCache(MemoryCache("test"), fresh_ttl=100, stale_ttl=100)
+        with _at(1000.0):
+            await cache.store("query", "research_report", _result())
+        with _at(1150.0):
+            _, stale = await cache.lookup("query", "research_report")
+            assert stale is True
+        with _at(1201.0):
+            assert await cache.lookup("query", "research_report") is None
+
+    async def test_revalidate_runs_once_per_key(self):
+        cache = ResearchCache(MemoryCache("test"), fresh_ttl=100, stale_ttl=100)
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return _result()
+
+        cache.revalidate("query", "research_report", fetch)
+        cache.revalidate("query", "research_report", fetch)
+        assert len(cache._refresh_tasks) == 1
+        await asyncio.gather(*cache._refresh_tasks)
+        assert calls == 1
+        assert not cache._refresh_tasks
+        assert not cache._refreshing
+
+        # Once finished, the key can be refreshed again
+        cache.revalidate("query", "research_report", fetch)
+        await asyncio.gather(*cache._refresh_tasks)
+        assert calls == 2
+
+    async def test_near_duplicate_match(self):
+        vectors = {
+            "how do vector databases work": [1.0, 0.0, 0.1],
+            "how does a vector database work": [1.0, 0.0, 0.12],
+            "best pizza in naples": [0.0, 1.0, 0.0],
+        }
+
+        async def embed(text):
+            return vectors[text]
+
+        cache = ResearchCache(MemoryCache("test"), fresh_ttl=100, stale_ttl=100,
+                              similarity_threshold=0.95, embed_fn=embed)
+        await cache.store("How do vector databases work?", "research_report", _result("vectors"))
+
+        result, _ = await cache.lookup("How does a vector database work?", "research_report")
+        assert result.topic == "vectors"
+        assert await cache.lookup("Best pizza in Naples", "research_report") is None
+
+    async def test_near_duplicate_index_is_per_process(self):
+        vectors = {
+            "how do vector databases work": [1.0, 0.0, 0.1],
+            "how does a vector database work": [1.0, 0.0, 0.12],
+        }
+
+        async def embed(text):
+            return vectors[text]
+
+        shared = MemoryCache("shared")
+        first = ResearchCache(shared, fresh_ttl=100, stale_ttl=100, similarity_threshold=0.95, embed_fn=embed)
+        await first.store("How do vector databases work?", "research_report", _result("vectors"))
+
+        # Another worker, or this one after a restart, over the same shared entries
+        second = ResearchCache(shared, fresh_ttl=100, stale_ttl=100, similarity_threshold=0.95, embed_fn=embed)
+        result, _ = await second.lookup("How do vector databases work?", "research_report")
+        assert result.topic == "vectors"
+        assert await second.lookup("How does a vector database work?", "research_report") is None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+"""
+Unit tests for research stage budgets, using a stubbed GPTResearcher (offline).
+"""
+
+import asyncio
+import os
+import sys
+import time
+import pytest
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require these; the stubbed researcher never uses them
+for key in ["GROQ_API_KEY", "QDRANT_URL", "QDRANT_API_KEY", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET",
+            "LIVEKIT_WS_URL", "DEEPGRAM_API_KEY", "ELEVENLABS_API_KEY"]:
+    os.environ.setdefault(key, "test")
+
+pytest.importorskip("gpt_researcher")
+
+from app.core.research_engine import (
+    DEGRADED_SUMMARY,
+    RESEARCH_BUDGETS,
+    EMPTY_SUMMARY,
+    PARTIAL_REPORT_MAX_CHARS,
+    GPTResearchEngine
+)
+
+SLOW = 10.0
+
+
+def stub_researcher(research_delay=0.0, report_delay=0.0, gathered="", report="Summarized report"):
+    """
+    GPTResearcher stand-in. Delays are per report type, so a deep run and its
+    quick-report fallback can behave differently.
+    """
+    class StubResearcher:
+        def __init__(self, query, report_type, config_path=None):
+            self.report_type = report_type
+            self.context = []
+            self.research_summary = ["https://example.com"]
+
+        async def conduct_research(self):
+            if gathered:
+                self.context = [gathered]
+            await asyncio.sleep(_delay(research_delay, self.report_type))
+            return True
+
+        async def write_report(self):
+            await asyncio.sleep(_delay(report_delay, self.report_type))
+            return report
+
+    return StubResearcher
+
+
+def _delay(delay, report_type):
+    return delay.get(report_type, 0.0) if isinstance(delay, dict) else delay
+
+
+async def _research(researcher, deep_research=False, **timeouts):
+    timeouts = {"research_timeout": 0.05, "report_timeout": 0.05, "total_timeout": 1.0, **timeouts}
+    with patch("app.core.research_engine.GPTResearcher", researcher):
+        return await GPTResearchEngine()._research_topic("query", deep_research=deep_research, **timeouts)
+
+
+@pytest.mark.unit
+class TestResearchBudgets:
+    """Tests for each timeout branch of a research run."""
+
+    async def test_within_budget(self):
+        result = await _research(stub_researcher())
+        assert result.findings[0]["summary"] == "Summarized report"
+        assert result.metadata["degraded"] is None
+        assert result.confidence_score == 1.0
+
+    async def test_research_timeout_summarizes_partial_context(self):
+        result = await _research(stub_researcher(research_delay=SLOW, gathered="raw context " * 1000))
+        assert result.findings[0]["summary"] == "Summarized report"
+        assert result.metadata["degraded"] == "research_timeout"
+        assert result.metadata["summarized"] is True
+        assert "partial_report" in result.metadata["timings"]
+
+    async def test_partial_summary_timeout_returns_excerpt(self):
+        result = await _research(stub_researcher(research_delay=SLOW, report_delay=SLOW, gathered="raw " * 5000))
+        finding = result.findings[0]
+        assert finding["summary"] == DEGRADED_SUMMARY
+        assert len(finding["details"][0]) <= PARTIAL_REPORT_MAX_CHARS
+        assert result.metadata["summarized"] is False
+        assert result.confidence_score == 0.0
+
+    async def test_quick_timeout_without_context_degrades(self):
+        result = await _research(stub_researcher(research_delay=SLOW))
+        assert result.findings[0]["summary"] == EMPTY_SUMMARY
+        assert result.findings[0]["details"] == []
+        assert result.metadata["degraded"] == "research_timeout"
+
+    async def test_deep_timeout_without_context_falls_back_to_quick_report(self):
+        researcher = stub_researcher(research_delay={"research_report": SLOW}, report="Quick report")
+        result = await _research(researcher, deep_research=True)
+        assert result.findings[0]["summary"] == "Quick report"
+        assert result.metadata["report_type"] == "quick_report"
+        assert result.metadata["degraded"] == "research_timeout"
+
+    async def test_report_timeout_degrades(self):
+        result = await _research(stub_researcher(report_delay=SLOW, gathered="gathered context"))
+        assert result.findings[0]["summary"] == DEGRADED_SUMMARY
+        assert result.findings[0]["details"] == ["gathered context"]
+        assert result.metadata["degraded"] == "report_timeout"
+
+    async def test_total_budget_caps_both_stages(self):
+        researcher = stub_researcher(research_delay=SLOW, report_delay=SLOW, gathered="gathered context")
+        started = time.perf_counter()
+        result = await _research(researcher, research_timeout=0.2, report_timeout=0.2, total_timeout=0.25)
+        assert time.perf_counter() - started < 0.4
+        assert result.metadata["degraded"] == "research_timeout"
+
+
+def _budgets(interactive, background):
+    return patch.dict(RESEARCH_BUDGETS, {
+        "interactive": {"research_timeout": interactive, "report_timeout": interactive, "total_timeout": interactive},
+        "background": {"research_timeout": background, "report_timeout": background, "total_timeout": background}
+    })
+
+
+@pytest.mark.unit
+class TestResearchBudgetClasses:
+    """Background jobs get their own, longer budget and never share an interactive run."""
+
+    async def test_background_budget_outlasts_interactive(self):
+        engine = GPTResearchEngine()
+        engine.cache = None
+        with _budgets(0.05, 1.0), patch("app.core.research_engine.GPTResearcher", stub_researcher(research_delay=0.1)):
+            interactive = await engine.research_topic("query")
+            background = await engine.research_topic("query", budget_class="background")
+
+        assert interactive.metadata["degraded"] == "research_timeout"
+        assert background.metadata["degraded"] is None
+        assert background.findings[0]["summary"] == "Summarized report"
+
+    async def test_budget_classes_do_not_coalesce(self):
+        engine = GPTResearchEngine()
+        engine.cache = None
+        runs = []
+        researcher = stub_researcher(research_delay=0.1)
+
+        def counting(*args, **kwargs):
+            runs.append(True)
+            return researcher(*args, **kwargs)
+
+        with _budgets(0.05, 1.0), patch("app.core.research_engine.GPTResearcher", counting):
+            interactive, background = await asyncio.gather(
+                engine.research_topic("query"),
+                engine.research_topic("query", budget_class="background")
+            )
+
+        assert len(runs) == 2
+        assert interactive.metadata["degraded"] == "research_timeout"
+        assert background.metadata["degraded"] is None
+
+    async def test_unknown_budget_class(self):
+        with pytest.raises(ValueError):
+            await GPTResearchEngine().research_topic("query", budget_class="unbounded")
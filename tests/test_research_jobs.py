@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+Unit tests for background research jobs and their stores (offline).
+"""
+
+import asyncio
+import os
+import sys
+import pytest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require these; the stubbed research never uses them
+for key in ["GROQ_API_KEY", "QDRANT_URL", "QDRANT_API_KEY", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET",
+            "LIVEKIT_WS_URL", "DEEPGRAM_API_KEY", "ELEVENLABS_API_KEY"]:
+    os.environ.setdefault(key, "test")
+
+from app.core.research_jobs import ResearchJobManager
+from app.models.model import ResearchJob, ResearchResult
+from app.service.research_job_store import (
+    InMemoryResearchJobStore,
+    RedisResearchJobStore,
+    create_research_job_store
+)
+
+
+def _result(topic="topic"):
+    return ResearchResult(topic=topic, findings=[{"summary": "summary"}], sources=["source"])
+
+
+def blocking_runner(release: asyncio.Event, started: list):
+    async def run(progress):
+        started.append(True)
+        progress("searching", 0.5)
+        await release.wait()
+        return _result()
+    return run
+
+
+async def _settle(manager: ResearchJobManager):
+    await asyncio.gather(*list(manager._tasks.values()))
+
+
+@pytest.mark.unit
+class TestResearchJobManager:
+    """Tests for submitting, following and capping research jobs."""
+
+    async def test_submit_and_status(self):
+        manager = ResearchJobManager(max_concurrent=2, store=InMemoryResearchJobStore(retention=60))
+
+        async def on_complete(job):
+            return f"answer to {job.query}"
+
+        async def run(progress):
+            return _result()
+
+        job = await manager.submit("user", "query", run, on_complete=on_complete)
+        assert (await manager.get(job.id)).status in ("pending", "running")
+        await _settle(manager)
+
+        finished = await manager.get(job.id)
+        assert finished.status == "completed"
+        assert finished.result.topic == "topic"
+        assert finished.response == "answer to query"
+
+    async def test_events_stream_until_finished(self):
+        manager = ResearchJobManager(max_concurrent=1, store=InMemoryResearchJobStore(retention=60))
+        release, started = asyncio.Event(), []
+        job = await manager.submit("user", "query", blocking_runner(release, started))
+
+        events = []
+
+        async def collect():
+            async for event in manager.events(job.id):
+                events.append(event)
+                if event["data"]["stage"] == "searching":
+                    release.set()
+
+        await asyncio.wait_for(collect(), 1)
+        assert events[-1]["event"] == "completed"
+        assert events[-1]["data"]["stage"] == "done"
+        assert any(event["data"]["stage"] == "searching" for event in events)
+
+    async def test_cap_is_shared_between_workers(self):
+        # Two managers on one store stand in for two workers sharing Redis
+        store = InMemoryResearchJobStore(retention=60)
+        first_worker = ResearchJobManager(max_concurrent=1, store=store, poll_interval=0.01)
+        second_worker = ResearchJobManager(max_concurrent=1, store=store, poll_interval=0.01)
+        release, started = asyncio.Event(), []
+
+        first = await first_worker.submit("user", "first", blocking_runner(release, started))
+        second = await second_worker.submit("user", "second", blocking_runner(release, started))
+        await asyncio.sleep(0.05)
+        assert len(started) == 1
+        assert (await second_worker.get(second.id)).status == "pending"
+
+        # Either worker reports on either job
+        assert (await second_worker.get(first.id)).status == "running"
+
+        release.set()
+        await asyncio.gather(_settle(first_worker), _settle(second_worker))
+        assert len(started) == 2
+        assert (await first_worker.get(second.id)).status == "completed"
+
+    async def test_events_follow_job_on_other_worker(self):
+        store = InMemoryResearchJobStore(retention=60)
+        owner = ResearchJobManager(max_concurrent=1, store=store)
+        observer = ResearchJobManager(max_concurrent=1, store=store, poll_interval=0.01)
+        release, started = asyncio.Event(), []
+        job = await owner.submit("user", "query", blocking_runner(release, started))
+        await asyncio.sleep(0.01)
+
+        events = []
+
+        async def collect():
+            async for event in observer.events(job.id):
+                events.append(event)
+                release.set()
+
+        await asyncio.wait_for(collect(), 1)
+        assert events[0]["event"] == "progress"
+        assert events[-1]["event"] == "completed"
+
+    async def test_failure_is_recorded_and_frees_slot(self):
+        manager = ResearchJobManager(max_concurrent=1, store=InMemoryResearchJobStore(retention=60))
+
+        async def failing(progress):
+            raise RuntimeError("search provider down")
+
+        async def succeeding(progress):
+            return _result()
+
+        failed = await manager.submit("user", "first", failing)
+        succeeded = await manager.submit("user", "second", succeeding)
+        await asyncio.wait_for(_settle(manager), 1)
+
+        job = await manager.get(failed.id)
+        assert job.status == "failed"
+        assert job.error == "search provider down"
+        assert (await manager.get(succeeded.id)).status == "completed"
+
+    async def test_unknown_job(self):
+        manager = ResearchJobManager(max_concurrent=1, store=InMemoryResearchJobStore(retention=60))
+        assert await manager.get("missing") is None
+        assert [event async for event in manager.events("missing")] == []
+
+
+@pytest.mark.unit
+class TestResearchJobStores:
+    """Tests for job record retention, slots and the Redis store."""
+
+    async def test_memory_retention(self):
+        store = InMemoryResearchJobStore(retention=60)
+        job = ResearchJob(id="job", user_id="user", query="query")
+        with patch("app.service.research_job_store.time.monotonic", return_value=0.0):
+            await store.save(job)
+        with patch("app.service.research_job_store.time.monotonic", return_value=61.0):
+            assert await store.get("job") is None
+
+    async def test_memory_slot_lease_expires(self):
+        store = InMemoryResearchJobStore(retention=60, lease=10)
+        with patch("app.service.research_job_store.time.monotonic", return_value=0.0):
+            assert await store.acquire_slot("first", limit=1) is True
+            assert await store.acquire_slot("second", limit=1) is False
+            # Renewing a held slot succeeds
+            assert await store.acquire_slot("first", limit=1) is True
+        with patch("app.service.research_job_store.time.monotonic", return_value=11.0):
+            assert await store.acquire_slot("second", limit=1) is True
+
+    async def test_redis_round_trip(self):
+        client = MagicMock()
+        store = RedisResearchJobStore(retention=60)
+        job = ResearchJob(id="job", user_id="user", query="query", status="running")
+
+        with patch("app.service.redis_service.RedisService.get_instance", return_value=client):
+            await store.save(job)
+            key, ttl, payload = client.setex.call_args[0]
+            assert key == "research:job:job"
+            assert ttl == 60
+
+            client.get.return_value = payload
+            restored = await store.get("job")
+
+            client.eval.return_value = 1
+            assert await store.acquire_slot("job", limit=2) is True
+            args = client.eval.call_args[0]
+            assert args[1:3] == (1, "research:job:slots")
+            assert args[5:] == (2, "job")
+
+            await store.release_slot("job")
+            client.zrem.assert_called_once_with("research:job:slots", "job")
+
+        assert restored.status == "running"
+
+
+@pytest.mark.unit
+def test_create_research_job_store():
+    assert isinstance(create_research_job_store("memory", 60), InMemoryResearchJobStore)
+    assert isinstance(create_research_job_store("redis", 60), RedisResearchJobStore)
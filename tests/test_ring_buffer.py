@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Unit tests for the audio ring buffer.
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ring_buffer import AudioRingBuffer
+
+
+@pytest.mark.unit
+class TestAudioRingBuffer:
+    """Tests for FIFO order, wraparound and zero-copy reads."""
+
+    def test_fifo_across_wraparound(self):
+        ring = AudioRingBuffer(8)
+        ring.write(np.arange(6, dtype=np.int16))
+        assert list(ring.read(4)) == [0, 1, 2, 3]
+        ring.write(np.arange(6, 11, dtype=np.int16))
+        # The window now wraps past the end of the storage but still reads contiguously
+        assert list(ring.peek(7)) == [4, 5, 6, 7, 8, 9, 10]
+        assert list(ring.peek(3, offset=4)) == [8, 9, 10]
+
+    def test_reads_are_views(self):
+        ring = AudioRingBuffer(16)
+        ring.write(np.ones(10, dtype=np.int16))
+        view = ring.peek(10)
+        assert view.base is not None
+        assert not view.flags.owndata
+
+    def test_overrun_drops_oldest(self):
+        ring = AudioRingBuffer(4)
+        ring.write(np.arange(3, dtype=np.int16))
+        assert ring.write(np.arange(3, 6, dtype=np.int16)) == 2
+        assert list(ring.peek(len(ring))) == [2, 3, 4, 5]
+        ring.write(np.arange(10, dtype=np.int16))
+        assert list(ring.peek(4)) == [6, 7, 8, 9]
+        assert ring.overruns == 6
+
+    def test_peek_past_end_rejected(self):
+        ring = AudioRingBuffer(4)
+        ring.write(np.arange(2, dtype=np.int16))
+        with pytest.raises(ValueError):
+            ring.peek(3)
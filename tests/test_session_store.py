@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Unit tests for the chat session stores.
+"""
+
+import os
+import sys
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.model import ChatSession, Message
+from app.service.session_store import (
+    InMemorySessionStore,
+    RedisSessionStore,
+    create_session_store
+)
+
+
+def _at(timestamp):
+    return patch("app.service.session_store.time.monotonic", return_value=timestamp)
+
+
+@pytest.mark.unit
+class TestInMemorySessionStore:
+    """Tests for the heap-based in-memory store."""
+
+    async def test_save_and_get(self):
+        store = InMemorySessionStore(ttl=60)
+        session = ChatSession(user_id="user")
+        await store.save(session)
+
+        assert await store.get("user", session.id) is session
+        assert await store.get("other_user", session.id) is None
+
+    async def test_sessions_get_unique_ids(self):
+        assert ChatSession(user_id="user").id != ChatSession(user_id="user").id
+
+    async def test_expiry(self):
+        store = InMemorySessionStore(ttl=60)
+        session = ChatSession(user_id="user")
+        with _at(0.0):
+            await store.save(session)
+        with _at(59.0):
+            assert await store.get("user", session.id) is session
+        with _at(61.0):
+            assert await store.get("user", session.id) is None
+        assert len(store) == 0
+
+    async def test_save_refreshes_expiry(self):
+        store = InMemorySessionStore(ttl=60)
+        session = ChatSession(user_id="user")
+        with _at(0.0):
+            await store.save(session)
+        with _at(50.0):
+            await store.save(session)
+        with _at(100.0):
+            assert await store.get("user", session.id) is session
+        with _at(111.0):
+            assert await store.get("user", session.id) is None
+
+    async def test_heap_compaction(self):
+        store = InMemorySessionStore(ttl=60)
+        session = ChatSession(user_id="user")
+        with _at(0.0):
+            for _ in range(500):
+                await store.save(session)
+        assert len(store._heap) <= 2 * len(store) + 65
+
+    async def test_delete(self):
+        store = InMemorySessionStore(ttl=60)
+        session = ChatSession(user_id="user")
+        await store.save(session)
+        assert await store.delete("user", session.id) is True
+        assert await store.get("user", session.id) is None
+
+    async def test_update_applies_to_stored_session(self):
+        store = InMemorySessionStore(ttl=60)
+        session = ChatSession(user_id="user")
+        await store.save(session)
+
+        updated = await store.update("user", session.id, lambda s: s.messages.append(Message(content="hi", role="user")))
+        assert updated.messages[0].content == "hi"
+        assert await store.update("user", ChatSession(user_id="user").id, lambda s: None) is None
+
+
+@pytest.mark.unit
+class TestRedisSessionStore:
+    """Tests for the Redis store using a mocked client."""
+
+    async def test_round_trip(self):
+        client = MagicMock()
+        store = RedisSessionStore(ttl=60)
+        session = ChatSession(user_id="user", messages=[Message(content="hi", role="user")])
+
+        with patch("app.service.redis_service.RedisService.get_instance", return_value=client):
+            await store.save(session)
+            key, ttl, payload = client.setex.call_args[0]
+            assert key == f"chat:session:user:{session.id}"
+            assert ttl == 60
+
+            client.get.return_value = payload
+            restored = await store.get("user", session.id)
+
+        assert restored.id == session.id
+        assert restored.messages[0].content == "hi"
+
+    async def test_connection_setup_runs_off_the_loop(self):
+        loop_thread = threading.get_ident()
+        threads = []
+
+        def get_instance():
+            threads.append(threading.get_ident())
+            client = MagicMock()
+            client.get.return_value = None
+            return client
+
+        with patch("app.service.redis_service.RedisService.get_instance", side_effect=get_instance):
+            assert await RedisSessionStore(ttl=60).get("user", ChatSession(user_id="user").id) is None
+
+        assert threads and loop_thread not in threads
+
+    async def test_update_retries_when_session_changes(self):
+        from redis.exceptions import WatchError
+
+        session = ChatSession(user_id="user", messages=[Message(content="hi", role="user")])
+        pipe = MagicMock()
+        pipe.get.return_value = session.model_dump_json()
+        # Another worker saves the session between our read and write once
+        pipe.execute.side_effect = [WatchError(), [True]]
+        client = MagicMock()
+        client.pipeline.return_value.__enter__.return_value = pipe
+        store = RedisSessionStore(ttl=60)
+
+        def reply(latest):
+            latest.messages.append(Message(content="answer", role="assistant"))
+
+        with patch("app.service.redis_service.RedisService.get_instance", return_value=client):
+            updated = await store.update("user", session.id, reply)
+
+        assert pipe.watch.call_count == 2
+        assert [message.content for message in updated.messages] == ["hi", "answer"]
+        key, ttl, payload = pipe.setex.call_args[0]
+        assert ChatSession.model_validate_json(payload).messages[-1].content == "answer"
+
+
+@pytest.mark.unit
+def test_create_session_store():
+    assert isinstance(create_session_store("memory", 60), InMemorySessionStore)
+    assert isinstance(create_session_store("redis", 60), RedisSessionStore)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Unit tests for singleflight request coalescing.
+"""
+
+import os
+import sys
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.singleflight import SingleFlight, make_key
+
+
+@pytest.mark.unit
+class TestMakeKey:
+    """Tests for key generation."""
+
+    def test_deterministic(self):
+        assert make_key("query", {"b": 1, "a": 2}) == make_key("query", {"a": 2, "b": 1})
+
+    def test_distinct(self):
+        assert make_key("query1") != make_key("query2")
+
+
+@pytest.mark.unit
+class TestSingleFlightLocal:
+    """Tests for in-process coalescing."""
+
+    async def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "result"
+
+        results = await asyncio.gather(*[flight.do("key", compute) for _ in range(10)])
+
+        assert results == ["result"] * 10
+        assert calls == 1
+        assert flight.stats["leaders"] == 1
+        assert flight.stats["coalesced"] == 9
+        assert flight.in_flight() == 0
+
+    async def test_different_keys_run_separately(self):
+        flight = SingleFlight("test")
+        calls = []
+
+        async def compute(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            flight.do("a", lambda: compute("a")),
+            flight.do("b", lambda: compute("b"))
+        )
+
+        assert results == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    async def test_sequential_calls_recompute(self):
+        flight = SingleFlight("test")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("key", compute) == 1
+        assert await flight.do("key", compute) == 2
+
+    async def test_errors_propagate_to_all_callers(self):
+        flight = SingleFlight("test")
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            flight.do("key", compute),
+            flight.do("key", compute),
+            return_exceptions=True
+        )
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.in_flight() == 0
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        flight = SingleFlight("test")
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(flight.do("key", compute))
+        second = asyncio.create_task(flight.do("key", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == "done"
+
+
+@pytest.mark.unit
+class TestSingleFlightDistributed:
+    """Tests for Redis-backed coalescing."""
+
+    async def test_leader_publishes_result(self):
+        client = MagicMock()
+        client.set.return_value = True
+        flight = SingleFlight("test", distributed=True)
+
+        async def compute():
+            return {"value": 1}
+
+        with patch("app.service.redis_service.RedisService.get_instance", return_value=client):
+            result = await flight.do("key", compute)
+
+        assert result == {"value": 1}
+        client.setex.assert_called_once()
+        assert client.setex.call_args[0][0] == "singleflight:test:result:key"
+        client.eval.assert_called_once()
+
+    async def test_follower_reads_remote_result(self):
+        client = MagicMock()
+        client.set.return_value = False
+        client.get.return_value = '{"value": 2}'
+        flight = SingleFlight("test", distributed=True)
+
+        async def compute():
+            raise AssertionError("follower must not compute")
+
+        with patch("app.service.redis_service.RedisService.get_instance", return_value=client):
+            result = await flight.do("key", compute)
+
+        assert result == {"value": 2}
+        assert flight.stats["remote_hits"] == 1
+
+    async def test_falls_back_to_local_when_redis_unavailable(self):
+        flight = SingleFlight("test", distributed=True)
+
+        async def compute():
+            return "local"
+
+        with patch(
+            "app.service.redis_service.RedisService.get_instance",
+            side_effect=Exception("connection refused")
+        ):
+            assert await flight.do("key", compute) == "local"
+
+    async def test_slow_connect_does_not_block_loop(self):
+        flight = SingleFlight("test", distributed=True)
+        ticks = []
+
+        def slow_get_instance():
+            time.sleep(0.2)
+            raise Exception("connection timed out")
+
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0.01)
+
+        async def compute():
+            return "local"
+
+        task = asyncio.ensure_future(ticker())
+        with patch("app.service.redis_service.RedisService.get_instance", side_effect=slow_get_instance):
+            assert await flight.do("key", compute) == "local"
+        task.cancel()
+        assert len(ticks) > 5
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Unit tests for the streaming speech-to-text providers (offline).
+"""
+
+import asyncio
+import json
+import os
+import sys
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require these; the local provider never uses them
+for key in ["GROQ_API_KEY", "QDRANT_URL", "QDRANT_API_KEY", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET",
+            "LIVEKIT_WS_URL", "DEEPGRAM_API_KEY", "ELEVENLABS_API_KEY"]:
+    os.environ.setdefault(key, "test")
+
+from app.service.stt_providers import DeepgramStreamingSession, LocalStreamingSession
+
+SAMPLE_RATE = 16000
+
+
+def frame(loud: bool, ms: int = 100) -> bytes:
+    samples = int(SAMPLE_RATE * ms / 1000)
+    if not loud:
+        return np.zeros(samples, dtype=np.int16).tobytes()
+    t = np.arange(samples) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16).tobytes()
+
+
+KEEPALIVE = json.dumps({"type": "KeepAlive"})
+
+
+class FakeConnection:
+    """Stand-in for a Deepgram live websocket that records what was sent"""
+
+    def __init__(self):
+        self.sent = []
+        self.finished = False
+
+    async def send(self, data):
+        self.sent.append(data)
+
+    async def finish(self):
+        self.finished = True
+
+
+async def collect(session):
+    return [(event.type, event.text) for event in [e async for e in session.events()]]
+
+
+@pytest.mark.unit
+class TestLocalStreamingSession:
+    """Tests for local endpointing and event ordering."""
+
+    async def test_utterance_finalized_after_silence(self):
+        calls = []
+
+        async def transcriber(wav):
+            calls.append(wav)
+            return f"utterance {len(calls)}", 0.9
+
+        session = LocalStreamingSession(SAMPLE_RATE, endpointing_ms=300, transcriber=transcriber)
+        await session.start()
+        for loud in [False, True, True, False, False, False, True, False, False, False]:
+            await session.send(frame(loud))
+        await session.finish()
+
+        events = await collect(session)
+        assert events.count(("speech_started", "")) == 2
+        assert [event for event in events if event[0] != "speech_started"] == [
+            ("final", "utterance 1"), ("endpoint", ""),
+            ("final", "utterance 2"), ("endpoint", ""),
+        ]
+        assert len(calls) == 2
+        assert calls[0][:4] == b"RIFF"
+
+    async def test_silence_only_produces_nothing(self):
+        async def transcriber(wav):
+            raise AssertionError("silence should not be transcribed")
+
+        session = LocalStreamingSession(SAMPLE_RATE, endpointing_ms=300, transcriber=transcriber)
+        await session.start()
+        for _ in range(10):
+            await session.send(frame(False))
+        await session.finish()
+        assert await collect(session) == []
+
+    async def test_interim_results(self):
+        async def transcriber(wav):
+            return "partial", 0.5
+
+        session = LocalStreamingSession(SAMPLE_RATE, endpointing_ms=300, transcriber=transcriber, interim_ms=200)
+        await session.start()
+        for loud in [True, True, True, False, False, False]:
+            await session.send(frame(loud))
+        await session.finish()
+        events = await collect(session)
+        assert ("interim", "partial") in events
+        assert events[-2:] == [("final", "partial"), ("endpoint", "")]
+
+    async def test_flush_finalizes_without_waiting_for_silence(self):
+        async def transcriber(wav):
+            return "hello", 0.9
+
+        session = LocalStreamingSession(SAMPLE_RATE, endpointing_ms=300, transcriber=transcriber)
+        await session.start()
+        await session.send(frame(True))
+        await session.flush()
+        await session.finish()
+        assert await collect(session) == [("speech_started", ""), ("final", "hello"), ("endpoint", "")]
+
+
+@pytest.mark.unit
+class TestDeepgramStreamingSession:
+    """Tests for keeping the Deepgram socket alive and reopening it, with the websocket faked."""
+
+    async def test_keepalive_sent_while_idle(self):
+        connection = FakeConnection()
+        session = DeepgramStreamingSession(SAMPLE_RATE, endpointing_ms=300, keepalive_interval=0.02)
+        with patch.object(session, "_open_connection", AsyncMock(return_value=connection)):
+            await session.start()
+            await asyncio.sleep(0.07)
+            await session.finish()
+
+        assert KEEPALIVE in connection.sent
+        assert connection.finished
+
+    async def test_no_keepalive_while_audio_flows(self):
+        connection = FakeConnection()
+        session = DeepgramStreamingSession(SAMPLE_RATE, endpointing_ms=300, keepalive_interval=0.05)
+        with patch.object(session, "_open_connection", AsyncMock(return_value=connection)):
+            await session.start()
+            for _ in range(10):
+                await session.send(frame(True, ms=10))
+                await asyncio.sleep(0.01)
+            await session.finish()
+
+        assert KEEPALIVE not in connection.sent
+
+    async def test_reconnects_after_idle_close(self):
+        first, second = FakeConnection(), FakeConnection()
+        open_connection = AsyncMock(side_effect=[first, second])
+        session = DeepgramStreamingSession(SAMPLE_RATE, endpointing_ms=300)
+        with patch.object(session, "_open_connection", open_connection):
+            await session.start()
+            # Deepgram drops the socket after an idle timeout
+            await session._on_close(None, None)
+            await asyncio.wait_for(session._reconnect_task, 1)
+            await session.send(b"audio")
+            await session.finish()
+            # Closing after finish does not reopen
+            await session._on_close(None, None)
+
+        assert open_connection.await_count == 2
+        assert first.sent == []
+        assert second.sent == [b"audio"]
+        assert second.finished
+
+    async def test_events_end_when_reconnect_fails(self):
+        open_connection = AsyncMock(side_effect=[FakeConnection(), RuntimeError("unreachable")])
+        session = DeepgramStreamingSession(SAMPLE_RATE, endpointing_ms=300)
+        with patch.object(session, "_open_connection", open_connection), \
+                patch("app.service.stt_providers.RECONNECT_DELAY", 0):
+            await session.start()
+            await session._on_close(None, None)
+            assert await asyncio.wait_for(collect(session), 1) == []
+            await session.finish()
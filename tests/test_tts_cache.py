@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Unit tests for the synthesized-audio cache (offline).
+"""
+
+import asyncio
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require these; the fake provider never uses them
+for key in ["GROQ_API_KEY", "QDRANT_URL", "QDRANT_API_KEY", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET",
+            "LIVEKIT_WS_URL", "DEEPGRAM_API_KEY", "ELEVENLABS_API_KEY"]:
+    os.environ.setdefault(key, "test")
+
+from app.service.tts_cache import AudioCache, CachedTTSProvider, DiskAudioStore
+from app.service.tts_providers import ElevenLabsTTSProvider, FakeTTSProvider
+
+SAMPLE_RATE = 16000
+
+
+def cached_provider(cache=None, **kwargs):
+    fake = FakeTTSProvider(SAMPLE_RATE, ms_per_char=10, chunk_ms=20, **kwargs)
+    return fake, CachedTTSProvider(fake, cache or AudioCache(max_bytes=10_000_000))
+
+
+@pytest.mark.unit
+class TestAudioCache:
+    """Tests for the byte-bounded LRU and shared tier."""
+
+    async def test_evicts_least_recently_used_by_bytes(self):
+        cache = AudioCache(max_bytes=100)
+        await cache.set("a", b"x" * 40)
+        await cache.set("b", b"x" * 40)
+        await cache.get("a")
+        await cache.set("c", b"x" * 40)
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert (cache.size_bytes, cache.evictions) == (80, 1)
+
+    async def test_oversized_entry_not_kept_in_memory(self):
+        cache = AudioCache(max_bytes=10)
+        await cache.set("big", b"x" * 11)
+        assert len(cache) == 0
+
+    async def test_disk_tier_backfills_memory(self, tmp_path):
+        await AudioCache(1000, shared=DiskAudioStore(str(tmp_path))).set("key", b"pcm")
+        fresh = AudioCache(1000, shared=DiskAudioStore(str(tmp_path)))
+        assert await fresh.get("key") == b"pcm"
+        assert len(fresh) == 1
+
+
+@pytest.mark.unit
+class TestCachedTTSProvider:
+    """Tests for serving repeated utterances without synthesis."""
+
+    async def test_repeat_served_from_cache(self):
+        fake, provider = cached_provider()
+        first, _ = await provider.synthesize("Hello there.")
+        second, _ = await provider.synthesize("  Hello   there. ")
+        assert first == second
+        assert fake.requests == ["Hello there."]
+        assert provider.cache.stats.hits == 1
+
+    async def test_key_depends_on_voice_and_settings(self):
+        cache = AudioCache(max_bytes=1000)
+        provider = CachedTTSProvider(ElevenLabsTTSProvider(SAMPLE_RATE, "voice-a", "model-1"), cache)
+        assert provider.cache_key("Hi.") != provider.cache_key("Hi.", "voice-b")
+        assert provider.cache_key("Hi.") == provider.cache_key("Hi.", "voice-a")
+        for other in [ElevenLabsTTSProvider(SAMPLE_RATE, "voice-a", "model-2"),
+                      ElevenLabsTTSProvider(24000, "voice-a", "model-1")]:
+            assert CachedTTSProvider(other, cache).cache_key("Hi.") != provider.cache_key("Hi.")
+
+    async def test_cancelled_synthesis_not_cached(self):
+        fake, provider = cached_provider(chunk_delay=0.005)
+        cancel = asyncio.Event()
+        async for _ in provider.stream("A sentence long enough for several chunks.", cancel=cancel):
+            cancel.set()
+        assert len(provider.cache) == 0
+        await provider.synthesize("A sentence long enough for several chunks.")
+        assert len(fake.requests) == 2
+
+    async def test_long_text_bypasses_cache(self):
+        fake, provider = cached_provider()
+        provider.max_chars = 5
+        await provider.synthesize("Too long to cache.")
+        await provider.synthesize("Too long to cache.")
+        assert len(fake.requests) == 2
+        assert provider.cache.stats.sets == 0
+
+    async def test_prewarm_synthesizes_only_missing(self):
+        fake, provider = cached_provider()
+        assert await provider.prewarm(["One.", "Two."]) == 2
+        assert await provider.prewarm(["One.", "Two.", "Three."]) == 1
+        assert fake.requests == ["One.", "Two.", "Three."]
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Unit tests for the streaming text-to-speech providers (offline).
+"""
+
+import asyncio
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require these; the fake provider never uses them
+for key in ["GROQ_API_KEY", "QDRANT_URL", "QDRANT_API_KEY", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET",
+            "LIVEKIT_WS_URL", "DEEPGRAM_API_KEY", "ELEVENLABS_API_KEY"]:
+    os.environ.setdefault(key, "test")
+
+from app.service.tts_providers import ElevenLabsTTSProvider, FakeTTSProvider, TTSProvider
+
+SAMPLE_RATE = 16000
+
+
+class RaggedProvider(TTSProvider):
+    """Yields chunks that split samples, like network reads do"""
+
+    def __init__(self):
+        super().__init__(SAMPLE_RATE)
+        self.closed = False
+
+    async def _stream(self, text, voice_id):
+        try:
+            for chunk in [b"\x01", b"\x02\x03", b"\x04\x05\x06", b"\x07"]:
+                yield chunk
+        finally:
+            self.closed = True
+
+
+@pytest.mark.unit
+class TestTTSProviders:
+    """Tests for chunked PCM output and cancellation."""
+
+    async def test_fake_provider_streams_pcm_chunks(self):
+        provider = FakeTTSProvider(SAMPLE_RATE, ms_per_char=10, chunk_ms=20)
+        chunks = [chunk async for chunk in provider.stream("0123456789")]
+        assert len(chunks) == 5
+        assert all(len(chunk) == SAMPLE_RATE * 20 // 1000 * 2 for chunk in chunks)
+        pcm, rate = await provider.synthesize("0123456789")
+        assert (len(pcm), rate) == (SAMPLE_RATE * 100 // 1000 * 2, SAMPLE_RATE)
+        assert provider.requests == ["0123456789", "0123456789"]
+
+    async def test_chunks_hold_whole_samples(self):
+        provider = RaggedProvider()
+        chunks = [chunk async for chunk in provider.stream("hi")]
+        assert all(len(chunk) % 2 == 0 for chunk in chunks)
+        assert b"".join(chunks) == bytes(range(1, 7))
+        assert provider.closed
+
+    async def test_cancel_event_stops_synthesis(self):
+        provider = FakeTTSProvider(SAMPLE_RATE, ms_per_char=100, chunk_ms=20, chunk_delay=0.01)
+        cancel = asyncio.Event()
+        received = []
+        async for chunk in provider.stream("a long sentence to speak", cancel=cancel):
+            received.append(chunk)
+            if len(received) == 2:
+                cancel.set()
+        assert len(received) == 2
+        assert provider.chunks_synthesized <= 3
+
+        pcm, _ = await provider.synthesize("never spoken", cancel=cancel)
+        assert pcm == b""
+
+    async def test_task_cancellation_releases_upstream(self):
+        provider = FakeTTSProvider(SAMPLE_RATE, ms_per_char=100, chunk_ms=20, chunk_delay=0.01)
+        task = asyncio.ensure_future(provider.synthesize("a long sentence to speak"))
+        await asyncio.sleep(0.035)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        produced = provider.chunks_synthesized
+        await asyncio.sleep(0.05)
+        assert provider.chunks_synthesized == produced < 10
+
+    def test_elevenlabs_falls_back_to_supported_rate(self):
+        assert ElevenLabsTTSProvider(24000, "voice", "model").sample_rate == 24000
+        assert ElevenLabsTTSProvider(48000, "voice", "model").sample_rate == 16000
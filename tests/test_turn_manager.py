@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Unit tests for voice turn management and barge-in (offline).
+"""
+
+import asyncio
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.service.turn_manager import Turn, TurnManager
+
+
+def slow_response(started: asyncio.Event, cancelled: list):
+    async def respond(turn: Turn):
+        turn.generated_text = "First sentence. Second sentence that was never spoken."
+        turn.tokens = 10
+        turn.spoken.append("First sentence.")
+        turn.audio_bytes_synthesized = 3000
+        turn.audio_bytes_sent = 1000
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(turn)
+            raise
+    return respond
+
+
+@pytest.mark.unit
+class TestTurnManager:
+    """Tests for cancelling responses when the user speaks."""
+
+    async def test_interrupt_cancels_and_records_savings(self):
+        started, cancelled = asyncio.Event(), []
+        manager = TurnManager("session")
+        task = manager.start(slow_response(started, cancelled))
+        await started.wait()
+
+        assert await manager.interrupt() is True
+        await asyncio.wait([task])
+        assert task.cancelled() and len(cancelled) == 1
+        assert manager.stats.interruptions == 1
+        assert manager.stats.tokens_saved > 0
+        assert manager.stats.bytes_saved == 2000
+
+    async def test_flushed_audio_counts_as_saved(self):
+        async def flush():
+            return 640
+
+        manager = TurnManager("session", flush_audio=flush)
+        # Response already generated, but its audio is still queued for playback
+        manager.start(lambda turn: asyncio.sleep(0))
+        await asyncio.sleep(0.01)
+        assert await manager.interrupt() is True
+        assert manager.stats.bytes_saved == 640
+
+    async def test_interrupt_without_response_is_noop(self):
+        async def flush():
+            return 0
+
+        manager = TurnManager("session", flush_audio=flush)
+        assert await manager.interrupt() is False
+        assert manager.stats.as_dict() == {"interruptions": 0, "tokens_saved": 0, "bytes_saved": 0}
+
+    async def test_new_response_preempts_current(self):
+        started, cancelled = asyncio.Event(), []
+        manager = TurnManager("session")
+        first = manager.start(slow_response(started, cancelled))
+        await started.wait()
+        second = manager.start(lambda turn: asyncio.sleep(0))
+        await asyncio.wait([first, second])
+        assert first.cancelled() and not second.cancelled()
+        await manager.close()
+        assert not manager.responding
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+Unit tests for voice activity detection and utterance segmentation.
+"""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.ring_buffer import AudioRingBuffer
+from app.utils.vad import EnergyVAD, VADSegmenter, create_speech_detector
+
+SAMPLE_RATE = 16000
+
+
+def frame(loud: bool, ms: int = 100) -> bytes:
+    samples = int(SAMPLE_RATE * ms / 1000)
+    if not loud:
+        return np.zeros(samples, dtype=np.int16).tobytes()
+    t = np.arange(samples) / SAMPLE_RATE
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16).tobytes()
+
+
+def ms_of(audio: bytes) -> float:
+    return len(audio) / 2 * 1000 / SAMPLE_RATE
+
+
+def run(segmenter, chunks):
+    events = []
+    for chunk in chunks:
+        events.extend(segmenter.process(chunk))
+    return events
+
+
+@pytest.mark.unit
+class TestVADSegmenter:
+    """Tests for silence dropping and end-of-utterance detection."""
+
+    def test_leading_silence_dropped_except_pre_roll(self):
+        segmenter = VADSegmenter(SAMPLE_RATE, silence_ms=300, pre_roll_ms=200)
+        events = run(segmenter, [frame(False)] * 10 + [frame(True)])
+
+        assert [event.type for event in events] == ["speech_start", "audio"]
+        assert ms_of(events[1].audio) == 300
+        assert segmenter.dropped_ms == 800
+
+    def test_speech_end_after_configured_silence(self):
+        segmenter = VADSegmenter(SAMPLE_RATE, silence_ms=300, pre_roll_ms=0)
+        events = run(segmenter, [frame(True), frame(False), frame(False), frame(False), frame(False)])
+
+        assert [event.type for event in events if event.type != "audio"] == ["speech_start", "speech_end"]
+        assert events[-1].type == "speech_end"
+        # Trailing silence up to the endpoint is kept; the frame after it is not
+        assert ms_of(b"".join(event.audio for event in events)) == 400
+        assert not segmenter.in_speech
+
+    def test_short_pause_does_not_end_utterance(self):
+        segmenter = VADSegmenter(SAMPLE_RATE, silence_ms=300, pre_roll_ms=0)
+        events = run(segmenter, [frame(True), frame(False), frame(False), frame(True)])
+        assert [event.type for event in events if event.type != "audio"] == ["speech_start"]
+        assert segmenter.in_speech
+
+    def test_chunk_boundaries_do_not_matter(self):
+        stream = b"".join([frame(False), frame(True), frame(True), frame(False, 400)])
+        whole = run(VADSegmenter(SAMPLE_RATE, silence_ms=300), [stream])
+        ragged = run(VADSegmenter(SAMPLE_RATE, silence_ms=300), [stream[i:i + 777] for i in range(0, len(stream), 777)])
+
+        def summary(events):
+            return [event.type for event in events if event.type != "audio"], b"".join(event.audio for event in events)
+
+        assert summary(whole) == summary(ragged)
+        assert summary(whole)[0] == ["speech_start", "speech_end"]
+
+    def test_ring_buffer_segmentation_matches_bytes(self):
+        stream = b"".join([frame(False, 500), frame(True), frame(False, 100), frame(True), frame(False, 400)])
+        expected = run(VADSegmenter(SAMPLE_RATE, silence_ms=300), [stream])
+
+        segmenter = VADSegmenter(SAMPLE_RATE, silence_ms=300)
+        ring = AudioRingBuffer(SAMPLE_RATE)
+        events = []
+        samples = np.frombuffer(stream, dtype=np.int16)
+        for start in range(0, len(samples), 480):
+            ring.write(samples[start:start + 480])
+            events.extend(segmenter.consume(ring, chunk_samples=4000))
+
+        assert [event.type for event in events if event.type != "audio"] == ["speech_start", "speech_end"]
+        assert b"".join(event.audio for event in events) == b"".join(event.audio for event in expected)
+        # Speech is handed on in bounded chunks rather than one block per utterance
+        chunks = [event.audio for event in events if event.type == "audio"]
+        assert len(chunks) > 1
+        assert max(len(chunk) for chunk in chunks) <= (4000 + segmenter.frame_samples) * 2
+        assert segmenter.dropped_ms == 300
+        # Only the pre-roll is kept once the utterance is over
+        assert len(ring) <= segmenter.pre_roll_samples
+
+    def test_flush_ends_open_utterance(self):
+        segmenter = VADSegmenter(SAMPLE_RATE, silence_ms=300)
+        run(segmenter, [frame(True)])
+        assert [event.type for event in segmenter.flush()] == ["speech_end"]
+        assert segmenter.flush() == []
+
+    def test_detector_factory(self):
+        assert isinstance(create_speech_detector("energy", SAMPLE_RATE, 100.0), EnergyVAD)
+        assert create_speech_detector("energy", SAMPLE_RATE, 100.0)(np.frombuffer(frame(True), dtype=np.int16))
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Unit tests for voice agent session setup and teardown, with LiveKit and STT stubbed (offline).
+"""
+
+import os
+import sys
+import pytest
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings require these; the stubbed services never use them
+for key in ["GROQ_API_KEY", "QDRANT_URL", "QDRANT_API_KEY", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET",
+            "LIVEKIT_WS_URL", "DEEPGRAM_API_KEY", "ELEVENLABS_API_KEY"]:
+    os.environ.setdefault(key, "test")
+
+pytest.importorskip("livekit")
+pytest.importorskip("qdrant_client")
+
+from app.service import voice_agent_service
+from app.service.voice_agent_service import active_conversations, initialize_voice_agent, terminate_voice_agent
+from app.service.stt_providers import LocalStreamingSession
+
+
+@contextmanager
+def stubbed_services(setup_result=True, close_result=True):
+    """Stub LiveKit and yield the conversation's transcription session"""
+    stt = LocalStreamingSession(16000, endpointing_ms=300)
+    stt.finish = AsyncMock(wraps=stt.finish)
+    with patch.object(voice_agent_service, "create_room", AsyncMock()), \
+            patch.object(voice_agent_service, "get_room_token", AsyncMock(return_value="token")), \
+            patch.object(voice_agent_service, "create_stt_session", return_value=stt), \
+            patch.object(voice_agent_service, "setup_audio_processor", AsyncMock(return_value=setup_result)), \
+            patch.object(voice_agent_service, "close_session", AsyncMock(return_value=close_result)):
+        yield stt
+
+
+@pytest.mark.unit
+class TestVoiceAgentLifecycle:
+    """A session either starts fully or leaves nothing running, and always tears down."""
+
+    async def test_failed_audio_setup_cleans_up(self):
+        with stubbed_services(setup_result=False) as stt:
+            with pytest.raises(RuntimeError):
+                await initialize_voice_agent("user")
+
+        assert active_conversations == {}
+        stt.finish.assert_awaited_once()
+
+    async def test_terminate_cleans_up_when_livekit_session_is_gone(self):
+        with stubbed_services(close_result=False) as stt:
+            session = await initialize_voice_agent("user")
+            assert session["session_id"] in active_conversations
+
+            assert await terminate_voice_agent(session["session_id"]) is False
+
+        assert session["session_id"] not in active_conversations
+        stt.finish.assert_awaited_once()
+
+    async def test_terminate(self):
+        with stubbed_services() as stt:
+            session = await initialize_voice_agent("user")
+            assert await terminate_voice_agent(session["session_id"]) is True
+
+        assert active_conversations == {}
+        stt.finish.assert_awaited_once()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Unit tests for the sentence-level voice response pipeline.
+"""
+
+import asyncio
+import os
+import sys
+import pytest
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.service.voice_pipeline import PipelineMetrics, SentenceSegmenter, synthesize_stream
+
+
+def segment(text: str, chunk: int = 3, **kwargs):
+    segmenter = SentenceSegmenter(**kwargs)
+    sentences = []
+    for i in range(0, len(text), chunk):
+        sentences.extend(segmenter.feed(text[i:i + chunk]))
+    remainder = segmenter.flush()
+    return sentences + ([remainder] if remainder else [])
+
+
+async def token_stream(tokens, delay=0.0):
+    for token in tokens:
+        if delay:
+            await asyncio.sleep(delay)
+        yield token
+
+
+@pytest.mark.unit
+class TestSentenceSegmenter:
+    """Tests for sentence boundaries in streamed text."""
+
+    def test_splits_sentences_across_tokens(self):
+        assert segment("Hello there! How are you? I'm fine.") == ["Hello there!", "How are you?", "I'm fine."]
+
+    def test_abbreviations_and_decimals_do_not_split(self):
+        text = "Dr. Smith measured 3.5 litres, e.g. a lot. Done."
+        assert segment(text) == ["Dr. Smith measured 3.5 litres, e.g. a lot.", "Done."]
+
+    def test_long_sentence_cut_at_clause(self):
+        text = "This sentence keeps going, and going without any stop at all"
+        sentences = segment(text, max_chars=30)
+        assert sentences[0] == "This sentence keeps going,"
+        assert all(len(sentence) <= 30 for sentence in sentences)
+        assert " ".join(sentences) == text
+
+    def test_sentence_released_before_stream_ends(self):
+        segmenter = SentenceSegmenter()
+        assert segmenter.feed("First one.") == []
+        assert segmenter.feed(" Sec") == ["First one."]
+
+
+@pytest.mark.unit
+class TestSynthesizeStream:
+    """Tests for ordered concurrent synthesis."""
+
+    async def test_audio_in_order_despite_uneven_synthesis(self):
+        async def synthesize(text):
+            # Earlier sentences take longer, so they finish out of order
+            await asyncio.sleep(0.05 if text.startswith("One") else 0.0)
+            return text.encode(), 16000
+
+        tokens = token_stream(["One. ", "Two. ", "Three."])
+        results = [sentence async for sentence in synthesize_stream(tokens, synthesize, max_concurrency=3)]
+        assert [sentence.text for sentence in results] == ["One.", "Two.", "Three."]
+        assert [sentence.audio for sentence in results] == [b"One.", b"Two.", b"Three."]
+
+    async def test_first_audio_arrives_while_llm_still_streaming(self):
+        async def synthesize(text):
+            return b"audio", 16000
+
+        metrics = PipelineMetrics()
+        tokens = token_stream(["Hi. "] + ["more "] * 10 + ["end."], delay=0.02)
+        async for _ in synthesize_stream(tokens, synthesize, metrics=metrics):
+            pass
+        assert metrics.sentences == 2
+        assert metrics.first_audio_ms < metrics.total_ms / 2
+
+    async def test_closing_cancels_synthesis(self):
+        cancelled = []
+
+        async def synthesize(text):
+            try:
+                await asyncio.sleep(0 if text == "One." else 1)
+            except asyncio.CancelledError:
+                cancelled.append(text)
+                raise
+            return b"audio", 16000
+
+        stream = synthesize_stream(token_stream(["One. Two. Three. "]), synthesize, max_concurrency=3)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.01)
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        assert first.text == "One."
+        assert sorted(cancelled) == ["Three.", "Two."]
+
+    async def test_failed_sentence_is_skipped(self):
+        async def synthesize(text):
+            if text == "Bad.":
+                raise RuntimeError("tts down")
+            return b"ok", 16000
+
+        tokens = token_stream(["Good. Bad. Fine."])
+        results = [sentence.text async for sentence in synthesize_stream(tokens, synthesize)]
+        assert results == ["Good.", "Fine."]